@@ -0,0 +1,76 @@
+"""
+Recall@k versus latency of the approximate vector indexes against exact search.
+
+Uses clustered synthetic vectors, which behave more like real embeddings than
+uniform noise. Run from the `app` directory:
+    python -m benchmarks.bench_ann --docs 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.services.vector_index import ExactIndex, HNSWIndex, IVFIndex
+
+
+def clustered_vectors(num: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    noise = rng.standard_normal((num, dim), dtype=np.float32)
+    return centers[rng.integers(0, clusters, num)] + 0.5 * noise
+
+
+def evaluate(index, queries: np.ndarray, truth: list, k: int) -> tuple:
+    timings, recall = [], 0.0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids, _ = index.search(query, k)
+        timings.append(time.perf_counter() - start)
+        recall += len(expected.intersection(ids.tolist())) / k
+    return recall / len(queries), float(np.percentile(timings, 50) * 1000), float(np.percentile(timings, 95) * 1000)
+
+
+def report(name: str, knob: str, value, result: tuple):
+    recall, p50, p95 = result
+    print(f"{name:>6} {knob:>10}={value:<5} recall@k={recall:.3f}  p50={p50:.2f} ms  p95={p95:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--nlist", type=int, default=256)
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.docs, args.dim)
+    queries = clustered_vectors(args.queries, args.dim, seed=1)
+    items = list(zip(range(args.docs), vectors))
+
+    exact = ExactIndex(args.dim)
+    exact.load(items)
+    truth = [set(exact.search(query, args.k)[0].tolist()) for query in queries]
+    report("exact", "-", "-", evaluate(exact, queries, truth, args.k))
+
+    start = time.perf_counter()
+    hnsw = HNSWIndex(args.dim)
+    hnsw.load(items)
+    print(f"hnsw build: {time.perf_counter() - start:.1f}s")
+    for ef_search in args.ef_search:
+        hnsw.ef_search = ef_search
+        report("hnsw", "ef_search", ef_search, evaluate(hnsw, queries, truth, args.k))
+
+    start = time.perf_counter()
+    ivf = IVFIndex(args.dim, nlist=args.nlist)
+    ivf.load(items)
+    print(f"ivf build: {time.perf_counter() - start:.1f}s")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        report("ivf", "nprobe", nprobe, evaluate(ivf, queries, truth, args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+p50/p95 latency of answer generation per generation profile and deadline.
+
+Answers the same question over a synthetic context `--runs` times with each
+profile, optionally also under each `--deadlines-ms` budget, and reports
+how often the deadline cut decoding short. Run from the `app` directory:
+    python -m benchmarks.bench_answer_profiles --runs 20 --deadlines-ms 500 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_vectorize import make_corpus
+from src.services.summary_service import GENERATION_PROFILES, generate_answer
+
+QUESTION = "What is the document about?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--context-chars", type=int, default=3000)
+    parser.add_argument("--deadlines-ms", type=float, nargs="*", default=[])
+    args = parser.parse_args()
+
+    context = " ".join(make_corpus(max(1, args.context_chars // 1000), seed=11))[:args.context_chars]
+    generate_answer(QUESTION, context, profile="fast")
+
+    print(f"{'profile':>10} {'deadline_ms':>12} {'p50_ms':>10} {'p95_ms':>10} {'partial':>8}")
+    for profile in GENERATION_PROFILES:
+        for deadline_ms in [None, *args.deadlines_ms]:
+            latencies, partial = [], 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                deadline = time.time() + deadline_ms / 1000 if deadline_ms is not None else None
+                _, was_partial = generate_answer(QUESTION, context, profile=profile, deadline=deadline)
+                latencies.append((time.perf_counter() - start) * 1000)
+                partial += was_partial
+            p50, p95 = np.percentile(latencies, [50, 95])
+            budget = "-" if deadline_ms is None else f"{deadline_ms:.0f}"
+            print(f"{profile:>10} {budget:>12} {p50:>10.1f} {p95:>10.1f} {partial:>8}")
+
+
+if __name__ == "__main__":
+    main()
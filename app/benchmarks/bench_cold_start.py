@@ -0,0 +1,83 @@
+"""
+Cold-start time of a fresh worker process per resource mode.
+
+Each run starts a new interpreter that imports the services, checks the
+resources and loads and warms up the models, and reports import and load
+seconds. Modes:
+    hub      no staged resources; the models come from the Hub and NLTK data is
+             downloaded at import, as every worker did before the bootstrap command
+    staged   staged resources, online
+    offline  staged resources with OFFLINE=true and HF_HUB_OFFLINE=1
+Stage the resources first with `python -m src.bootstrap`. Run from the `app` directory:
+    python -m benchmarks.bench_cold_start --runs 3 --models embedder summarizer
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.conf.config import settings
+
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+if {download_nltk}:
+    import nltk
+    nltk.download("stopwords")
+    nltk.download("punkt")
+import src.services.document_service, src.services.model
+from src.services.model_registry import model_registry
+from src.services.resources import prepare_resources
+imported = time.perf_counter()
+prepare_resources(model_registry.repo_ids({models}).values())
+model_registry.warm_up({models})
+failed = [name for name in {models} if not model_registry.is_ready([name])]
+print(json.dumps({{"import": imported - start, "load": time.perf_counter() - imported, "failed": failed}}))
+"""
+
+
+def run_worker(mode: str, models: list) -> dict:
+    env = dict(os.environ)
+    if mode == "hub":
+        # An empty resources directory: nothing staged, NLTK data fetched like the old import did
+        env["RESOURCES_DIR"] = tempfile.mkdtemp()
+        env["OFFLINE"] = "false"
+    else:
+        env["RESOURCES_DIR"] = os.path.abspath(settings.resources_dir)
+        env["OFFLINE"] = "true" if mode == "offline" else "false"
+        if mode == "offline":
+            env["HF_HUB_OFFLINE"] = "1"
+    code = WORKER.format(download_nltk=mode == "hub", models=repr(models))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} worker failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    if timings["failed"]:
+        raise RuntimeError(f"{mode} worker could not load {timings['failed']}")
+    timings["total"] = total
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--models", nargs="+", default=["embedder", "summarizer"])
+    parser.add_argument("--modes", nargs="+", default=["hub", "staged", "offline"],
+                        choices=["hub", "staged", "offline"])
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'import s':>9} {'load s':>9} {'total s':>9}   (median of {args.runs})")
+    for mode in args.modes:
+        runs = [run_worker(mode, args.models) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs) for key in ("import", "load", "total")}
+        print(f"{mode:>8} {medians['import']:>9.2f} {medians['load']:>9.2f} {medians['total']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
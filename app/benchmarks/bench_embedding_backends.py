@@ -0,0 +1,72 @@
+"""
+Parity, latency and throughput of the embedding backends (torch, torch_int8, onnx).
+
+Each backend is first checked against the eager fp32 model on a fixed corpus;
+the script exits with status 1 if any text falls below `--min-cosine`. Run
+from the `app` directory:
+    python -m benchmarks.bench_embedding_backends --threads 1 4 --batch-sizes 1 8 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from benchmarks.bench_vectorize import make_corpus
+from src.services.embedding_backends import PARITY_MIN_COSINE, TorchBackend, backend_parity, create_embedding_backend
+from src.services.vector_service import MODEL_NAME
+
+
+def run(backend, tokenizer, texts: list, batch_size: int) -> tuple:
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        inputs = tokenizer(texts[offset:offset + batch_size], truncation=True, padding=True, return_tensors="np")
+        batch_start = time.perf_counter()
+        backend.embed(inputs["input_ids"].astype(np.int64), inputs["attention_mask"].astype(np.int64))
+        latencies.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+    return len(texts) / elapsed, float(np.percentile(latencies, 50) * 1000), float(np.percentile(latencies, 95) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch_int8", "onnx"])
+    parser.add_argument("--docs", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--min-cosine", type=float, default=PARITY_MIN_COSINE)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME).eval()
+    reference = TorchBackend(model)
+    texts = make_corpus(args.docs)
+    failed = False
+
+    with tempfile.TemporaryDirectory() as directory:
+        onnx_path = os.path.join(directory, "model.onnx")
+        for kind in args.backends:
+            for threads in args.threads:
+                torch.set_num_threads(threads)
+                backend = create_embedding_backend(kind, model, onnx_path=onnx_path, threads=threads)
+                cosines = backend_parity(backend, reference, tokenizer)
+                failed |= bool(cosines.min() < args.min_cosine)
+                print(f"{kind:>10} threads={threads:<3} parity min={cosines.min():.5f} mean={cosines.mean():.5f}")
+                run(backend, tokenizer, texts[:8], 8)  # warm-up
+                for batch_size in args.batch_sizes:
+                    throughput, p50, p95 = run(backend, tokenizer, texts, batch_size)
+                    print(f"{'':>10} batch_size={batch_size:<4} {throughput:8.1f} docs/sec  "
+                          f"batch p50={p50:.1f} ms  p95={p95:.1f} ms")
+
+    if failed:
+        print(f"Parity check failed: cosine below {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Wall time and summary length of hierarchical summarization per map-stage worker count.
+
+Summary length should stay bounded as the document grows, and wall time
+should drop as workers are added. Run from the `app` directory:
+    python -m benchmarks.bench_hierarchical_summary --pages 25 100 --workers 1 2 4
+"""
+import argparse
+import time
+
+from benchmarks.bench_summarize import PAGE_CHARS
+from benchmarks.bench_vectorize import make_corpus
+from src.conf.config import settings
+from src.services.summary_service import generate_summary_hierarchical, shutdown_map_executor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[25, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-length", type=int, default=100)
+    parser.add_argument("--min-length", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'workers':>8} {'seconds':>10} {'summary chars':>14}")
+    for pages in args.pages:
+        text = " ".join(make_corpus(pages * PAGE_CHARS // 1000, seed=pages))[:pages * PAGE_CHARS]
+        for workers in args.workers:
+            shutdown_map_executor()
+            settings.summary_map_workers = workers
+            # Warm the pool so worker start-up and model loading are not timed
+            generate_summary_hierarchical(text[:20 * PAGE_CHARS], max_length=args.max_length,
+                                          min_length=args.min_length)
+            start = time.perf_counter()
+            summary = generate_summary_hierarchical(text, max_length=args.max_length, min_length=args.min_length)
+            print(f"{pages:>6} {workers:>8} {time.perf_counter() - start:>10.1f} {len(summary):>14}")
+    shutdown_map_executor()
+
+
+if __name__ == "__main__":
+    main()
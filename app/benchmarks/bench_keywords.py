@@ -0,0 +1,87 @@
+"""
+Docs/sec of keyword extraction against corpus IDF versus per-document TF-IDF.
+
+Builds per-language corpus statistics over `--docs` synthetic documents,
+then extracts the keywords of every document three ways: the previous
+single-document `TfidfVectorizer` fit, `CorpusStats.extract_keywords` per
+document, and `extract_keywords_many` in batches of `--batch-size`. The
+per-document and batch keywords are checked to be identical. Run from the
+`app` directory:
+    python -m benchmarks.bench_keywords --docs 5000 --doc-words 800
+"""
+import argparse
+import random
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.services.corpus_stats import CorpusStats
+
+# Zipf-like draws from a synthetic vocabulary per language, so IDF varies across terms
+VOCABULARY = {
+    "en": [f"term{i}" for i in range(20000)] + "the and of is to in document search summary".split(),
+    "uk": [f"слово{i}" for i in range(20000)] + "та і в на документ пошук".split(),
+}
+
+
+def make_document(lang: str, words: int, rng: random.Random) -> str:
+    vocabulary = VOCABULARY[lang]
+    return " ".join(vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)] for _ in range(words))
+
+
+def legacy_extract_keywords(text: str, num_keywords: int) -> list:
+    """The extractor before `CorpusStats`: a vectorizer fitted on the document alone."""
+    vectorizer = TfidfVectorizer(stop_words='english', max_features=num_keywords)
+    vectorizer.fit_transform([text])
+    return vectorizer.get_feature_names_out().tolist()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--doc-words", type=int, default=800)
+    parser.add_argument("--num-keywords", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    langs = ["uk" if i % 2 else "en" for i in range(args.docs)]
+    texts = [make_document(lang, args.doc_words, rng) for lang in langs]
+
+    stats = CorpusStats()
+
+    def build():
+        for document_id, (text, lang) in enumerate(zip(texts, langs)):
+            stats.add(document_id, text, lang)
+
+    _, build_seconds = timed(build)
+    print(f"{args.docs} documents x {args.doc_words} words; statistics built at {args.docs / build_seconds:.0f} docs/sec")
+
+    _, legacy_seconds = timed(lambda: [legacy_extract_keywords(text, args.num_keywords) for text in texts])
+    single, single_seconds = timed(lambda: [stats.extract_keywords(text, lang, args.num_keywords)
+                                            for text, lang in zip(texts, langs)])
+
+    def batched():
+        keywords = []
+        for start in range(0, len(texts), args.batch_size):
+            keywords.extend(stats.extract_keywords_many(texts[start:start + args.batch_size],
+                                                        langs[start:start + args.batch_size], args.num_keywords))
+        return keywords
+
+    many, many_seconds = timed(batched)
+
+    print(f"{'method':<28} {'docs/sec':>10} {'ms/doc':>8}")
+    for name, seconds in [("per-document TfidfVectorizer", legacy_seconds), ("corpus IDF, per document", single_seconds),
+                          (f"corpus IDF, batch {args.batch_size}", many_seconds)]:
+        print(f"{name:<28} {args.docs / seconds:>10.0f} {seconds / args.docs * 1000:>8.3f}")
+    print(f"batch keywords identical to per-document: {many == single}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Tokens/sec and peak RSS of sliding-window document embedding.
+
+Each document size runs in a fresh process so peak RSS is not inherited
+from a previous, larger run. Run from the `app` directory:
+    python -m benchmarks.bench_long_document
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+from benchmarks.bench_vectorize import make_corpus
+
+
+def run_once(num_chars: int, batch_size: int) -> dict:
+    from src.services.vector_service import get_embedder, iter_token_windows, vectorize_document_llm
+
+    text = ""
+    for chunk in make_corpus(1 + num_chars // 500, seed=num_chars):
+        text += chunk + " "
+    text = text[:num_chars]
+
+    vectorize_document_llm("warm up")
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    vectorize_document_llm(text, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    num_tokens = len(get_embedder().tokenizer(text, add_special_tokens=False)["input_ids"])
+    num_windows = sum(1 for _ in iter_token_windows(text))
+    return {
+        "chars": num_chars,
+        "tokens": num_tokens,
+        "windows": num_windows,
+        "seconds": elapsed,
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'chars':>10} {'tokens':>10} {'windows':>8} {'seconds':>9} {'tokens/sec':>11} {'peak MB':>9} {'growth MB':>10}")
+    for size in args.sizes:
+        with ctx.Pool(1) as pool:
+            row = pool.apply(run_once, (size, args.batch_size))
+        print(f"{row['chars']:>10} {row['tokens']:>10} {row['windows']:>8} {row['seconds']:>9.2f} "
+              f"{row['tokens'] / row['seconds']:>11.0f} {row['peak_rss_mb']:>9.0f} {row['rss_growth_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Load test of the query embedding micro-batcher.
+
+Fires `--requests` single-query embeddings at each concurrency level, once
+with batching disabled (window 0) and once per configured window, and
+reports queries/sec and the achieved mean batch size. Queries are unique per
+run so the embedding cache does not hide the model cost. Run from the `app`
+directory:
+    python -m benchmarks.bench_micro_batching --concurrency 1 8 32 --windows 2 5 10
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_vectorize import make_corpus
+from src.services.micro_batcher import MicroBatcher
+from src.services.vector_service import vectorize_texts_llm
+
+
+async def load(batcher: MicroBatcher, queries: list, concurrency: int) -> float:
+    pending = iter(queries)
+
+    async def client():
+        for query in pending:
+            await batcher.submit(query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return len(queries) / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--windows", type=float, nargs="+", default=[2.0, 5.0, 10.0])
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    vectorize_texts_llm(["warm up"])
+    seed = 0
+    print(f"{'concurrency':>11} {'window_ms':>9} {'queries/sec':>11} {'mean batch':>10}")
+    for concurrency in args.concurrency:
+        for window_ms in [0.0] + args.windows:
+            seed += 1
+            queries = [query[:200] for query in make_corpus(args.requests, seed=seed)]
+            batcher = MicroBatcher(f"bench-{seed}", vectorize_texts_llm, window_ms=window_ms,
+                                   max_batch_size=args.max_batch_size)
+            throughput = await load(batcher, queries, concurrency)
+            batch_sizes = batcher.stats()["batch_sizes"]
+            mean_batch = batch_sizes["sum"] / max(batch_sizes["count"], 1)
+            print(f"{concurrency:>11} {window_ms:>9.1f} {throughput:>11.1f} {mean_batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
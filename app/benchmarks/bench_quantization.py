@@ -0,0 +1,70 @@
+"""
+Memory, recall@k and latency of int8 / float16 vector storage against float32.
+
+Each quantized index is measured twice: on the quantized scores alone and
+after exact re-ranking against the full-precision vectors on disk. Run from
+the `app` directory:
+    python -m benchmarks.bench_quantization --docs 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_ann import clustered_vectors
+from src.services.vector_index import ExactIndex, QuantizedIndex, top_k_indices
+
+
+def evaluate(search, queries: np.ndarray, truth: list, k: int) -> tuple:
+    timings, recall = [], 0.0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = search(query)
+        timings.append(time.perf_counter() - start)
+        recall += len(expected.intersection(ids.tolist())) / k
+    return recall / len(queries), float(np.percentile(timings, 50) * 1000), float(np.percentile(timings, 95) * 1000)
+
+
+def report(name: str, memory_bytes: int, result: tuple):
+    recall, p50, p95 = result
+    print(f"{name:>16} memory={memory_bytes / 2 ** 20:7.1f} MiB  recall@k={recall:.3f}  "
+          f"p50={p50:.2f} ms  p95={p95:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.docs, args.dim)
+    queries = clustered_vectors(args.queries, args.dim, seed=1)
+    items = list(zip(range(args.docs), vectors))
+
+    exact = ExactIndex(args.dim)
+    exact.load(items)
+    truth = [set(exact.search(query, args.k)[0].tolist()) for query in queries]
+    report("float32", exact.memory_bytes, evaluate(lambda q: exact.search(q, args.k)[0], queries, truth, args.k))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for precision in ("float16", "int8"):
+            index = QuantizedIndex(os.path.join(directory, f"{precision}.f32"), args.dim, precision=precision,
+                                   rerank_factor=args.rerank_factor)
+            index.load(items)
+
+            def approximate(query, index=index):
+                ids, scores = index.approximate_scores(query)
+                return ids[top_k_indices(scores, args.k)]
+
+            report(precision, index.memory_bytes, evaluate(approximate, queries, truth, args.k))
+            report(f"{precision}+rerank", index.memory_bytes,
+                   evaluate(lambda q, index=index: index.search(q, args.k)[0], queries, truth, args.k))
+
+
+if __name__ == "__main__":
+    main()
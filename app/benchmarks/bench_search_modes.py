@@ -0,0 +1,66 @@
+"""
+Latency and bytes transferred per search mode against the configured database.
+
+Compares the pre-index path (pull every full text over the wire), the
+in-process lexical index, PostgreSQL full-text candidates and, with
+pgvector storage, single-query hybrid retrieval.
+Run from the `app` directory:
+    python -m benchmarks.bench_search_modes --query "contract termination"
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from src.database.db import SessionLocal
+from src.entity.models import Document
+from src.services.document_service import search_document
+from src.conf.config import settings
+
+
+async def full_scan(db) -> int:
+    """The former path: every document's full text is transferred for each query."""
+    result = await db.execute(select(Document.document_id, Document.full_text))
+    return sum(len((text or "").encode("utf-8")) + 4 for _, text in result.all())
+
+
+async def run(args):
+    async with SessionLocal() as db:
+        print(f"{'mode':>12} {'p50 ms':>9} {'p95 ms':>9} {'bytes/query':>12}")
+
+        timings, transferred = [], 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            transferred = await full_scan(db)
+            timings.append(time.perf_counter() - start)
+        print(f"{'full_scan':>12} {np.percentile(timings, 50) * 1000:>9.1f} "
+              f"{np.percentile(timings, 95) * 1000:>9.1f} {transferred:>12}")
+
+        modes = ["in_process", "fts"]
+        if settings.vector_storage == "pgvector":
+            modes.append("sql_hybrid")
+        for mode in modes:
+            await search_document(args.query, db, top_k=args.top_k, search_mode=mode)  # load indexes
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await search_document(args.query, db, top_k=args.top_k, search_mode=mode)
+                timings.append(time.perf_counter() - start)
+            # SQL modes return (document_id, score) pairs; in_process transfers nothing once warm
+            transferred = {"in_process": 0, "fts": 12 * settings.fts_candidates, "sql_hybrid": 12 * args.top_k}[mode]
+            print(f"{mode:>12} {np.percentile(timings, 50) * 1000:>9.1f} "
+                  f"{np.percentile(timings, 95) * 1000:>9.1f} {transferred:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--query", default="document summary")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Latency of dense scoring against the resident document embedding matrix.
+
+BLAS is pinned to one thread so the numbers reflect a single CPU core.
+Run from the `app` directory:
+    python -m benchmarks.bench_search_scoring --docs 100000
+"""
+import os
+
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+import argparse
+import time
+
+import numpy as np
+
+from src.services.vector_index import ExactIndex
+
+
+def random_vectors(num: int, dim: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((num, dim), dtype=np.float32)
+
+
+def percentile_ms(timings: list, q: float) -> float:
+    return float(np.percentile(timings, q) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    index = ExactIndex(args.dim)
+    index.load(zip(range(args.docs), random_vectors(args.docs, args.dim)))
+    queries = random_vectors(args.queries, args.dim, seed=1)
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, args.k)
+        timings.append(time.perf_counter() - start)
+
+    print(f"docs={args.docs} dim={args.dim} k={args.k} queries={args.queries}")
+    print(f"p50={percentile_ms(timings, 50):.2f} ms  p95={percentile_ms(timings, 95):.2f} ms  "
+          f"mean={np.mean(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
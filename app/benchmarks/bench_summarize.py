@@ -0,0 +1,54 @@
+"""
+Wall time and tokens/sec of chunk summarization per batch size.
+
+Summarizes a synthetic document of `--pages` pages (about 3,000 characters
+each) with every batch size and checks the summaries against the
+`batch_size=1` run. Then compares model calls and latency of the old
+1024-character slices with token-aware chunking. Run from the `app` directory:
+    python -m benchmarks.bench_summarize --pages 100 --batch-sizes 1 4 8 16
+"""
+import argparse
+import time
+
+from benchmarks.bench_vectorize import make_corpus
+from src.services.summary_service import chunk_for_model, generate_summary, get_summarizer, summarize_chunks
+
+PAGE_CHARS = 3000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--max-length", type=int, default=30)
+    parser.add_argument("--min-length", type=int, default=10)
+    args = parser.parse_args()
+
+    text = " ".join(make_corpus(args.pages * PAGE_CHARS // 1000, seed=7))[:args.pages * PAGE_CHARS]
+    num_tokens = len(get_summarizer().tokenizer(text)["input_ids"])
+    generate_summary("warm up the summarization model", max_length=8, min_length=2)
+
+    reference = None
+    print(f"{'batch_size':>10} {'seconds':>10} {'tokens/sec':>10} {'identical':>10}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        summary = generate_summary(text, max_length=args.max_length, min_length=args.min_length,
+                                   batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = summary
+        print(f"{batch_size:>10} {elapsed:>10.1f} {num_tokens / elapsed:>10.1f} {str(summary == reference):>10}")
+
+    print(f"\n{'chunking':>10} {'chunks':>10} {'calls':>10} {'seconds':>10}")
+    batch_size = args.batch_sizes[-1]
+    for name, chunks in (("chars", [text[i:i + 1024] for i in range(0, len(text), 1024)]),
+                         ("tokens", chunk_for_model(text))):
+        start = time.perf_counter()
+        summarize_chunks(chunks, max_length=args.max_length, min_length=args.min_length, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        calls = -(-len(chunks) // batch_size)
+        print(f"{name:>10} {len(chunks):>10} {calls:>10} {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
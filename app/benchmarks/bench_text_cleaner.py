@@ -0,0 +1,78 @@
+"""
+MB/s of the text cleaner against the previous per-call implementation.
+
+Cleans synthetic documents of `--sizes-mb` megabytes with both, checks that
+the outputs are identical, then times `clean_many` over a batch of smaller
+documents. Run from the `app` directory:
+    python -m benchmarks.bench_text_cleaner --sizes-mb 1 10 --lang english
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+from src.services.text_cleaner import get_text_cleaner
+
+# Plain words plus stop words, punctuation, Unicode quotes and contractions, so every code path runs
+VOCABULARY = ("document search summary vector model token batch query answer context language text corpus "
+              "passage embedding score index retrieval the and of is Hello, (world) «цитата» “quoted” don’t "
+              "cannot gonna 3.88 e.g. well—then Привіт! і та").split()
+
+
+def make_document(size_bytes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words, size = [], 0
+    while size < size_bytes:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        size += len(word.encode("utf-8")) + 1
+    return " ".join(words)
+
+
+def legacy_clean_text(text: str, lang: str) -> str:
+    """The cleaner before `TextCleaner`: everything rebuilt on every call."""
+    text = text.lower()
+    text = re.sub(f"[{re.escape(string.punctuation)}]", "", text)
+    words = word_tokenize(text)
+    stop_words = set(stopwords.words(lang)) if lang in stopwords.fileids() else set()
+    return " ".join(word for word in words if word not in stop_words)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--lang", default="english")
+    parser.add_argument("--batch-docs", type=int, default=1000)
+    parser.add_argument("--batch-doc-kb", type=float, default=4)
+    args = parser.parse_args()
+
+    cleaner = get_text_cleaner(args.lang)
+    print(f"{'size_mb':>8} {'legacy MB/s':>12} {'cleaner MB/s':>13} {'speedup':>8} {'identical':>10}")
+    for size_mb in args.sizes_mb:
+        text = make_document(int(size_mb * 1024 * 1024))
+        megabytes = len(text.encode("utf-8")) / 1024 / 1024
+        expected, legacy_seconds = timed(legacy_clean_text, text, args.lang)
+        cleaned, cleaner_seconds = timed(cleaner.clean, text)
+        print(f"{size_mb:>8g} {megabytes / legacy_seconds:>12.2f} {megabytes / cleaner_seconds:>13.2f} "
+              f"{legacy_seconds / cleaner_seconds:>8.1f} {str(cleaned == expected):>10}")
+
+    texts = [make_document(int(args.batch_doc_kb * 1024), seed=i) for i in range(args.batch_docs)]
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / 1024 / 1024
+    expected, legacy_seconds = timed(lambda: [legacy_clean_text(text, args.lang) for text in texts])
+    cleaned, cleaner_seconds = timed(cleaner.clean_many, texts)
+    print(f"\nclean_many, {args.batch_docs} x {args.batch_doc_kb:g} KB: legacy {megabytes / legacy_seconds:.2f} MB/s, "
+          f"cleaner {megabytes / cleaner_seconds:.2f} MB/s, identical {cleaned == expected}")
+
+
+if __name__ == "__main__":
+    main()
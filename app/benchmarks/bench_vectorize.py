@@ -0,0 +1,42 @@
+"""
+Throughput benchmark for batched text embedding.
+
+Run from the `app` directory:
+    python -m benchmarks.bench_vectorize --docs 256
+"""
+import argparse
+import random
+import time
+
+from src.services.vector_service import vectorize_texts_llm
+
+
+WORDS = ("document search summary vector model token batch query answer context "
+         "language text corpus passage embedding score index retrieval").split()
+
+
+def make_corpus(num_docs: int, seed: int = 0) -> list:
+    """Build texts of mixed length so bucketing has something to do."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(8, 300))) for _ in range(num_docs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=256, help="Number of texts to embed")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    texts = make_corpus(args.docs)
+    vectorize_texts_llm(texts[:8])  # warm-up
+
+    print(f"{'batch_size':>10} {'seconds':>10} {'docs/sec':>10}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        vectorize_texts_llm(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>10} {elapsed:>10.2f} {args.docs / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
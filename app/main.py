@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 import os
 import signal
@@ -8,6 +9,8 @@ import uvicorn
 import logging
 
 from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
 
 import uvicorn.logging
@@ -19,6 +22,17 @@ from src.database.db import engine, SessionLocal, get_db
 # from src.routes import auth, users, pdf, query_history
 from src.routes import auth, users, query_history
 from src.routes.document_routes import router as document_router
+from src.routes import jobs
+from src.services.job_queue import job_queue
+from src.services.lexical_index import lexical_index
+from src.services.corpus_stats import corpus_stats
+from src.services.model_registry import model_registry
+from src.services.resources import prepare_resources
+from src.services.inference_executor import shutdown_inference_pools
+from src.services.summary_service import shutdown_map_executor
+from src.services.metrics import metrics
+# Registers the "qa" model; the other models register with the services the routes import
+import src.services.model  # noqa: F401
 # from src.routes.question_routes import router as question_router
 # from src.routes.history_routes import router as history_router
 
@@ -27,14 +41,35 @@ logger = logging.getLogger(uvicorn.logging.__name__)
 
 origins = settings.cors_origins.split('|')
 
+required_models = [name.strip() for name in settings.required_models.split(',') if name.strip()]
+
 
 @asynccontextmanager
 async def lifespan(test: FastAPI):
     #startup initialization goes here    
     logger.info("Knock-knock...")
     logger.info("Uvicorn has you...")
+    unknown_models = sorted(set(required_models) - set(model_registry.names()))
+    if unknown_models:
+        # Readiness would otherwise stay at 503 forever
+        raise RuntimeError(f"REQUIRED_MODELS names unknown models: {', '.join(unknown_models)}; "
+                           f"registered: {', '.join(model_registry.names())}")
+    # Offline, anything not staged fails startup here; online, missing NLTK data is fetched once
+    prepare_resources(model_registry.repo_ids(required_models).values())
+    # Models warm up in the background: liveness answers at once, readiness once they are done
+    warmup_task = asyncio.create_task(model_registry.warm_up_async(required_models))
+    await job_queue.start()
     yield
     #shutdown logic goes here    
+    await job_queue.stop()
+    if not warmup_task.done():
+        warmup_task.cancel()
+    if lexical_index.loaded and lexical_index.snapshot_dir:
+        lexical_index.save()
+    if corpus_stats.loaded and corpus_stats.snapshot_dir:
+        corpus_stats.save()
+    shutdown_inference_pools()
+    shutdown_map_executor()
     SessionLocal.close_all()
     engine.dispose()
     # await FastAPILimiter.close()
@@ -56,6 +91,7 @@ app.include_router(auth.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
 app.include_router(query_history.router, prefix='/api')
 app.include_router(document_router, prefix="/documents", tags=["documents"])        #VY
+app.include_router(jobs.router)
 # app.include_router(question_router, prefix="/questions", tags=["questions"])        #VY
 # app.include_router(history_router, prefix="/history", tags=["history"])     #VY
 
@@ -86,7 +122,39 @@ def healthchecker(db: Session = Depends(get_db)) -> dict:
         add_log = f'\n000:\t{datetime.now()}\tError connecting to the database.: {e}\t{function_name}'
         logger.error(add_log)
         raise HTTPException(status_code=500, detail="Database is not configured properly.")
-    
+
+
+@app.get('/api/healthcheck/live')
+def liveness() -> dict:
+    """Liveness probe: the process is up and serving requests."""
+    return {'status': "alive"}
+
+
+@app.get('/api/healthcheck/ready')
+async def readiness(db: AsyncSession = Depends(get_db)):
+    """Readiness probe: the database answers and every required model is loaded and warmed up."""
+    try:
+        database_ok = (await db.execute(text('SELECT 1'))).scalar() == 1
+    except Exception as e:
+        logger.error(f'Readiness check could not reach the database: {e}')
+        database_ok = False
+
+    models_ready = model_registry.is_ready(required_models)
+    ready = database_ok and models_ready
+    body = {
+        'status': "ready" if ready else "not ready",
+        'database': database_ok,
+        'required_models': required_models,
+        'models': model_registry.stats(),
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
+@app.get('/api/metrics', response_class=PlainTextResponse)
+def metrics_endpoint() -> str:
+    """Service metrics in the Prometheus text format."""
+    return metrics.render()
+
 
 if __name__ == '__main__':
     try:
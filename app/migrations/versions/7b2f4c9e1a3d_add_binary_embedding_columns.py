@@ -0,0 +1,82 @@
+"""Add binary embedding columns to documents and backfill them from JSON
+
+Revision ID: 7b2f4c9e1a3d
+Revises: 455b29fd0664
+Create Date: 2026-10-18 10:12:40.114023
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+from src.conf.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2f4c9e1a3d'
+down_revision: Union[str, None] = '455b29fd0664'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIM = 384
+BACKFILL_BATCH = 500
+COLUMNS = (('full_text_vector', 'full_text_embedding'), ('summary_vector', 'summary_embedding'))
+
+
+def _decode_legacy(value):
+    # update_document_vectors stored json.dumps(...) inside a JSON column, so values may be double-encoded
+    while isinstance(value, str):
+        value = json.loads(value)
+    vector = np.asarray(value, dtype=np.float32).ravel()
+    return vector if vector.shape[0] == EMBEDDING_DIM else None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    use_pgvector = settings.vector_storage == 'pgvector'
+
+    if use_pgvector:
+        available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")).scalar()
+        if not available:
+            raise RuntimeError("VECTOR_STORAGE=pgvector but the pgvector extension is not available on this server. "
+                               "Install pgvector or set VECTOR_STORAGE=bytea.")
+        op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        column_type = f"vector({EMBEDDING_DIM})"
+    else:
+        column_type = "bytea"
+
+    for _, new_column in COLUMNS:
+        op.execute(f"ALTER TABLE documents ADD COLUMN {new_column} {column_type}")
+
+    # Backfill from the legacy JSON columns, which stay in place and readable
+    for old_column, new_column in COLUMNS:
+        ids = bind.execute(sa.text(f"SELECT document_id FROM documents WHERE {old_column} IS NOT NULL")).scalars().all()
+        if use_pgvector:
+            stmt = sa.text(f"UPDATE documents SET {new_column} = CAST(:vector AS vector) WHERE document_id = :document_id")
+        else:
+            stmt = sa.text(f"UPDATE documents SET {new_column} = :vector WHERE document_id = :document_id") \
+                .bindparams(sa.bindparam('vector', type_=sa.LargeBinary()))
+
+        for start in range(0, len(ids), BACKFILL_BATCH):
+            rows = bind.execute(
+                sa.text(f"SELECT document_id, {old_column}::text FROM documents WHERE document_id IN :ids")
+                .bindparams(sa.bindparam('ids', expanding=True)),
+                {'ids': ids[start:start + BACKFILL_BATCH]},
+            ).all()
+            params = []
+            for document_id, raw in rows:
+                vector = _decode_legacy(raw)
+                if vector is None:
+                    continue
+                value = '[' + ','.join(map(repr, vector.tolist())) + ']' if use_pgvector else vector.tobytes()
+                params.append({'document_id': document_id, 'vector': value})
+            if params:
+                bind.execute(stmt, params)
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'summary_embedding')
+    op.drop_column('documents', 'full_text_embedding')
@@ -0,0 +1,49 @@
+"""Add language and generated full_text_tsv column with a GIN index to documents
+
+Revision ID: c5e8d2a7f914
+Revises: 7b2f4c9e1a3d
+Create Date: 2026-10-18 11:02:17.520931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8d2a7f914'
+down_revision: Union[str, None] = '7b2f4c9e1a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('language', sa.String(length=2), nullable=True))
+
+    # Same rule as detect_language: Cyrillic letters outnumber Latin ones in the first 20k characters
+    op.execute("""
+        UPDATE documents
+        SET language = CASE
+            WHEN length(regexp_replace(left(full_text, 20000), '[^А-Яа-яІіЇїЄєҐґ]', '', 'g'))
+               > length(regexp_replace(left(full_text, 20000), '[^A-Za-z]', '', 'g'))
+            THEN 'uk' ELSE 'en' END
+        WHERE full_text IS NOT NULL
+    """)
+
+    op.execute("""
+        ALTER TABLE documents ADD COLUMN full_text_tsv tsvector GENERATED ALWAYS AS (
+            CASE WHEN language = 'en'
+                THEN to_tsvector('english'::regconfig, coalesce(full_text, ''))
+                ELSE to_tsvector('simple'::regconfig, coalesce(full_text, ''))
+            END
+        ) STORED
+    """)
+    op.create_index('ix_documents_full_text_tsv', 'documents', ['full_text_tsv'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_full_text_tsv', table_name='documents', postgresql_using='gin')
+    op.drop_column('documents', 'full_text_tsv')
+    op.drop_column('documents', 'language')
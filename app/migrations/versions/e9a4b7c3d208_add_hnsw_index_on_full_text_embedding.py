@@ -0,0 +1,37 @@
+"""Add HNSW index on documents.full_text_embedding when it is a pgvector column
+
+Revision ID: e9a4b7c3d208
+Revises: c5e8d2a7f914
+Create Date: 2026-10-18 11:47:53.208716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a4b7c3d208'
+down_revision: Union[str, None] = 'c5e8d2a7f914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_pgvector_column() -> bool:
+    udt_name = op.get_bind().execute(sa.text(
+        "SELECT udt_name FROM information_schema.columns "
+        "WHERE table_name = 'documents' AND column_name = 'full_text_embedding'"
+    )).scalar()
+    return udt_name == 'vector'
+
+
+def upgrade() -> None:
+    # bytea storage has no ANN support; hybrid SQL search is only available with pgvector
+    if _is_pgvector_column():
+        op.execute("CREATE INDEX IF NOT EXISTS ix_documents_full_text_embedding_hnsw "
+                   "ON documents USING hnsw (full_text_embedding vector_cosine_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_documents_full_text_embedding_hnsw")
@@ -0,0 +1,100 @@
+"""
+Stage NLTK data and model snapshots for offline runs.
+
+Downloads the NLTK packages and a safetensors snapshot of every registered
+model into `settings.resources_dir`. The services load staged models without
+Hub requests, and with OFFLINE=true only from there. Already staged
+resources are skipped. Run from the `app` directory with network access:
+    python -m src.bootstrap --models embedder summarizer qa
+"""
+import argparse
+import glob
+import logging
+import os
+import shutil
+import sys
+
+import nltk
+import transformers
+from huggingface_hub import HfApi, snapshot_download
+
+from src.conf.config import settings
+from src.services.model_registry import model_registry
+from src.services.resources import NLTK_PACKAGES, REVISION_FILE, missing_nltk_packages, model_dir, nltk_data_dir
+# Imported for their model registrations
+import src.services.model  # noqa: F401
+import src.services.summary_service  # noqa: F401
+import src.services.vector_service  # noqa: F401
+
+# Top-level files `from_pretrained` needs besides the weights: configs, vocabularies, sentencepiece models
+CONFIG_PATTERNS = ["*.json", "*.txt", "*.model"]
+LEGACY_WEIGHT_PATTERNS = ["pytorch_model*.bin", "pytorch_model*.bin.index.json"]
+
+
+def stage_nltk(force: bool = False) -> None:
+    packages = list(NLTK_PACKAGES) if force else missing_nltk_packages(paths=[nltk_data_dir()])
+    for package in packages:
+        logging.info(f"Staging NLTK package '{package}'")
+        nltk.download(package, download_dir=nltk_data_dir(), quiet=True, force=force, raise_on_error=True)
+
+
+def stage_model(repo_id: str, force: bool = False) -> None:
+    """
+    Download a model snapshot with safetensors weights into its staging directory.
+
+    Repositories without safetensors weights are downloaded as PyTorch
+    checkpoints and converted. The snapshot is written next to the target and
+    moved into place only when complete.
+    """
+    target = model_dir(repo_id)
+    if os.path.isfile(os.path.join(target, "config.json")) and not force:
+        logging.info(f"Model '{repo_id}' already staged in {target}")
+        return
+
+    api = HfApi()
+    revision = api.model_info(repo_id).sha
+    has_safetensors = any(name.endswith(".safetensors") for name in api.list_repo_files(repo_id, revision=revision))
+
+    partial = f"{target}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    logging.info(f"Staging model '{repo_id}' at revision {revision}")
+    snapshot_download(repo_id, revision=revision, local_dir=partial, ignore_patterns=["*/*"],
+                      allow_patterns=CONFIG_PATTERNS + (["*.safetensors"] if has_safetensors else LEGACY_WEIGHT_PATTERNS))
+    shutil.rmtree(os.path.join(partial, ".cache"), ignore_errors=True)
+
+    config = transformers.AutoConfig.from_pretrained(partial)
+    if not has_safetensors:
+        model_class = getattr(transformers, config.architectures[0])
+        model_class.from_pretrained(partial).save_pretrained(partial, safe_serialization=True)
+        for path in glob.glob(os.path.join(partial, "pytorch_model*.bin*")):
+            os.remove(path)
+    # Fails here, not at service start, if a tokenizer file is missing
+    transformers.AutoTokenizer.from_pretrained(partial)
+
+    with open(os.path.join(partial, REVISION_FILE), "w") as f:
+        f.write(revision)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(partial, target)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=model_registry.names(), choices=model_registry.names())
+    parser.add_argument("--force", action="store_true", help="Download again even if already staged")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    os.makedirs(settings.resources_dir, exist_ok=True)
+    try:
+        stage_nltk(args.force)
+        for repo_id in model_registry.repo_ids(args.models).values():
+            stage_model(repo_id, args.force)
+    except Exception as e:
+        logging.error(f"Bootstrap failed: {e}")
+        return 1
+    logging.info(f"Resources staged in {os.path.abspath(settings.resources_dir)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,62 @@ class Settings(BaseSettings):
     cors_origins: str
     # rate_limiter_times: int
     # rate_limiter_seconds: int
+    required_models: str = "embedder,summarizer"   # warmed up at startup and checked by readiness
+    resources_dir: str = "cache/resources"   # NLTK data and model snapshots staged by `python -m src.bootstrap`
+    offline: bool = False   # load NLTK data and models only from resources_dir, never from the network
+    # Inference pools: executor "thread" or "process", concurrent workers, calls allowed to wait
+    embedder_executor: str = "thread"
+    embedder_workers: int = 1
+    embedder_queue_size: int = 64
+    summarizer_executor: str = "thread"
+    summarizer_workers: int = 1
+    summarizer_queue_size: int = 8
+    text_executor: str = "thread"
+    text_workers: int = 2
+    text_queue_size: int = 64
+    summary_batch_size: int = 1   # chunks per summarization call; padded batches may differ slightly, check with bench_summarize before raising
+    summary_chunk_tokens: int = 1000   # capped by the model's input window
+    summary_chunk_overlap_tokens: int = 0
+    summary_map_workers: int = 0   # processes of the hierarchical map stage; below 2 runs it in-process
+    answer_profile: str = "quality"   # default generation profile: "fast", "balanced" or "quality"
+    cancellation_poll_ms: float = 100.0   # how often running requests check that their client is still there
+    summary_cache_entries: int = 1024
+    summary_cache_ttl_seconds: int = 7 * 24 * 3600
+    redis_url: str = ""   # e.g. "redis://localhost:6379/0"; empty keeps the summary cache in memory only
+    job_workers: int = 2   # background jobs run at the same time
+    job_max_attempts: int = 3
+    job_retry_delay_seconds: float = 5.0   # doubled after every failed attempt
+    job_history_size: int = 1000
+    embedding_batch_window_ms: float = 5.0   # 0 embeds every query on its own
+    embedding_max_batch_size: int = 32
+    embedding_cache_dir: str = "cache/embeddings"   # empty string disables the disk tier
+    embedding_cache_memory_bytes: int = 64 * 1024 * 1024
+    embedding_backend: str = "torch"   # "torch", "torch_int8" or "onnx"
+    embedding_onnx_dir: str = "cache/onnx"
+    embedding_threads: int = 0   # 0 keeps the library default
+    vector_storage: str = "bytea"   # "pgvector" for a native vector(384) column
+    vector_index: str = "exact"     # "exact", "hnsw" or "ivf"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 8
+    ann_candidates: int = 100
+    vector_index_rebuild_every: int = 10000
+    vector_precision: str = "float32"   # "float32", "float16" or "int8"
+    vector_store_path: str = "cache/vectors.f32"  # each process writes its own file next to this path
+    rerank_factor: int = 10
+    lexical_scoring: str = "tfidf"  # "tfidf" or "bm25"
+    lexical_index_dir: str = "cache/lexical"
+    lexical_index_snapshot_every: int = 100
+    corpus_stats_dir: str = "cache/corpus_stats"
+    corpus_stats_snapshot_every: int = 100
+    keywords_batch_size: int = 256  # documents per batch of corpus keyword extraction
+    fts_candidates: int = 200
+    hybrid_candidates: int = 100
+    hybrid_dense_weight: float = 0.5
+    hybrid_lexical_weight: float = 0.5
+    rrf_k: int = 60
 
     model_config = ConfigDict(extra='ignore', env_file=env_file if env_file.exists() else None, env_file_encoding = "utf-8")
 
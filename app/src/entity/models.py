@@ -1,12 +1,73 @@
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, relationship, deferred
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy import JSON
 from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, DateTime, func, Enum, Text
+from sqlalchemy import Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.types import TypeDecorator, LargeBinary
 from datetime import datetime
 import enum
+import numpy as np
+from src.conf.config import settings
+
+try:
+    from pgvector.sqlalchemy import Vector
+except ImportError:
+    Vector = None
 
 Base = declarative_base()
 
+EMBEDDING_DIM = 384
+
+# English documents are stemmed; Ukrainian (and anything else) use the 'simple' configuration
+FULL_TEXT_TSV_EXPRESSION = (
+    "CASE WHEN language = 'en' "
+    "THEN to_tsvector('english'::regconfig, coalesce(full_text, '')) "
+    "ELSE to_tsvector('simple'::regconfig, coalesce(full_text, '')) END"
+)
+
+
+class Embedding(TypeDecorator):
+    """
+    float32 embedding stored as a pgvector `vector(dim)` column or as raw `bytea`.
+
+    Values are bound from anything `np.asarray` accepts and loaded back as a
+    float32 array; `bytea` values are decoded with `np.frombuffer` without copying.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        super().__init__()
+        self.dim = dim
+
+    @property
+    def use_pgvector(self) -> bool:
+        return settings.vector_storage == "pgvector"
+
+    def load_dialect_impl(self, dialect):
+        if self.use_pgvector:
+            if Vector is None:
+                raise RuntimeError("VECTOR_STORAGE=pgvector requires the 'pgvector' package.")
+            return dialect.type_descriptor(Vector(self.dim))
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        vector = np.asarray(value, dtype=np.float32).ravel()
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected a vector of {self.dim} dimensions, got {vector.shape[0]}.")
+        return vector if self.use_pgvector else vector.tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if self.use_pgvector:
+            return np.asarray(value, dtype=np.float32)
+        return np.frombuffer(value, dtype=np.float32)
+
+
 class Role(enum.Enum):
     admin: str = "admin"
     user: str = "user"
@@ -56,9 +117,13 @@ class Document(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     upload_date = Column(DateTime, default=datetime.utcnow)
     summary = Column(String, nullable=True)
-    summary_vector = Column(JSON, nullable=True)    # Field for summary text vectors
-    full_text_vector = Column(JSON, nullable=True)  # Field for full text vectors
+    summary_vector = Column(JSON, nullable=True)    # Legacy JSON summary vector, read-only
+    full_text_vector = Column(JSON, nullable=True)  # Legacy JSON full text vector, read-only
+    summary_embedding = Column(Embedding(), nullable=True)      # Binary float32 summary vector
+    full_text_embedding = Column(Embedding(), nullable=True)    # Binary float32 full text vector
     full_text = Column(Text, nullable=True)  # Field to store the full text
+    language = Column(String(2), nullable=True)  # "uk" or "en", selects the text search configuration
+    full_text_tsv = deferred(Column(TSVECTOR, Computed(FULL_TEXT_TSV_EXPRESSION, persisted=True), nullable=True))
 
     user = relationship("User", back_populates="documents")
 
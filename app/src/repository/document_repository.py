@@ -1,13 +1,20 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.sql import text
-from sqlalchemy import update
+from sqlalchemy import update, cast, func, bindparam, literal, Float
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from fastapi import Depends, HTTPException
 from src.database.db import get_db
-from src.entity.models import Document
-from src.schemas.schemas import DocumentCreate
-from src.entity.models import Document
-from typing import Tuple, List, Dict, Optional
+from src.entity.models import Document, Embedding, EMBEDDING_DIM
+from src.schemas.schemas import DocumentCreate, DocumentSearchFilters
+from src.services.vector_index import document_index
+from src.services.lexical_index import lexical_index
+from src.services.corpus_stats import corpus_stats
+from src.services.summary_cache import summary_cache
+from src.services.language import TEXT_SEARCH_CONFIGS
+from src.conf.config import settings
+import asyncio
+from typing import AsyncIterator, Tuple, List, Dict, Optional
 import json
 import numpy as np
 from datetime import datetime
@@ -48,6 +55,261 @@ async def get_all_documents(db: AsyncSession):
     return result.scalars().all()
 
 
+async def get_document_ids(db: AsyncSession) -> List[int]:
+    """
+    Fetch the IDs of all documents that have full text.
+
+    Args:
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[int]: Document IDs.
+    """
+    result = await db.execute(select(Document.document_id).where(Document.full_text.isnot(None)))
+    return list(result.scalars().all())
+
+
+async def iter_document_texts(db: AsyncSession, document_ids: Optional[List[int]] = None) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Stream `(document_id, full_text)` pairs without loading other columns.
+
+    Args:
+        db (AsyncSession): The database session.
+        document_ids (Optional[List[int]]): Restrict to these documents; None streams all of them.
+
+    Yields:
+        Tuple[int, str]: Document ID and its full text.
+    """
+    stmt = select(Document.document_id, Document.full_text).where(Document.full_text.isnot(None))
+    if document_ids is not None:
+        stmt = stmt.where(Document.document_id.in_(document_ids))
+    result = await db.stream(stmt.execution_options(yield_per=500))
+    async for document_id, full_text in result:
+        yield document_id, full_text
+
+
+async def iter_document_languages(db: AsyncSession, document_ids: Optional[List[int]] = None,
+                                  after_id: Optional[int] = None, limit: Optional[int] = None
+                                  ) -> AsyncIterator[Tuple[int, Optional[str], str]]:
+    """
+    Stream `(document_id, language, full_text)` triples in document ID order without loading other columns.
+
+    Args:
+        db (AsyncSession): The database session.
+        document_ids (Optional[List[int]]): Restrict to these documents; None streams all of them.
+        after_id (Optional[int]): Only documents with a larger ID, for keyset paging.
+        limit (Optional[int]): Maximum number of documents.
+
+    Yields:
+        Tuple[int, Optional[str], str]: Document ID, its language (None if not stored) and its full text.
+    """
+    stmt = select(Document.document_id, Document.language, Document.full_text).where(Document.full_text.isnot(None))
+    if document_ids is not None:
+        stmt = stmt.where(Document.document_id.in_(document_ids))
+    if after_id is not None:
+        stmt = stmt.where(Document.document_id > after_id)
+    stmt = stmt.order_by(Document.document_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.stream(stmt.execution_options(yield_per=500))
+    async for document_id, language, full_text in result:
+        yield document_id, language, full_text
+
+
+def _index_document_text(document_id: int, full_text: str, language: str) -> None:
+    """Tokenize a stored text into the loaded in-memory indexes; runs on a worker thread."""
+    if lexical_index.loaded:
+        lexical_index.add(document_id, full_text)
+    if corpus_stats.loaded:
+        corpus_stats.add(document_id, full_text, language)
+
+
+async def update_document_text(document_id: int, full_text: str, language: str, db: AsyncSession):
+    """
+    Store the extracted full text and language of a document, index it for lexical
+    search and count its terms in the keyword statistics of its language.
+
+    PostgreSQL derives `full_text_tsv` from both columns. Cached summaries of
+    the previous text are dropped.
+    """
+    stmt = (
+        update(Document)
+        .where(Document.document_id == document_id)
+        .values(full_text=full_text, language=language)
+    )
+    await db.execute(stmt)
+    await db.commit()
+    if lexical_index.loaded or corpus_stats.loaded:
+        await asyncio.to_thread(_index_document_text, document_id, full_text, language)
+    await summary_cache.invalidate_document(document_id)
+
+
+def _text_search_query(query_text: str):
+    """
+    tsquery matching every document language.
+
+    The query is parsed with each text search configuration and the results
+    are OR-ed, so it matches both stemmed English and Ukrainian documents.
+    """
+    configs = sorted(set(TEXT_SEARCH_CONFIGS.values()))
+    tsquery = func.websearch_to_tsquery(cast(configs[0], REGCONFIG), query_text)
+    for config in configs[1:]:
+        tsquery = tsquery.op("||")(func.websearch_to_tsquery(cast(config, REGCONFIG), query_text))
+    return tsquery
+
+
+def _search_filter_clauses(filters: Optional[DocumentSearchFilters]) -> list:
+    if filters is None:
+        return []
+    clauses = []
+    if filters.owner_id is not None:
+        clauses.append(Document.user_id == filters.owner_id)
+    if filters.uploaded_from is not None:
+        clauses.append(Document.upload_date >= filters.uploaded_from)
+    if filters.uploaded_to is not None:
+        clauses.append(Document.upload_date <= filters.uploaded_to)
+    if filters.status is not None:
+        clauses.append(Document.status == filters.status)
+    return clauses
+
+
+async def search_documents_fts(query_text: str, limit: int, db: AsyncSession,
+                               filters: Optional[DocumentSearchFilters] = None) -> List[Tuple[int, float]]:
+    """
+    Rank documents by full-text match inside PostgreSQL.
+
+    Only IDs and ranks leave the database.
+
+    Args:
+        query_text (str): The search query in web search syntax.
+        limit (int): Maximum number of candidates.
+        db (AsyncSession): The database session.
+        filters (Optional[DocumentSearchFilters]): Metadata filters.
+
+    Returns:
+        List[Tuple[int, float]]: Document IDs with `ts_rank_cd` scores in [0, 1), best first.
+    """
+    tsquery = _text_search_query(query_text)
+    # Normalization flag 32 maps the rank into [0, 1): rank / (rank + 1)
+    rank = func.ts_rank_cd(Document.full_text_tsv, tsquery, 32).label("rank")
+    stmt = (
+        select(Document.document_id, rank)
+        .where(Document.full_text_tsv.op("@@")(tsquery), *_search_filter_clauses(filters))
+        .order_by(rank.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [(document_id, float(score)) for document_id, score in result.all()]
+
+
+async def search_documents_hybrid(
+        query_text: str,
+        query_vector: np.ndarray,
+        limit: int,
+        db: AsyncSession,
+        candidates: int = 100,
+        fusion: str = "rrf",
+        dense_weight: float = 0.5,
+        lexical_weight: float = 0.5,
+        rrf_k: int = 60,
+        filters: Optional[DocumentSearchFilters] = None
+) -> List[Tuple[int, float]]:
+    """
+    Hybrid dense + full-text retrieval in a single SQL statement.
+
+    One CTE takes the `candidates` nearest documents by pgvector cosine
+    distance (served by the HNSW index), another the `candidates` best
+    `ts_rank_cd` matches; a full outer join fuses both lists. Requires
+    VECTOR_STORAGE=pgvector.
+
+    Args:
+        query_text (str): The search query in web search syntax.
+        query_vector (np.ndarray): Embedding of the query.
+        limit (int): Number of fused results to return.
+        db (AsyncSession): The database session.
+        candidates (int): Size of each candidate list.
+        fusion (str): "rrf" for reciprocal rank fusion, "weighted" for a weighted sum of scores.
+        dense_weight (float): Weight of the embedding list.
+        lexical_weight (float): Weight of the full-text list.
+        rrf_k (int): Rank offset of reciprocal rank fusion.
+        filters (Optional[DocumentSearchFilters]): Metadata filters applied to both lists.
+
+    Returns:
+        List[Tuple[int, float]]: Document IDs with fused scores, best first.
+    """
+    if settings.vector_storage != "pgvector":
+        raise ValueError("Hybrid SQL search requires VECTOR_STORAGE=pgvector.")
+    if fusion not in ("rrf", "weighted"):
+        raise ValueError(f"Unknown fusion method: {fusion}")
+
+    filter_clauses = _search_filter_clauses(filters)
+    vector_param = bindparam("query_vector", query_vector, type_=Embedding())
+    distance = Document.full_text_embedding.op("<=>", return_type=Float)(vector_param)
+    nearest = (
+        select(Document.document_id, distance.label("distance"))
+        .where(Document.full_text_embedding.isnot(None), *filter_clauses)
+        .order_by(distance)
+        .limit(candidates)
+        .subquery()
+    )
+    dense = select(
+        nearest.c.document_id,
+        func.row_number().over(order_by=nearest.c.distance).label("rank"),
+        (1.0 - nearest.c.distance).label("score"),
+    ).cte("dense")
+
+    tsquery = _text_search_query(query_text)
+    text_rank = func.ts_rank_cd(Document.full_text_tsv, tsquery, 32)
+    matches = (
+        select(Document.document_id, text_rank.label("text_rank"))
+        .where(Document.full_text_tsv.op("@@")(tsquery), *filter_clauses)
+        .order_by(text_rank.desc())
+        .limit(candidates)
+        .subquery()
+    )
+    lexical = select(
+        matches.c.document_id,
+        func.row_number().over(order_by=matches.c.text_rank.desc()).label("rank"),
+        matches.c.text_rank.label("score"),
+    ).cte("lexical")
+
+    if fusion == "rrf":
+        dense_part = func.coalesce(1.0 / (literal(rrf_k) + dense.c.rank), 0.0)
+        lexical_part = func.coalesce(1.0 / (literal(rrf_k) + lexical.c.rank), 0.0)
+    else:
+        dense_part = func.coalesce(dense.c.score, 0.0)
+        lexical_part = func.coalesce(lexical.c.score, 0.0)
+    score = (dense_weight * dense_part + lexical_weight * lexical_part).label("score")
+
+    stmt = (
+        select(func.coalesce(dense.c.document_id, lexical.c.document_id).label("document_id"), score)
+        .select_from(dense.join(lexical, dense.c.document_id == lexical.c.document_id, full=True))
+        .order_by(score.desc())
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return [(document_id, float(score)) for document_id, score in result.all()]
+
+
+async def delete_document(document_id: int, db: AsyncSession) -> bool:
+    """
+    Delete a document and drop it from the in-memory search indexes.
+
+    Returns:
+        bool: False if the document does not exist.
+    """
+    document = await get_document_by_id(document_id, db)
+    if not document:
+        return False
+    await db.delete(document)
+    await db.commit()
+    document_index.remove(document_id)
+    lexical_index.remove(document_id)
+    corpus_stats.remove(document_id)
+    await summary_cache.invalidate_document(document_id)
+    return True
+
+
 async def update_document_status(document_id: int, status: str, db: AsyncSession):
     """
     Update the status of a document in the database.
@@ -87,6 +349,51 @@ def validate_vector_format(vector):
     return vector
 
 
+def decode_vector(value) -> Optional[np.ndarray]:
+    """
+    Decode a stored vector into a flat float32 array.
+
+    Accepts the binary format (already decoded by the `Embedding` column type,
+    or raw bytes) as well as the legacy JSON format, which may be a list, a
+    nested list or a JSON-encoded string.
+
+    Args:
+        value: The stored vector.
+
+    Returns:
+        Optional[np.ndarray]: The vector, or None if nothing is stored.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=np.float32)
+    while isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32).ravel()
+
+
+async def get_document_embeddings(db: AsyncSession) -> List[Tuple[int, np.ndarray]]:
+    """
+    Fetch full text vectors of all documents without loading their text.
+
+    Args:
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[Tuple[int, np.ndarray]]: Document IDs with their float32 vectors.
+    """
+    result = await db.execute(
+        select(Document.document_id, Document.full_text_embedding, Document.full_text_vector)
+        .where((Document.full_text_embedding.isnot(None)) | (Document.full_text_vector.isnot(None)))
+    )
+    embeddings = []
+    for document_id, embedding, legacy_vector in result.all():
+        vector = embedding if embedding is not None else decode_vector(legacy_vector)
+        if vector is not None and vector.shape[0] == EMBEDDING_DIM:
+            embeddings.append((document_id, vector))
+    return embeddings
+
+
 async def update_document_vectors(
         document_id: int,
         summary: Optional[str],
@@ -116,15 +423,13 @@ async def update_document_vectors(
 
         # Update the summary and summary vector if provided
         if summary_vector is not None:
-            # print(f"Updating document {document_id} with summary vector")
             summary_vector = validate_vector_format(summary_vector)
-            summary_vector_json = json.dumps(summary_vector)  # Convert to JSON
             stmt = (
                 update(Document)
                 .where(Document.document_id == document_id)
                 .values(
                     summary=summary if summary else "",  # Use empty string if no summary provided
-                    summary_vector=summary_vector_json
+                    summary_embedding=np.asarray(summary_vector, dtype=np.float32).ravel()
                 )
             )
             await db.execute(stmt)
@@ -132,21 +437,22 @@ async def update_document_vectors(
 
         # Update the full text vector if provided
         if full_text_vector is not None:
-            print(f"Updating document {document_id} with full text vector")
+            logging.info(f"Updating document {document_id} with full text vector")
             full_text_vector = validate_vector_format(full_text_vector)
-            full_text_vector_json = json.dumps(full_text_vector)  # Convert to JSON
+            full_text_embedding = np.asarray(full_text_vector, dtype=np.float32).ravel()
             stmt = (
                 update(Document)
                 .where(Document.document_id == document_id)
                 .values(
-                    full_text_vector=full_text_vector_json
+                    full_text_embedding=full_text_embedding
                 )
             )
             await db.execute(stmt)
             await db.commit()
+            document_index.upsert(document_id, full_text_embedding)
 
     except Exception as e:
-        print(f"Error while updating vectors: {e}")
+        logging.error(f"Error while updating vectors: {e}")
         raise ValueError(f"Failed to update document vectors in the database: {e}")
 
 async def get_documents_by_ids(document_ids: List[int], db: AsyncSession) -> List[Document]:
@@ -1,20 +1,38 @@
 from typing import Optional, List
-from fastapi import APIRouter, Depends, UploadFile, HTTPException, File, Query
+from fastapi import APIRouter, Depends, UploadFile, HTTPException, File, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
-from src.repository.document_repository import create_document_entry, update_document_vectors, get_all_documents, get_document_by_id
+from src.repository.document_repository import create_document_entry, update_document_text, delete_document
 from src.services.document_service import search_document, retrieve_context_from_documents
+from src.services.document_service import summarize_document, vectorize_document, extract_corpus_keywords
+from src.services.job_queue import job_queue
+from src.services.summary_cache import summary_cache
 from src.services.pdf_service import process_pdf
-from src.services.vector_service import vectorize_text_llm, extract_keywords
-from src.services.summary_service import  generate_summary, clean_text, generate_answer_based_on_context
-from src.services.summary_service import  generate_summary_with_keywords, post_process_summary_kw
-from src.schemas.schemas import DocumentCreate
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-import numpy as np
+from src.services.vector_service import embedding_cache
+from src.services.summary_service import AsyncTextIteratorStreamer, NO_CONTEXT_ANSWER, generate_answer
+from src.services.summary_service import get_summarizer, stream_answer
+from src.services.inference_executor import inference_pools, run_inference
+from src.services.micro_batcher import query_embedder
+from src.services.vector_index import document_index
+from src.services.language import detect_language
+from src.services.metrics import metrics
+from src.services.cancellation import CancellationToken, RequestCancelled, cancel_on_disconnect, check_cancelled
+from src.services.cancellation import token_for_pool
+from src.schemas.schemas import DocumentCreate, DocumentSearchFilters
+import asyncio
 import json
 import logging
+import time
 from enum import Enum
+from datetime import datetime
+
+stream_ttfb_seconds = metrics.histogram("answer_stream_ttfb_seconds", "Time to the first byte of a streamed answer.")
+stream_ttft_seconds = metrics.histogram("answer_stream_ttft_seconds", "Time to the first token of a streamed answer.")
+stream_disconnects = metrics.counter("answer_stream_disconnects_total", "Streamed answers abandoned by the client.")
+
+# Non-standard status (as used by nginx) for work stopped because the client went away
+CLIENT_CLOSED_REQUEST = 499
 
 class ContextType(str, Enum):
     FULL_TEXT = "full_text"
@@ -23,6 +41,25 @@ class ContextType(str, Enum):
 class SummaryType(str, Enum):
     KEY_WORDS = "key_words"
     TOKENIZER = "tokenizer"
+    HIERARCHICAL = "hierarchical"
+
+class GenerationProfile(str, Enum):
+    FAST = "fast"
+    BALANCED = "balanced"
+    QUALITY = "quality"
+
+class Language(str, Enum):
+    UK = "uk"
+    EN = "en"
+
+class SearchMode(str, Enum):
+    IN_PROCESS = "in_process"
+    FTS = "fts"
+    SQL_HYBRID = "sql_hybrid"
+
+class FusionMethod(str, Enum):
+    RRF = "rrf"
+    WEIGHTED = "weighted"
 
 class SearchScopeScope(str, Enum):
     ALL = "all_docs"
@@ -50,6 +87,7 @@ async def upload_document(
     author: Optional[str] = None,
     comment: Optional[str] = None,
     status: Optional[str] = "processing",
+    language: Optional[Language] = Query(None, description="Document language; detected from the text if omitted"),
     db: AsyncSession = Depends(get_db)
 ):
     try:
@@ -74,12 +112,9 @@ async def upload_document(
         )
         document_id = await create_document_entry(document_data, db)
 
-        # Fetch the document after creation
-        document = await get_document_by_id(document_id, db)
         # Update the document with the extracted full text
-        document.full_text = extracted_text
-        db.add(document)
-        await db.commit()
+        document_language = language.value if language else detect_language(extracted_text)
+        await update_document_text(document_id, extracted_text, document_language, db)
 
         return {"document_id": document_id, "message": "Document uploaded successfully",
                 "extracted_text": extracted_text}
@@ -87,31 +122,30 @@ async def upload_document(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+@router.delete("/{document_id}")
+async def delete_document_endpoint(document_id: int, db: AsyncSession = Depends(get_db)):
+    """Delete a document and remove it from the search indexes."""
+    deleted = await delete_document(document_id, db)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"document_id": document_id, "message": "Document deleted successfully"}
+
+
 @router.post("/convert-text-to-vector")
 async def convert_text_to_vector(
     document_id: int = Query(..., description="ID of the document to vectorize"),
+    background: bool = Query(False, description="Queue the work and return a job ID at once"),
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        document = await get_document_by_id(document_id, db)
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        cleaned_text = clean_text(document.full_text)
-        text_vector_list = vectorize_text_llm(cleaned_text)
-        document.full_text_vector = text_vector_list
-        # document.full_text_vector = json.dumps(text_vector_list)
-
-        await update_document_vectors(
-            document_id=document_id,
-            summary=None,
-            summary_vector=None,
-            full_text_vector=document.full_text_vector,
-            db=db
-        )
+        if background:
+            job = await job_queue.submit("vectorize", document_id)
+            return JSONResponse(status_code=202, content=job.to_dict())
 
-        return {"document_id": document_id, "full_text_vector": text_vector_list}
+        return await vectorize_document(document_id, db)
 
+    except HTTPException:
+        raise
     except ValueError as e:
         logging.error(f"Error in text-to-vector conversion: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -123,10 +157,12 @@ async def convert_text_to_vector(
 
 @router.post("/generate-summary")
 async def generate_document_summary(
+    request: Request,
     document_id: int = Query(..., description="ID of the document to summarize"),
     max_length: int = Query(100, description="Maximum length per 1024 tokens of the document"),
     min_length: int = Query(30, description="Minimum length per 1024 tokens of the document"),
     summary_type: SummaryType = SummaryType.TOKENIZER,
+    background: bool = Query(False, description="Queue the work and return a job ID at once"),
     db: AsyncSession = Depends(get_db)
 ):
     """Generates and updates the summary and vector for a given document."""
@@ -134,49 +170,18 @@ async def generate_document_summary(
         raise ValueError("max_length must be greater than min_length.")
 
     try:
-        # Fetch the document by ID
-        document = await get_document_by_id(document_id, db)
-
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        # Clean the input text
-        # cleaned_text = clean_text(document.full_text)
-        cleaned_text = document.full_text
-
-        if summary_type == SummaryType.TOKENIZER:
-            # Generate summary and vector for the provided text
-            summary = generate_summary(cleaned_text, max_length=max_length, min_length=min_length)
-        else:
-            # Extract important keywords for summary with keywords
-            keywords = extract_keywords(cleaned_text)
-            # Generate summary for each chunk, considering keywords (for summary with keywords)
-            summary = generate_summary_with_keywords(cleaned_text, keywords, max_length=max_length,
-                                                     min_length=min_length)
-            # Post-process the summary to ensure important keywords are included (for summary with keywords)
-            summary = post_process_summary_kw(summary, keywords, cleaned_text)
-
-        summary_vector = vectorize_text_llm(summary)  # Returns a list
-
-        # Update the document with the summary
-        document.summary = summary
-        document.summary_vector = summary_vector
-
-        # Update document summary in the database
-        await update_document_vectors(
-            document_id=document_id,
-            summary=document.summary,
-            summary_vector=document.summary_vector,
-            full_text_vector=None,
-            db=db
-        )
-
-        # Return the response with summary and vector
-        return {
-            "document_id": document_id,
-            "summary": summary,
-            "summary_vector": summary_vector  # This is a list
-        }
+        if background:
+            job = await job_queue.submit("summarize", document_id, max_length=max_length, min_length=min_length,
+                                         summary_type=summary_type.value)
+            return JSONResponse(status_code=202, content=job.to_dict())
+
+        # Return the response with summary and vector; the work stops if the client goes away
+        async with cancel_on_disconnect(request) as cancel:
+            return await summarize_document(document_id, max_length, min_length, summary_type.value, db, cancel)
+    except HTTPException:
+        raise
+    except RequestCancelled as e:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail=str(e))
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
@@ -184,55 +189,223 @@ async def generate_document_summary(
 
 
 
+@router.get("/keywords")
+async def corpus_keywords(
+    num_keywords: int = Query(10, ge=1, le=100, description="Number of keywords per document"),
+    limit: int = Query(100, ge=1, le=1000, description="Documents per page"),
+    after_id: Optional[int] = Query(None, description="`next_after_id` of the previous page"),
+    db: AsyncSession = Depends(get_db)
+):
+    """One page of document keywords against the per-language corpus IDF, with the extraction throughput."""
+    return await extract_corpus_keywords(db, num_keywords, limit, after_id)
+
+
+@router.get("/embedding-cache/stats")
+async def embedding_cache_stats():
+    """Hit, miss and eviction counters of the embedding cache."""
+    return embedding_cache.stats()
+
+
+@router.get("/summary-cache/stats")
+async def summary_cache_stats():
+    """Hit and miss counters and hit rate of the summary cache."""
+    return summary_cache.stats()
+
+
+@router.get("/embedding-batcher/stats")
+async def embedding_batcher_stats():
+    """Window, maximum batch size and achieved batch sizes of the query embedding micro-batcher."""
+    return query_embedder.stats()
+
+
+@router.get("/vector-index/stats")
+async def vector_index_stats():
+    """Size and rebuild state of the document vector index."""
+    return document_index.stats()
+
+
+@router.post("/vector-index/rebuild")
+async def rebuild_vector_index():
+    """Rebuild the approximate vector index in the background and swap it in when ready."""
+    if not document_index.loaded:
+        raise HTTPException(status_code=409, detail="Vector index is not loaded yet.")
+    started = document_index.rebuild_async()
+    return {"started": started}
+
+
 @router.post("/search-document/")
-async def search_document_endpoint(query_text: str, db: AsyncSession = Depends(get_db)):
+async def search_document_endpoint(
+    query_text: str,
+    top_k: Optional[int] = Query(None, ge=1, description="Number of results to return (all documents if omitted)"),
+    search_mode: SearchMode = SearchMode.IN_PROCESS,
+    fusion: FusionMethod = FusionMethod.RRF,
+    owner_id: Optional[int] = Query(None, description="Only documents of this user (SQL modes)"),
+    uploaded_from: Optional[datetime] = Query(None, description="Only documents uploaded at or after (SQL modes)"),
+    uploaded_to: Optional[datetime] = Query(None, description="Only documents uploaded at or before (SQL modes)"),
+    status: Optional[str] = Query(None, description="Only documents with this status (SQL modes)"),
+    db: AsyncSession = Depends(get_db)
+):
+    filters = DocumentSearchFilters(owner_id=owner_id, uploaded_from=uploaded_from, uploaded_to=uploaded_to,
+                                    status=status)
     try:
-        search_results = await search_document(query_text, db)
+        search_results = await search_document(query_text, db, top_k=top_k, search_mode=search_mode.value,
+                                               fusion=fusion.value, filters=filters)
         sorted_similarities = search_results.get("results", [])
         return {"results": sorted_similarities}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error during document search: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 
+async def _answer_context(question: str, search_option: SearchScopeScope, search_scope: Optional[List[int]],
+                          context_type: ContextType, db: AsyncSession, cancel: Optional[CancellationToken] = None):
+    """Find the documents relevant to a question and the context passages to answer it from."""
+    if search_option == SearchScopeScope.ALL:
+        check_cancelled(cancel, "search")
+        search_results = await search_document(query_text=question, db=db)
+        relevant_documents = search_results.get("results", [])
+
+    # Filter documents based on similarity scores (e.g., threshold > 0.2)
+        filtered_documents = [doc_id for doc_id, score in relevant_documents if score > 0.2]
+    else:
+        filtered_documents = search_scope
+    # Handle case where no relevant documents are found
+
+    if not filtered_documents:
+        return [], ""
+
+    # Step 5: Retrieve context (relevant passages) from the top filtered documents
+    check_cancelled(cancel, "retrieval")
+    context_data = await retrieve_context_from_documents(question, filtered_documents, context_type, db)
+    return filtered_documents, context_data
+
+
 @router.post("/answer-question/")
 async def answer_question(
+    request: Request,
     question: str,
     search_option: SearchScopeScope = SearchScopeScope.ALL,
     search_scope: Optional[List[int]] = Depends(validate_search_scope),
     context_type: ContextType = ContextType.FULL_TEXT,
+    profile: Optional[GenerationProfile] = Query(None, description="Decoding profile; defaults to the configured one"),
+    deadline_ms: Optional[int] = Query(None, ge=1, description="Latency budget; decoding stops early and returns the partial answer"),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Request answer to a question based on collected documents.
     """
+    # Wall-clock, so worker processes can compare against it; waiting for a worker counts too
+    deadline = time.time() + deadline_ms / 1000 if deadline_ms is not None else None
     try:
-        if search_option == SearchScopeScope.ALL:
-            search_results = await search_document(query_text=question, db=db)
-            relevant_documents = search_results.get("results", [])
+        async with cancel_on_disconnect(request) as cancel:
+            filtered_documents, context_data = await _answer_context(question, search_option, search_scope,
+                                                                     context_type, db, cancel)
+            if not filtered_documents:
+                return {"relevant_documents": [], "answer": NO_CONTEXT_ANSWER}
+
+            # Step 6: Generate the final answer based on the retrieved context
+            # The deadline covers the whole request, so decoding gets what retrieval and queueing left of it
+            answer, partial = await run_inference("summarizer", generate_answer, question, context_data,
+                                                  profile.value if profile else None, deadline,
+                                                  token_for_pool(cancel, "summarizer"))
+            check_cancelled(cancel, "answer")
+
+        return {"relevant_documents": filtered_documents, "answer": answer, "partial": partial}
+
+    except HTTPException:
+        raise
+    except RequestCancelled as e:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error during answering question: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
-        # Filter documents based on similarity scores (e.g., threshold > 0.2)
-            filtered_documents = [doc_id for doc_id, score in relevant_documents if score > 0.2]
-        else:
-            filtered_documents = search_scope
-        # Handle case where no relevant documents are found
 
-        if not filtered_documents:
-            return {"relevant_documents": [], "answer": "No relevant context found to answer the question."}
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        # Step 5: Retrieve context (relevant passages) from the top filtered documents
-        context_data = await retrieve_context_from_documents(question, filtered_documents, context_type, db)
 
-        # Step 6: Generate the final answer based on the retrieved context
-        answer = generate_answer_based_on_context(question, context_data)
+@router.post("/answer-question/stream")
+async def answer_question_stream(
+    question: str,
+    search_option: SearchScopeScope = SearchScopeScope.ALL,
+    search_scope: Optional[List[int]] = Depends(validate_search_scope),
+    context_type: ContextType = ContextType.FULL_TEXT,
+    profile: Optional[GenerationProfile] = Query(None, description="Length and repetition settings; decoding is greedy"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream the answer to a question as Server-Sent Events.
 
-        return {"relevant_documents": filtered_documents, "answer": answer}
+    A `retrieval` event with the relevant documents comes first, then one
+    `token` event per decoded piece of the answer and finally a `done` event
+    with the post-processed answer (or an `error` event). Generation stops
+    when the client disconnects.
+    """
+    if inference_pools["summarizer"].kind != "thread":
+        raise HTTPException(status_code=501, detail="Streaming answers needs a thread summarizer executor.")
 
+    started = time.perf_counter()
+    try:
+        filtered_documents, context_data = await _answer_context(question, search_option, search_scope,
+                                                                 context_type, db)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error during answering question: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+    async def events():
+        yield _sse("retrieval", {"relevant_documents": filtered_documents})
+        stream_ttfb_seconds.observe(time.perf_counter() - started)
+
+        # A cold model loads in a worker thread, not on the event loop
+        try:
+            summarizer = await asyncio.to_thread(get_summarizer)
+        except RuntimeError as e:
+            logging.error(f"Error during streaming answer: {str(e)}")
+            yield _sse("error", {"detail": str(e)})
+            return
+        streamer = AsyncTextIteratorStreamer(summarizer.tokenizer, asyncio.get_running_loop())
+        cancel = CancellationToken()
+        generation = asyncio.create_task(run_inference("summarizer", stream_answer, question, context_data,
+                                                       streamer, cancel, profile.value if profile else None))
+
+        def generation_done(task: asyncio.Task) -> None:
+            # Ends the token stream also when the call never started (e.g. a full queue); after a
+            # disconnect nobody awaits the task, so its exception is retrieved here
+            streamer.text_queue.put_nowait(streamer.stop_signal)
+            if not task.cancelled():
+                task.exception()
+
+        generation.add_done_callback(generation_done)
+        try:
+            first_token = True
+            async for text in streamer:
+                if not text:
+                    continue
+                if first_token:
+                    stream_ttft_seconds.observe(time.perf_counter() - started)
+                    first_token = False
+                yield _sse("token", {"text": text})
+            try:
+                answer = await generation
+            except Exception as e:
+                logging.error(f"Error during streaming answer: {str(e)}")
+                yield _sse("error", {"detail": e.detail if isinstance(e, HTTPException) else str(e)})
+                return
+            yield _sse("done", {"relevant_documents": filtered_documents, "answer": answer})
+        finally:
+            if not generation.done():
+                stream_disconnects.inc()
+            cancel.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
                             
                             
 
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+from src.services.job_queue import job_queue
+
+# Роутер для відстеження фонових задач
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/")
+async def job_queue_stats():
+    """Worker concurrency, queue length and job counts by status."""
+    return job_queue.stats()
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Status, attempts and, once done, the result of a background job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -134,3 +134,14 @@ class DocumentInDB(DocumentBase):
 class DocumentResponse(DocumentInDB):
     pass
 
+
+
+# Metadata filters for SQL-side document search
+class DocumentSearchFilters(BaseModel):
+    owner_id: Optional[int] = None
+    uploaded_from: Optional[datetime] = None
+    uploaded_to: Optional[datetime] = None
+    status: Optional[str] = Field(None, max_length=50)
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.model_dump().values())
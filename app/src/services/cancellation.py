@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from starlette.requests import Request
+
+from src.conf.config import settings
+from src.services.inference_executor import inference_pools
+from src.services.metrics import metrics
+
+cancelled_work = metrics.counter("cancelled_work_total", "Model work abandoned after the client disconnected, by stage.")
+cpu_seconds_saved = metrics.counter("cancelled_cpu_seconds_saved_total",
+                                    "Estimated model CPU seconds not spent on abandoned work.")
+
+
+class RequestCancelled(Exception):
+    """Raised at a checkpoint once the client that wanted the work has gone away."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request cancelled during {stage}")
+        self.stage = stage
+
+
+class CancellationToken:
+    """
+    Request-scoped cancellation flag shared by the event loop and inference threads.
+
+    Pipelines check it between stages and chunks; `generate` watches `event`
+    through a stopping criterion. The first checkpoint that sees the flag
+    records the cancelled stage and its estimate of the work saved.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.stage: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self) -> None:
+        self.event.set()
+
+    def record(self, stage: str, saved_seconds: float = 0.0) -> None:
+        """Count the cancellation once, at the stage that noticed it first."""
+        if self.stage is not None:
+            return
+        self.stage = stage
+        cancelled_work.inc(labels={"stage": stage})
+        if saved_seconds > 0:
+            cpu_seconds_saved.inc(saved_seconds, labels={"stage": stage})
+        logging.info(f"Request cancelled during {stage}, about {saved_seconds:.1f}s of model work saved")
+
+    def check(self, stage: str, saved_seconds: float = 0.0) -> None:
+        """
+        Stop the pipeline if the request was cancelled.
+
+        Args:
+            stage (str): Name of the stage about to run, used as the metric label.
+            saved_seconds (float): Estimated model time the remaining stages would have taken.
+
+        Raises:
+            RequestCancelled: If the token was cancelled.
+        """
+        if self.cancelled:
+            self.record(stage, saved_seconds)
+            raise RequestCancelled(stage)
+
+
+def check_cancelled(cancel: Optional[CancellationToken], stage: str, saved_seconds: float = 0.0) -> None:
+    """`CancellationToken.check` for code paths where the token is optional."""
+    if cancel is not None:
+        cancel.check(stage, saved_seconds)
+
+
+def token_for_pool(cancel: Optional[CancellationToken], pool: str) -> Optional[CancellationToken]:
+    """
+    The token to pass to work running on the named inference pool.
+
+    The token wraps a `threading.Event`, which cannot be pickled, so work on a
+    process pool gets None: it runs to the end, and the request only stops at
+    the checkpoints on the event loop before and after it.
+    """
+    return cancel if inference_pools[pool].kind == "thread" else None
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request) -> AsyncIterator[CancellationToken]:
+    """
+    Yield a token that is cancelled as soon as the client of `request` disconnects.
+
+    The connection is polled every `settings.cancellation_poll_ms` while the
+    block runs.
+    """
+    token = CancellationToken()
+
+    async def watch() -> None:
+        while not token.cancelled:
+            if await request.is_disconnected():
+                token.cancel()
+                return
+            await asyncio.sleep(settings.cancellation_poll_ms / 1000)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield token
+    finally:
+        watcher.cancel()
@@ -0,0 +1,312 @@
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from src.conf.config import settings
+from src.services.lexical_index import analyze
+
+
+# Stop words dropped from keyword terms, by language. English uses the list of
+# `TfidfVectorizer(stop_words='english')`; languages without a list, such as
+# Ukrainian, keep every term
+STOP_WORDS: Dict[str, FrozenSet[str]] = {"en": ENGLISH_STOP_WORDS}
+
+
+def keyword_terms(text: str, lang: str = "en") -> Counter:
+    """Term counts of a text, without the stop words of its language."""
+    stop_words = STOP_WORDS.get(lang, frozenset())
+    return Counter(term for term in analyze(text) if term not in stop_words)
+
+
+class LanguageStats:
+    """Vocabulary and document frequencies of the documents of one language."""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.df = np.zeros(1024, dtype=np.int64)
+        self.n_docs = 0
+        # CRC32 of every vocabulary term, and their sum over all (document, term) pairs:
+        # with n_docs a fingerprint of the counted documents that is the same in every process
+        self.term_hashes = np.zeros(1024, dtype=np.int64)
+        self.checksum = 0
+
+    def term_indices(self, terms: Iterable[str]) -> np.ndarray:
+        """Vocabulary indices of `terms`, adding unseen ones."""
+        new_terms = []
+
+        def index(term: str) -> int:
+            i = self.vocabulary.get(term)
+            if i is None:
+                i = self.vocabulary[term] = len(self.vocabulary)
+                new_terms.append(term)
+            return i
+
+        indices = np.fromiter((index(term) for term in terms), dtype=np.int64)
+        if len(self.vocabulary) > self.df.shape[0]:
+            grow = max(len(self.vocabulary), self.df.shape[0])
+            self.df = np.concatenate([self.df, np.zeros(grow, np.int64)])
+            self.term_hashes = np.concatenate([self.term_hashes, np.zeros(grow, np.int64)])
+        for term in new_terms:
+            self.term_hashes[self.vocabulary[term]] = zlib.crc32(term.encode("utf-8"))
+        return indices
+
+
+class CorpusStats:
+    """
+    Per-language document frequencies of the corpus, for TF-IDF keyword extraction.
+
+    Documents are added at upload and removed on delete; only their distinct
+    terms are kept, to undo their frequencies. Keywords of a text are its
+    terms ranked by term count times the corpus IDF of its language, so one
+    call costs one tokenization and a dictionary lookup per distinct term.
+    Terms the corpus has never seen get the highest IDF. Snapshots work like
+    those of the lexical index.
+    """
+
+    SNAPSHOT_FILE = "corpus_stats.npz"
+    VOCABULARY_FILE = "corpus_vocabulary.json"
+
+    def __init__(self, snapshot_dir: Optional[str] = None, snapshot_every: int = 100):
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_every = snapshot_every
+        self._languages: Dict[str, LanguageStats] = {}
+        self._rows: Dict[int, Tuple[str, np.ndarray]] = {}
+        self._changes_since_save = 0
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def document_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._rows)
+
+    def clear(self) -> None:
+        """Drop all statistics and mark the store as not loaded."""
+        with self._lock:
+            self._languages = {}
+            self._rows = {}
+            self.loaded = False
+
+    def add(self, document_id: int, text: Optional[str], lang: str) -> None:
+        """Count (or recount) the terms of one document under its language."""
+        with self._lock:
+            self._remove(document_id)
+            if text:
+                self._add(document_id, keyword_terms(text, lang), lang)
+            self._changed()
+
+    def remove(self, document_id: int) -> None:
+        """Drop one document; unknown IDs are ignored."""
+        with self._lock:
+            if self._remove(document_id):
+                self._changed()
+
+    def _add(self, document_id: int, counts: Counter, lang: str) -> None:
+        if not counts:
+            return
+        stats = self._languages.setdefault(lang, LanguageStats())
+        indices = stats.term_indices(counts)
+        stats.df[indices] += 1
+        stats.n_docs += 1
+        stats.checksum += int(stats.term_hashes[indices].sum())
+        self._rows[document_id] = (lang, indices)
+
+    def _remove(self, document_id: int) -> bool:
+        row = self._rows.pop(document_id, None)
+        if row is None:
+            return False
+        stats = self._languages[row[0]]
+        stats.df[row[1]] -= 1
+        stats.n_docs -= 1
+        stats.checksum -= int(stats.term_hashes[row[1]].sum())
+        return True
+
+    def _changed(self) -> None:
+        self._changes_since_save += 1
+        if self.loaded and self.snapshot_dir and self._changes_since_save >= self.snapshot_every:
+            try:
+                self.save(self.snapshot_dir)
+            except OSError as e:
+                logging.error(f"Failed to snapshot corpus statistics: {e}")
+
+    def version(self, lang: str) -> str:
+        """
+        Fingerprint of the statistics of one language, for cache keys of keyword-dependent results.
+
+        Built from the document count and a checksum of the distinct terms of
+        every document, so every process that counted the same documents gets
+        the same value, and adding, removing or changing a document changes it.
+        """
+        with self._lock:
+            stats = self._languages.get(lang)
+            return f"{lang}:{stats.n_docs}:{stats.checksum:x}" if stats else f"{lang}:0:0"
+
+    def document_frequency(self, term: str, lang: str) -> int:
+        with self._lock:
+            stats = self._languages.get(lang)
+            index = stats.vocabulary.get(term) if stats else None
+            return int(stats.df[index]) if index is not None else 0
+
+    def extract_keywords(self, text: str, lang: str = "en", num_keywords: int = 10) -> List[str]:
+        """
+        Top TF-IDF terms of a text against the corpus of its language.
+
+        Args:
+            text (str): The text.
+            lang (str): Language whose document frequencies apply.
+            num_keywords (int): Number of keywords to return.
+
+        Returns:
+            List[str]: Keywords, best first; ties are broken alphabetically.
+        """
+        counts = keyword_terms(text, lang)
+        with self._lock:
+            stats = self._languages.get(lang)
+            n_docs = stats.n_docs if stats else 0
+            vocabulary = stats.vocabulary if stats else {}
+            df = stats.df if stats else None
+            document_frequencies = {term: int(df[vocabulary[term]]) if term in vocabulary else 0 for term in counts}
+
+        def score(term: str) -> float:
+            return counts[term] * (math.log((1.0 + n_docs) / (1.0 + document_frequencies[term])) + 1.0)
+
+        return [term for _, term in heapq.nsmallest(num_keywords, ((-score(term), term) for term in counts))]
+
+    def extract_keywords_many(self, texts: List[str], langs: List[str], num_keywords: int = 10) -> List[List[str]]:
+        """
+        Keywords of a batch of texts, scored as one CSR term-count matrix per language.
+
+        Args:
+            texts (List[str]): The texts.
+            langs (List[str]): Language of each text.
+            num_keywords (int): Number of keywords per text.
+
+        Returns:
+            List[List[str]]: Keywords of each text, in order, ranked like `extract_keywords`.
+        """
+        if len(texts) != len(langs):
+            raise ValueError("texts and langs must have the same length.")
+        counts = [keyword_terms(text, lang) for text, lang in zip(texts, langs)]
+        keywords: List[List[str]] = [[] for _ in texts]
+
+        for lang in set(langs):
+            rows = [i for i, text_lang in enumerate(langs) if text_lang == lang]
+            row_terms = [list(counts[i]) for i in rows]
+            indptr = np.cumsum([0] + [len(terms) for terms in row_terms])
+            data = np.fromiter((n for i in rows for n in counts[i].values()), dtype=np.float64, count=indptr[-1])
+            with self._lock:
+                stats = self._languages.get(lang)
+                n_docs = stats.n_docs if stats else 0
+                if stats:
+                    # Terms the corpus has not seen map to -1, with df 0
+                    columns = np.fromiter((stats.vocabulary.get(term, -1) for terms in row_terms for term in terms),
+                                          dtype=np.int64, count=indptr[-1])
+                    df = np.where(columns >= 0, stats.df[columns], 0)
+                else:
+                    df = np.zeros(indptr[-1], dtype=np.int64)
+            scores = data * (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0)
+
+            for row, i in enumerate(rows):
+                row_scores = scores[indptr[row]:indptr[row + 1]]
+                # Keep the k best plus every term tied with the k-th, then order them exactly
+                candidates = np.arange(row_scores.shape[0])
+                if row_scores.shape[0] > num_keywords > 0:
+                    kth = -np.partition(-row_scores, num_keywords - 1)[num_keywords - 1]
+                    candidates = np.flatnonzero(row_scores >= kth)
+                ranked = sorted((-row_scores[c], row_terms[row][c]) for c in candidates)[:num_keywords]
+                keywords[i] = [term for _, term in ranked]
+        return keywords
+
+    def save(self, directory: Optional[str] = None) -> None:
+        """Write a snapshot of the document rows and per-language frequencies to `directory`."""
+        directory = directory or self.snapshot_dir
+        with self._lock:
+            languages = sorted(self._languages)
+            ids = sorted(self._rows)
+            arrays = {
+                "ids": np.array(ids, dtype=np.int64),
+                "id_languages": np.array([languages.index(self._rows[i][0]) for i in ids], dtype=np.int64),
+                "indptr": np.concatenate([[0], np.cumsum([self._rows[i][1].shape[0] for i in ids])]).astype(np.int64),
+                "indices": np.concatenate([self._rows[i][1] for i in ids]) if ids else np.empty(0, np.int64),
+            }
+            vocabularies = {}
+            for lang in languages:
+                stats = self._languages[lang]
+                vocabularies[lang] = sorted(stats.vocabulary, key=stats.vocabulary.get)
+                arrays[f"df_{lang}"] = stats.df[:len(stats.vocabulary)].copy()
+            self._changes_since_save = 0
+
+        os.makedirs(directory, exist_ok=True)
+        snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        vocabulary_path = os.path.join(directory, self.VOCABULARY_FILE)
+        with open(snapshot_path + ".tmp", "wb") as snapshot_file:
+            np.savez(snapshot_file, **arrays)
+        with open(vocabulary_path + ".tmp", "w", encoding="utf-8") as vocabulary_file:
+            json.dump({"languages": languages, "vocabularies": vocabularies, "stop_words": sorted(STOP_WORDS)},
+                      vocabulary_file, ensure_ascii=False)
+        os.replace(vocabulary_path + ".tmp", vocabulary_path)
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+
+    def restore(self, directory: Optional[str] = None) -> bool:
+        """
+        Load a snapshot written by `save`, without marking the store as loaded.
+
+        Returns:
+            bool: False if there is no usable snapshot in `directory`.
+        """
+        directory = directory or self.snapshot_dir
+        if not directory:
+            return False
+        snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        vocabulary_path = os.path.join(directory, self.VOCABULARY_FILE)
+        if not (os.path.exists(snapshot_path) and os.path.exists(vocabulary_path)):
+            return False
+        try:
+            with open(vocabulary_path, "r", encoding="utf-8") as vocabulary_file:
+                meta = json.load(vocabulary_file)
+            with np.load(snapshot_path) as snapshot:
+                arrays = {name: snapshot[name] for name in snapshot.files}
+            languages = meta["languages"]
+            ids, id_languages = arrays["ids"], arrays["id_languages"]
+            indptr, indices = arrays["indptr"], arrays["indices"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Ignoring unreadable corpus statistics snapshot: {e}")
+            return False
+        if meta.get("stop_words") != sorted(STOP_WORDS):
+            logging.info("Ignoring corpus statistics snapshot counted with other stop words")
+            return False
+
+        with self._lock:
+            self._languages = {}
+            for position, lang in enumerate(languages):
+                stats = self._languages[lang] = LanguageStats()
+                stats.vocabulary = {term: i for i, term in enumerate(meta["vocabularies"][lang])}
+                stats.df = np.concatenate([arrays[f"df_{lang}"], np.zeros(1024, dtype=np.int64)])
+                stats.n_docs = int(np.count_nonzero(id_languages == position))
+                stats.term_hashes = np.zeros(stats.df.shape[0], dtype=np.int64)
+                stats.term_hashes[:len(stats.vocabulary)] = [zlib.crc32(term.encode("utf-8"))
+                                                              for term in meta["vocabularies"][lang]]
+                stats.checksum = int(stats.df[:len(stats.vocabulary)] @ stats.term_hashes[:len(stats.vocabulary)])
+            self._rows = {
+                int(document_id): (languages[id_languages[i]], indices[indptr[i]:indptr[i + 1]])
+                for i, document_id in enumerate(ids)
+            }
+            self._changes_since_save = 0
+        return True
+
+
+# Per-language document frequencies, restored from the snapshot or built on first use
+corpus_stats = CorpusStats(snapshot_dir=settings.corpus_stats_dir or None,
+                           snapshot_every=settings.corpus_stats_snapshot_every)
@@ -2,18 +2,43 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException
 from src.entity.models import Document
-from src.services.summary_service import clean_text
-from src.services.vector_service import vectorize_text_llm, compute_tfidf, compute_similarity
-from src.repository.document_repository import get_documents_by_ids, get_all_documents, get_document_by_id
+from src.services.summary_service import clean_text, generate_summary, generate_summary_hierarchical
+from src.services.summary_service import generate_summary_with_keywords, post_process_summary_kw, summarizer_revision
+from src.services.summary_cache import make_summary_key, summary_cache
+from src.services.vector_service import compute_similarity, extract_keywords, vectorize_document_llm, vectorize_texts_llm
+from src.services.job_queue import job_queue
+from src.database.db import SessionLocal
+from src.services.vector_index import document_index, top_k_indices
+from src.services.lexical_index import lexical_index
+from src.services.corpus_stats import corpus_stats
+from src.services.language import detect_language
+from src.services.inference_executor import run_inference
+from src.services.micro_batcher import query_embedder
+from src.services.cancellation import CancellationToken, check_cancelled, token_for_pool
+from src.repository.document_repository import get_documents_by_ids, get_all_documents, get_document_by_id, get_document_embeddings
+from src.repository.document_repository import update_document_vectors
+from src.repository.document_repository import get_document_ids, iter_document_texts, search_documents_fts, search_documents_hybrid
+from src.repository.document_repository import iter_document_languages
+from src.schemas.schemas import DocumentSearchFilters
+from src.conf.config import settings
+import asyncio
 import numpy as np
 import json
 import logging
-from typing import Tuple, List, Dict, Optional
+import time
+from typing import AsyncIterator, Callable, Tuple, List, Dict, Optional
 from sklearn.metrics.pairwise import cosine_similarity
-import nltk
 from nltk.tokenize import sent_tokenize
+from src.services.resources import use_staged_nltk_data
 
-nltk.download('punkt')
+use_staged_nltk_data()
+
+_document_index_lock = asyncio.Lock()
+_lexical_index_lock = asyncio.Lock()
+_corpus_stats_lock = asyncio.Lock()
+
+# Rows tokenized per worker call while an in-memory index is built; matches the repository's `yield_per`
+_INDEX_BATCH_SIZE = 500
 
 
 # async def fetch_relevant_documents(query_text: str, search_scope: Optional[List[int]], db: AsyncSession):
@@ -81,53 +106,239 @@ nltk.download('punkt')
 #         raise HTTPException(status_code=500, detail=f"Failed to fetch relevant documents: {str(e)}")
 #
 
-async def search_document(query_text: str, db: AsyncSession) -> dict:
+async def _in_worker_batches(rows: AsyncIterator[tuple], index_rows: Callable[[List[tuple]], None]) -> None:
+    """Stream `rows` and hand them to `index_rows` in batches on a worker thread, off the event loop."""
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= _INDEX_BATCH_SIZE:
+            await asyncio.to_thread(index_rows, batch)
+            batch = []
+    if batch:
+        await asyncio.to_thread(index_rows, batch)
+
+
+def _index_texts(rows: List[Tuple[int, str]]) -> None:
+    for document_id, full_text in rows:
+        lexical_index.add(document_id, full_text)
+
+
+def _count_texts(rows: List[Tuple[int, Optional[str], str]]) -> None:
+    for document_id, language, full_text in rows:
+        corpus_stats.add(document_id, full_text, language or detect_language(full_text))
+
+
+async def ensure_document_index(db: AsyncSession) -> None:
+    """
+    Load the resident document embedding matrix on first use.
+
+    Later vector updates reach the index through `update_document_vectors`.
+    """
+    if document_index.loaded:
+        return
+    async with _document_index_lock:
+        if not document_index.loaded:
+            # Vector updates committed while the embeddings are read are replayed by `load`
+            document_index.begin_load()
+            try:
+                embeddings = await get_document_embeddings(db)
+            except Exception:
+                document_index.cancel_load()
+                raise
+            await asyncio.to_thread(document_index.load, embeddings)
+            logging.info(f"Loaded {len(document_index)} document vectors into the search index")
+
+
+async def ensure_lexical_index(db: AsyncSession) -> None:
+    """
+    Make the lexical index ready on first use.
+
+    Restores the on-disk snapshot and reconciles it with the documents table,
+    tokenizing only documents added since the snapshot; without a snapshot
+    the index is built from every document once and then snapshotted. Disk I/O
+    and tokenization run on worker threads.
+    """
+    if lexical_index.loaded:
+        return
+    async with _lexical_index_lock:
+        if lexical_index.loaded:
+            return
+
+        if await asyncio.to_thread(lexical_index.restore):
+            stored_ids = set(await get_document_ids(db))
+            indexed_ids = set(lexical_index.document_ids)
+            for document_id in indexed_ids - stored_ids:
+                lexical_index.remove(document_id)
+            missing_ids = sorted(stored_ids - indexed_ids)
+        else:
+            lexical_index.clear()
+            missing_ids = None
+
+        if missing_ids is None or missing_ids:
+            await _in_worker_batches(iter_document_texts(db, missing_ids), _index_texts)
+        lexical_index.loaded = True
+        if lexical_index.snapshot_dir:
+            await asyncio.to_thread(lexical_index.save)
+        logging.info(f"Lexical index ready with {len(lexical_index)} documents")
+
+
+async def ensure_corpus_stats(db: AsyncSession) -> None:
+    """
+    Make the per-language keyword statistics ready on first use.
+
+    Works like `ensure_lexical_index`. Documents stored without a language
+    are counted under the detected one.
+    """
+    if corpus_stats.loaded:
+        return
+    async with _corpus_stats_lock:
+        if corpus_stats.loaded:
+            return
+
+        if await asyncio.to_thread(corpus_stats.restore):
+            stored_ids = set(await get_document_ids(db))
+            counted_ids = set(corpus_stats.document_ids)
+            for document_id in counted_ids - stored_ids:
+                corpus_stats.remove(document_id)
+            missing_ids = sorted(stored_ids - counted_ids)
+        else:
+            corpus_stats.clear()
+            missing_ids = None
+
+        if missing_ids is None or missing_ids:
+            await _in_worker_batches(iter_document_languages(db, missing_ids), _count_texts)
+        corpus_stats.loaded = True
+        if corpus_stats.snapshot_dir:
+            await asyncio.to_thread(corpus_stats.save)
+        logging.info(f"Corpus statistics ready with {len(corpus_stats)} documents")
+
+
+async def extract_corpus_keywords(db: AsyncSession, num_keywords: int = 10, limit: int = 100,
+                                  after_id: Optional[int] = None, batch_size: Optional[int] = None) -> dict:
+    """
+    Extract the keywords of one page of documents against the corpus statistics.
+
+    Pages are in document ID order; pass the returned `next_after_id` to get
+    the next one. Documents are streamed and scored in batches of
+    `batch_size`, one `extract_keywords_many` call per batch on a worker thread
+    (the statistics live in this process, so not on the text pool).
+
+    Args:
+        db (AsyncSession): Database session.
+        num_keywords (int): Number of keywords per document.
+        limit (int): Maximum number of documents in the page.
+        after_id (Optional[int]): Start after this document ID; None starts at the first document.
+        batch_size (Optional[int]): Documents per batch; defaults to `settings.keywords_batch_size`.
+
+    Returns:
+        dict: Keywords by document ID, the number of documents, the time taken, documents per second
+            and the `next_after_id` of the following page (None after the last page).
+    """
+    await ensure_corpus_stats(db)
+    batch_size = batch_size or settings.keywords_batch_size
+    keywords: Dict[int, List[str]] = {}
+    started = time.perf_counter()
+
+    async def flush(batch: List[Tuple[int, str, str]]) -> None:
+        ids, languages, texts = zip(*batch)
+        results = await asyncio.to_thread(corpus_stats.extract_keywords_many, list(texts), list(languages),
+                                          num_keywords)
+        keywords.update(zip(ids, results))
+
+    batch = []
+    # One extra row tells whether there is a next page
+    last_id, has_more = None, False
+    async for document_id, language, full_text in iter_document_languages(db, after_id=after_id, limit=limit + 1):
+        if len(keywords) + len(batch) == limit:
+            has_more = True
+            break
+        batch.append((document_id, language or detect_language(full_text), full_text))
+        last_id = document_id
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": len(keywords),
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(len(keywords) / elapsed, 1) if elapsed > 0 else None,
+        "next_after_id": last_id if has_more else None,
+        "keywords": keywords,
+    }
+
+
+async def search_document(query_text: str, db: AsyncSession, top_k: Optional[int] = None,
+                          search_mode: str = "in_process", fusion: str = "rrf",
+                          filters: Optional[DocumentSearchFilters] = None) -> dict:
     """
     Fetch relevant documents based on the query vector using cosine similarity and TF-IDF.
 
     Args:
         query_text (str): The string representation of the query text.
         db (AsyncSession): The database session.
+        top_k (Optional[int]): Number of results to return; None returns all documents.
+        search_mode (str): "in_process" scores lexical matches with the in-memory index;
+            "fts" lets PostgreSQL pick the top candidates with `ts_rank_cd` and
+            only scores those with embeddings; "sql_hybrid" runs dense and
+            full-text retrieval and their fusion in one SQL query (pgvector only).
+        fusion (str): "rrf" or "weighted"; used by "sql_hybrid".
+        filters (Optional[DocumentSearchFilters]): Metadata filters; SQL modes only.
 
     Returns:
         Dict: Dictionary of document IDs and their similarity scores.
     """
     try:
-        cleaned_query = clean_text(query_text)
-        query_vector = vectorize_text_llm(cleaned_query)
-        query_vector = np.array(query_vector, dtype=float).flatten()
-
-        documents = await get_all_documents(db)
-        document_texts = [doc.full_text for doc in documents if doc.full_text]
-        similarities = []
+        cleaned_query = await run_inference("text", clean_text, query_text)
+        query_vector = await query_embedder.submit(cleaned_query)
 
-        tfidf_matrix = compute_tfidf(cleaned_query, document_texts)
-        query_tfidf = tfidf_matrix[0]
-        document_tfidf_matrix = tfidf_matrix[1:]
+        if not np.any(query_vector):
+            return {"results": []}
 
-        tfidf_scores = cosine_similarity(query_tfidf, document_tfidf_matrix).flatten()
-
-        for index, doc in enumerate(documents):
-            if doc.full_text_vector is None:
-                continue
+        if filters is not None and not filters.is_empty() and search_mode == "in_process":
+            raise HTTPException(status_code=400, detail="Filters require search_mode 'fts' or 'sql_hybrid'.")
 
+        if search_mode == "sql_hybrid":
             try:
-                doc_vector = np.array(json.loads(doc.full_text_vector), dtype=float).flatten()
-                query_norm = np.linalg.norm(query_vector)
-                doc_norm = np.linalg.norm(doc_vector)
-
-                if query_norm != 0 and doc_norm != 0:
-                    embedding_similarity = np.dot(query_vector, doc_vector) / (query_norm * doc_norm)
-                    combined_similarity = 0.5 * tfidf_scores[index] + 0.5 * embedding_similarity
-                    similarities.append((doc.document_id, combined_similarity))
+                results = await search_documents_hybrid(
+                    query_text, query_vector, top_k or settings.hybrid_candidates, db,
+                    candidates=settings.hybrid_candidates,
+                    fusion=fusion,
+                    dense_weight=settings.hybrid_dense_weight,
+                    lexical_weight=settings.hybrid_lexical_weight,
+                    rrf_k=settings.rrf_k,
+                    filters=filters
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return {"results": results}
+
+        await ensure_document_index(db)
+        if search_mode == "fts":
+            candidates = await search_documents_fts(query_text, settings.fts_candidates, db, filters=filters)
+            document_ids = np.array([document_id for document_id, _ in candidates], dtype=np.int64)
+            tfidf_scores = np.array([score for _, score in candidates], dtype=np.float32)
+            embedding_scores = document_index.score_ids(query_vector, document_ids.tolist())
+        elif search_mode == "in_process":
+            document_ids, embedding_scores = document_index.candidates(query_vector, top_k)
+            await ensure_lexical_index(db)
+            # The first query after an update rebuilds the weight matrix
+            tfidf_scores = await asyncio.to_thread(lexical_index.score_documents, cleaned_query, document_ids)
+        else:
+            raise ValueError(f"Unknown search mode: {search_mode}")
 
-            except Exception as e:
-                logging.error(f"Error during document search: {e}")
-                continue
+        if document_ids.shape[0] == 0:
+            return {"results": []}
 
-        sorted_similarities = sorted(similarities, key=lambda x: x[1], reverse=True)
+        combined_scores = 0.5 * tfidf_scores + 0.5 * embedding_scores
+        top = top_k_indices(combined_scores, top_k)
+        sorted_similarities = [(int(document_ids[i]), float(combined_scores[i])) for i in top]
         return {"results": sorted_similarities}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
@@ -182,16 +393,7 @@ async def retrieve_context_from_documents(question: str, filtered_documents: Lis
         document_text = await fetch_document_text(document_id, context_type, db)
 
         if document_text:
-            # Extract relevant passages from each document
-            relevant_passages = extract_relevant_passage(document_text, question)
-            # Calculate relevance score for each passage
-            # seen_passages = set()
-            for passage in relevant_passages:
-                relevance_score = compute_similarity(question, passage)
-                # if passage not in seen_passages and relevance_score > 0.1:  # Ensure relevance and uniqueness
-                if relevance_score > 0.1:
-                    # seen_passages.add(passage)
-                    document_passages.append({"passage": passage, "relevance_score": relevance_score})
+            document_passages.extend(await run_inference("text", rank_passages, question, document_text))
 
     # Ensure that passages are unique and relevant
     ranked_passages = sorted(document_passages, key=lambda x: x["relevance_score"], reverse=True)
@@ -201,6 +403,31 @@ async def retrieve_context_from_documents(question: str, filtered_documents: Lis
     return " ".join(selected_passages)
 
 
+def rank_passages(question: str, document_text: str) -> List[dict]:
+    """
+    Split one document into passages and keep those relevant to the question.
+
+    Args:
+        question (str): The question being asked.
+        document_text (str): The full text or summary of the document.
+
+    Returns:
+        List[dict]: Passages with their relevance scores, in document order.
+    """
+    ranked = []
+    # Extract relevant passages from the document
+    relevant_passages = extract_relevant_passage(document_text, question)
+    # Calculate relevance score for each passage
+    # seen_passages = set()
+    for passage in relevant_passages:
+        relevance_score = compute_similarity(question, passage)
+        # if passage not in seen_passages and relevance_score > 0.1:  # Ensure relevance and uniqueness
+        if relevance_score > 0.1:
+            # seen_passages.add(passage)
+            ranked.append({"passage": passage, "relevance_score": relevance_score})
+    return ranked
+
+
 def extract_relevant_passage(document_text: str, question: str) -> List[str]:
     """
     Split the document into smaller manageable chunks or passages for better context extraction.
@@ -247,4 +474,138 @@ def select_top_diverse_passages(ranked_passages: List[dict], top_k: int) -> List
         if len(selected_passages) >= top_k:
             break
 
-    return selected_passages
\ No newline at end of file
+    return selected_passages
+
+
+async def vectorize_document(document_id: int, db: AsyncSession) -> dict:
+    """
+    Embed the full text of a document and store its vector.
+
+    Args:
+        document_id (int): The ID of the document.
+        db (AsyncSession): Database session.
+
+    Returns:
+        dict: The document ID and its full text vector.
+    """
+    document = await get_document_by_id(document_id, db)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    cleaned_text = await run_inference("text", clean_text, document.full_text)
+    document_vector, _ = await run_inference("embedder", vectorize_document_llm, cleaned_text)
+    text_vector_list = [document_vector.tolist()]
+
+    await update_document_vectors(
+        document_id=document_id,
+        summary=None,
+        summary_vector=None,
+        full_text_vector=text_vector_list,
+        db=db
+    )
+    return {"document_id": document_id, "full_text_vector": text_vector_list}
+
+
+async def _generate_summary(cleaned_text: str, max_length: int, min_length: int, summary_type: str,
+                            cancel: Optional[CancellationToken] = None, language: str = "en") -> str:
+    """Run the summarization mode selected by `summary_type` on the inference pools."""
+    # Process workers cannot share the token; their calls then stop only between stages
+    worker_cancel = token_for_pool(cancel, "summarizer")
+    if summary_type == "tokenizer":
+        # Generate summary and vector for the provided text
+        summary = await run_inference("summarizer", generate_summary, cleaned_text,
+                                      max_length=max_length, min_length=min_length, cancel=worker_cancel)
+    elif summary_type == "hierarchical":
+        # One summary of bounded length, whatever the document size
+        summary = await run_inference("summarizer", generate_summary_hierarchical, cleaned_text,
+                                      max_length=max_length, min_length=min_length, cancel=worker_cancel)
+    else:
+        # Extract important keywords for summary with keywords; a thread, as they read this process's corpus statistics
+        keywords = await asyncio.to_thread(extract_keywords, cleaned_text, lang=language)
+        check_cancelled(cancel, "summary_with_keywords")
+        # Generate summary for each chunk, considering keywords (for summary with keywords)
+        summary = await run_inference("summarizer", generate_summary_with_keywords, cleaned_text, keywords,
+                                      max_length=max_length, min_length=min_length, cancel=worker_cancel)
+        # Post-process the summary to ensure important keywords are included (for summary with keywords)
+        summary = post_process_summary_kw(summary, keywords, cleaned_text)
+    return summary
+
+
+async def summarize_document(document_id: int, max_length: int, min_length: int, summary_type: str,
+                             db: AsyncSession, cancel: Optional[CancellationToken] = None) -> dict:
+    """
+    Generate the summary of a document and store it with its vector.
+
+    Args:
+        document_id (int): The ID of the document.
+        max_length (int): Maximum summary length per chunk.
+        min_length (int): Minimum summary length per chunk.
+        summary_type (str): "tokenizer", "key_words" or "hierarchical".
+        db (AsyncSession): Database session.
+        cancel (Optional[CancellationToken]): Stops the work once the request is cancelled.
+
+    Returns:
+        dict: The document ID, summary and summary vector.
+
+    Raises:
+        RequestCancelled: If `cancel` was cancelled before the summary was stored.
+    """
+    # Fetch the document by ID
+    document = await get_document_by_id(document_id, db)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # Clean the input text
+    # cleaned_text = clean_text(document.full_text)
+    cleaned_text = document.full_text
+
+    language = document.language or detect_language(cleaned_text)
+    corpus_version = ""
+    if summary_type == "key_words":
+        # Keywords are weighted by the IDF of the documents in the same language, so the
+        # summary changes with them
+        await ensure_corpus_stats(db)
+        corpus_version = corpus_stats.version(language)
+
+    # Same text, parameters, model revision and corpus statistics give the same summary; with
+    # no revision known yet (the model was never downloaded) the cache is bypassed
+    src_lang = "uk"
+    revision = summarizer_revision()
+    cache_key = make_summary_key(cleaned_text, summary_type, max_length, min_length, src_lang, revision,
+                                 corpus_version) if revision else None
+    summary = await summary_cache.get(cache_key) if cache_key else None
+
+    if summary is None:
+        check_cancelled(cancel, "summary")
+        summary = await _generate_summary(cleaned_text, max_length, min_length, summary_type, cancel,
+                                          language=language)
+        if cache_key:
+            await summary_cache.put(cache_key, summary, document_id)
+
+    check_cancelled(cancel, "summary_vector")
+
+    summary_vector = (await run_inference("embedder", vectorize_texts_llm, [summary])).tolist()  # Returns a list
+
+    # Update document summary in the database
+    await update_document_vectors(
+        document_id=document_id,
+        summary=summary,
+        summary_vector=summary_vector,
+        full_text_vector=None,
+        db=db
+    )
+    return {"document_id": document_id, "summary": summary, "summary_vector": summary_vector}
+
+
+async def _vectorize_job(document_id: int) -> dict:
+    async with SessionLocal() as db:
+        return await vectorize_document(document_id, db)
+
+
+async def _summarize_job(document_id: int, max_length: int, min_length: int, summary_type: str) -> dict:
+    async with SessionLocal() as db:
+        return await summarize_document(document_id, max_length, min_length, summary_type, db)
+
+
+job_queue.register("vectorize", _vectorize_job)
+job_queue.register("summarize", _summarize_job)
@@ -0,0 +1,203 @@
+import copy
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+# Lowest cosine similarity to the eager fp32 model a backend may produce on the parity corpus
+PARITY_MIN_COSINE = 0.99
+
+# Fixed corpus for parity checks between a backend and the eager fp32 model
+PARITY_CORPUS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Document summarization condenses long texts into a few sentences.",
+    "Vector search ranks documents by cosine similarity to the query embedding.",
+    "Він завантажив документ і попросив короткий підсумок українською мовою.",
+    "Short.",
+    "Invoices are due within thirty days of receipt unless otherwise agreed in writing "
+    "by both parties, and late payments accrue interest at the statutory rate.",
+    "Neural machine translation models are trained on large parallel corpora.",
+    "What is the capital of France?",
+]
+
+
+def mean_pool(last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    """
+    Average token embeddings, ignoring padding positions.
+
+    Args:
+        last_hidden_state (torch.Tensor): Model output of shape (batch, seq_len, hidden).
+        attention_mask (torch.Tensor): Mask of shape (batch, seq_len), 1 for real tokens.
+
+    Returns:
+        torch.Tensor: Pooled embeddings of shape (batch, hidden).
+    """
+    mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(dim=1)
+    counts = mask.sum(dim=1).clamp(min=1e-9)
+    return summed / counts
+
+
+class _MeanPooledEncoder(torch.nn.Module):
+    """Encoder plus mean pooling as one module, so ONNX export includes the pooling."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        last_hidden_state = self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        return mean_pool(last_hidden_state, attention_mask)
+
+
+class EmbeddingBackend(ABC):
+    """
+    Runs the sentence encoder on padded token ids and returns pooled embeddings.
+
+    Backends differ in numerics, so `name` is part of the embedding cache key
+    for everything except the eager fp32 model.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """
+        Embed one padded batch.
+
+        Args:
+            input_ids (np.ndarray): int64 token ids of shape (batch, seq_len).
+            attention_mask (np.ndarray): int64 mask of shape (batch, seq_len).
+
+        Returns:
+            np.ndarray: float32 embeddings of shape (batch, hidden).
+        """
+
+
+class TorchBackend(EmbeddingBackend):
+    """Eager PyTorch model in fp32."""
+
+    name = "torch"
+
+    def __init__(self, model: torch.nn.Module):
+        self.model = model.eval()
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        input_ids, attention_mask = torch.from_numpy(input_ids), torch.from_numpy(attention_mask)
+        with torch.no_grad():
+            last_hidden_state = self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        return mean_pool(last_hidden_state, attention_mask).numpy().astype(np.float32, copy=False)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch model with `Linear` layers dynamically quantized to int8."""
+
+    name = "torch_int8"
+
+    def __init__(self, model: torch.nn.Module):
+        quantized = torch.quantization.quantize_dynamic(copy.deepcopy(model).eval(), {torch.nn.Linear},
+                                                        dtype=torch.qint8)
+        super().__init__(quantized)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    ONNX export of the encoder with mean pooling, run under onnxruntime.
+
+    The model is exported to `onnx_path` on first use and reused afterwards;
+    the path should include the model revision so a new checkpoint triggers
+    a new export.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model: torch.nn.Module, onnx_path: str, threads: int = 0):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx requires the 'onnxruntime' package.")
+
+        if not os.path.exists(onnx_path):
+            self.export(model, onnx_path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def export(model: torch.nn.Module, onnx_path: str) -> None:
+        """Export the encoder with dynamic batch and sequence axes."""
+        directory = os.path.dirname(onnx_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        dummy = torch.ones((1, 8), dtype=torch.long)
+        tmp_path = f"{onnx_path}.tmp"
+        torch.onnx.export(
+            _MeanPooledEncoder(model.eval()), (dummy, dummy), tmp_path,
+            input_names=["input_ids", "attention_mask"], output_names=["embeddings"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                          "attention_mask": {0: "batch", 1: "sequence"},
+                          "embeddings": {0: "batch"}},
+            opset_version=17,
+        )
+        os.replace(tmp_path, onnx_path)
+        logging.info(f"Exported embedding model to {onnx_path}")
+
+    def embed(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        (embeddings,) = self.session.run(None, {"input_ids": input_ids.astype(np.int64, copy=False),
+                                                "attention_mask": attention_mask.astype(np.int64, copy=False)})
+        return embeddings.astype(np.float32, copy=False)
+
+
+def create_embedding_backend(kind: str, model: torch.nn.Module, onnx_path: Optional[str] = None,
+                             threads: int = 0) -> EmbeddingBackend:
+    """
+    Build the configured embedding backend.
+
+    Args:
+        kind (str): "torch", "torch_int8" or "onnx".
+        model (torch.nn.Module): The eager fp32 model.
+        onnx_path (Optional[str]): Where the ONNX export is stored; required for "onnx".
+        threads (int): Intra-op threads; 0 keeps the library default.
+
+    Returns:
+        EmbeddingBackend: The backend.
+    """
+    if kind in ("torch", "torch_int8") and threads > 0:
+        torch.set_num_threads(threads)
+    if kind == "torch":
+        return TorchBackend(model)
+    if kind == "torch_int8":
+        return QuantizedTorchBackend(model)
+    if kind == "onnx":
+        if not onnx_path:
+            raise ValueError("EMBEDDING_BACKEND=onnx requires an ONNX model path.")
+        return OnnxBackend(model, onnx_path, threads)
+    raise ValueError(f"Unknown embedding backend: {kind}")
+
+
+def backend_parity(backend: EmbeddingBackend, reference: EmbeddingBackend, tokenizer,
+                   texts: List[str] = PARITY_CORPUS) -> np.ndarray:
+    """
+    Cosine similarity between the embeddings of two backends on the same texts.
+
+    Args:
+        backend (EmbeddingBackend): Backend under test.
+        reference (EmbeddingBackend): Usually the eager fp32 `TorchBackend`.
+        tokenizer: Tokenizer of the model.
+        texts (List[str]): Texts embedded as one padded batch.
+
+    Returns:
+        np.ndarray: One cosine similarity per text.
+    """
+    inputs = tokenizer(texts, truncation=True, padding=True, return_tensors="np")
+    input_ids, attention_mask = inputs["input_ids"].astype(np.int64), inputs["attention_mask"].astype(np.int64)
+    actual, expected = backend.embed(input_ids, attention_mask), reference.embed(input_ids, attention_mask)
+    norms = np.linalg.norm(actual, axis=1) * np.linalg.norm(expected, axis=1)
+    return (actual * expected).sum(axis=1) / np.maximum(norms, 1e-12)
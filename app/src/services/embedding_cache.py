@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; appends to the index are then unlocked
+    fcntl = None
+
+
+def make_cache_key(model_name: str, model_revision: str, pooling: str, text: str) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        model_name (str): Name of the embedding model.
+        model_revision (str): Revision (commit hash) of the model weights.
+        pooling (str): Pooling mode the vector was produced with.
+        text (str): The embedded text.
+
+    Returns:
+        str: Key combining the model identity, pooling mode and SHA-256 of the text.
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model_name}|{model_revision}|{pooling}|{text_hash}"
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of float32 embedding vectors.
+
+    The memory tier is an LRU capped by the total size of the cached vectors.
+    The optional disk tier appends vectors to fixed-width float32 shard files,
+    read back through `np.memmap`, and records their location in an append-only
+    `index.jsonl`, so it survives restarts.
+
+    Several processes can share the directory: each writes only shards named
+    after its own writer ID, appends to the index under an exclusive lock and
+    picks up the entries of the others when a key is not found.
+    """
+
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, directory: Optional[str] = None, max_memory_bytes: int = 64 * 1024 * 1024,
+                 shard_rows: int = 4096):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.shard_rows = shard_rows
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._index: Dict[str, Tuple[str, int]] = {}
+        self._index_offset = 0
+        self._shard_rows_used: Dict[str, int] = {}
+        self._current_shard: Dict[int, str] = {}
+        self._writer_pid: Optional[int] = None
+        self._writer_id = ""
+        self._writer_shards = 0
+        self._memmaps: Dict[str, np.memmap] = {}
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_index()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached vector for `key`, or None on a miss."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+
+            location = self._index.get(key)
+            if location is None and self.directory:
+                # Another process may have written it since
+                self._load_index()
+                location = self._index.get(key)
+            if location is not None:
+                vector = self._read_disk(*location)
+                if vector is not None:
+                    self.disk_hits += 1
+                    self._put_memory(key, vector)
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Store `vector` in the memory tier and, if configured, on disk."""
+        vector = np.array(vector, dtype=np.float32).ravel()
+        vector.setflags(write=False)
+        with self._lock:
+            self._put_memory(key, vector)
+            if self.directory and key not in self._index:
+                try:
+                    self._write_disk(key, vector)
+                except OSError as e:
+                    logging.error(f"Failed to persist embedding to disk cache: {e}")
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counters plus current tier sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._index),
+            }
+
+    def clear_memory(self) -> None:
+        """Drop the memory tier; the disk tier is kept."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _put_memory(self, key: str, vector: np.ndarray) -> None:
+        if vector.nbytes > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _shard_path(self, shard: str) -> str:
+        return os.path.join(self.directory, shard)
+
+    def _load_index(self) -> None:
+        """Read the index entries appended since the last call, by any process."""
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        if not os.path.exists(index_path) or os.path.getsize(index_path) <= self._index_offset:
+            return
+
+        with open(index_path, "rb") as index_file:
+            index_file.seek(self._index_offset)
+            for line in index_file:
+                if not line.endswith(b"\n"):
+                    break  # being appended; read again next time
+                self._index_offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    shard, row = entry["shard"], int(entry["row"])
+                except (ValueError, KeyError):
+                    continue  # torn write left by a crash
+                self._index[entry["key"]] = (shard, row)
+
+    @staticmethod
+    def _shard_dim(shard: str) -> int:
+        # shard-00003-d384.f32
+        return int(shard.rsplit("-d", 1)[1].split(".", 1)[0])
+
+    def _read_disk(self, shard: str, row: int) -> Optional[np.ndarray]:
+        dim = self._shard_dim(shard)
+        mapped = self._memmaps.get(shard)
+        if mapped is None or row >= mapped.shape[0]:
+            path = self._shard_path(shard)
+            rows = os.path.getsize(path) // (dim * 4) if os.path.exists(path) else 0
+            if row >= rows:
+                return None
+            mapped = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+            self._memmaps[shard] = mapped
+
+        vector = np.array(mapped[row], dtype=np.float32)
+        vector.setflags(write=False)
+        return vector
+
+    def _write_disk(self, key: str, vector: np.ndarray) -> None:
+        if self._writer_pid != os.getpid():
+            # A new process (or a forked copy) never appends to shards of another writer
+            self._writer_pid = os.getpid()
+            self._writer_id = uuid.uuid4().hex[:12]
+            self._writer_shards = 0
+            self._current_shard = {}
+
+        dim = vector.shape[0]
+        shard = self._current_shard.get(dim)
+        if shard is None or self._shard_rows_used[shard] >= self.shard_rows:
+            shard = f"shard-{self._writer_id}-{self._writer_shards:05d}-d{dim}.f32"
+            self._writer_shards += 1
+            self._current_shard[dim] = shard
+            self._shard_rows_used[shard] = 0
+
+        row = self._shard_rows_used[shard]
+        with open(self._shard_path(shard), "r+b" if row else "xb") as shard_file:
+            shard_file.seek(row * dim * 4)
+            shard_file.write(vector.tobytes())
+        line = (json.dumps({"key": key, "shard": shard, "row": row}) + "\n").encode("utf-8")
+        with open(os.path.join(self.directory, self.INDEX_FILE), "ab") as index_file:
+            if fcntl is not None:
+                fcntl.flock(index_file, fcntl.LOCK_EX)
+            try:
+                index_file.write(line)
+                index_file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(index_file, fcntl.LOCK_UN)
+
+        self._shard_rows_used[shard] = row + 1
+        self._index[key] = (shard, row)
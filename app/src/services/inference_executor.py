@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from src.conf.config import settings
+from src.services.metrics import metrics
+
+queue_depth = metrics.gauge("inference_queue_depth", "Calls waiting for a free inference worker.")
+in_flight = metrics.gauge("inference_in_flight", "Calls currently running on an inference worker.")
+wait_seconds = metrics.histogram("inference_wait_seconds", "Time from submission until a worker picks the call up.")
+run_seconds = metrics.histogram("inference_run_seconds", "Time a call spends running on a worker.")
+rejected = metrics.counter("inference_rejected_total", "Calls rejected because the queue was full.")
+
+
+class InferencePool:
+    """
+    Bounded pool of thread or process workers for one kind of blocking work.
+
+    At most `workers` calls run at once and at most `max_queue` more wait for a
+    slot; further calls are rejected with HTTP 503 instead of piling up. The
+    executor is created on first use. Process workers are spawned, not forked,
+    and load their own models through the model registry, so functions and
+    arguments sent to them must be picklable.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", workers: int = 1, max_queue: int = 32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind for '{name}': {kind}")
+        if workers < 1:
+            raise ValueError(f"Executor '{name}' needs at least one worker.")
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        return {"pool": self.name}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"inference-{self.name}")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on a worker and await its result.
+
+        Raises:
+            HTTPException: 503 if the queue of this pool is full.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            rejected.inc(labels=self.labels)
+            raise HTTPException(status_code=503, detail=f"The {self.name} workers are busy, please retry later.")
+
+        submitted = time.perf_counter()
+        self._waiting += 1
+        queue_depth.inc(labels=self.labels)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+            queue_depth.dec(labels=self.labels)
+
+        try:
+            started = time.perf_counter()
+            wait_seconds.observe(started - submitted, labels=self.labels)
+            in_flight.inc(labels=self.labels)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+        finally:
+            in_flight.dec(labels=self.labels)
+            run_seconds.observe(time.perf_counter() - started, labels=self.labels)
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._waiting,
+            "in_flight": in_flight.value(self.labels),
+            "rejected": rejected.value(self.labels),
+            "wait_seconds": wait_seconds.snapshot(self.labels),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _pool_from_settings(name: str) -> InferencePool:
+    return InferencePool(
+        name,
+        kind=getattr(settings, f"{name}_executor"),
+        workers=getattr(settings, f"{name}_workers"),
+        max_queue=getattr(settings, f"{name}_queue_size"),
+    )
+
+
+# "embedder": MiniLM embeddings, "summarizer": mBART generation, "text": cleaning, TF-IDF and other CPU work
+inference_pools: Dict[str, InferencePool] = {name: _pool_from_settings(name)
+                                             for name in ("embedder", "summarizer", "text")}
+
+
+async def run_inference(pool: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking model or CPU work on the named pool without blocking the event loop.
+
+    Args:
+        pool (str): "embedder", "summarizer" or "text".
+        fn (Callable[..., Any]): The blocking function.
+
+    Returns:
+        Any: What `fn` returns.
+    """
+    return await inference_pools[pool].run(fn, *args, **kwargs)
+
+
+def shutdown_inference_pools() -> None:
+    for pool in inference_pools.values():
+        pool.shutdown()
+    logging.info("Inference pools shut down")
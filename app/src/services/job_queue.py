@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.repository.document_repository import update_document_status
+from src.services.metrics import metrics
+
+jobs_total = metrics.counter("jobs_total", "Background jobs by kind and final status.")
+job_seconds = metrics.histogram("job_seconds", "Run time of background job attempts.")
+jobs_pending = metrics.gauge("jobs_pending", "Background jobs waiting for a worker.")
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job:
+    """One unit of background work on a document, with its progress and outcome."""
+
+    def __init__(self, kind: str, document_id: int, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.document_id = document_id
+        self.params = params
+        self.status = JobStatus.PENDING
+        self.attempts = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def key(self) -> Tuple:
+        return self.kind, self.document_id, tuple(sorted(self.params.items()))
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "document_id": self.document_id,
+            "params": self.params,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    In-process queue of background jobs run by a fixed number of asyncio workers.
+
+    A job submitted while an identical one (same kind, document and
+    parameters) is still pending or running is not queued again; the caller
+    gets the existing job. Failed attempts are retried with exponential
+    backoff up to `max_attempts`, except client errors (HTTP 4xx), which fail
+    at once. The job's document `status` follows processing/done/failed.
+    Finished jobs are kept for polling, oldest dropped beyond `history_size`.
+    Jobs live in memory only and do not survive a restart.
+    """
+
+    def __init__(self, concurrency: int = 1, max_attempts: int = 3, retry_delay_seconds: float = 5.0,
+                 history_size: int = 1000):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.history_size = history_size
+        self._handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[Tuple, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: Callable[..., Awaitable[Any]]) -> None:
+        """
+        Register the coroutine function that runs jobs of one kind.
+
+        Args:
+            kind (str): Job kind, e.g. "summarize".
+            handler (Callable[..., Awaitable[Any]]): Called as `handler(document_id, **params)`;
+                its return value becomes the job result.
+        """
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, document_id: int, **params) -> Job:
+        """Queue a job, or return the identical job that is already pending or running."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("The job queue is not running.")
+
+        job = Job(kind, document_id, params)
+        existing = self._active.get(job.key)
+        if existing is not None:
+            return existing
+
+        self._active[job.key] = job
+        self._remember(job)
+        await self._queue.put(job)
+        jobs_pending.inc(labels={"kind": kind})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (JobStatus.PENDING, JobStatus.PROCESSING):
+                break
+            del self._jobs[oldest_id]
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            jobs_pending.dec(labels={"kind": job.kind})
+            try:
+                await self._run(job)
+            except Exception as e:
+                logging.error(f"Job {job.id} crashed the worker loop: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.PROCESSING
+        job.attempts += 1
+        job.started_at = time.time()
+        await self._set_document_status(job.document_id, JobStatus.PROCESSING.value)
+
+        start = time.perf_counter()
+        try:
+            job.result = await self._handlers[job.kind](job.document_id, **job.params)
+        except Exception as e:
+            job_seconds.observe(time.perf_counter() - start, labels={"kind": job.kind})
+            job.error = e.detail if isinstance(e, HTTPException) else str(e)
+            retryable = not (isinstance(e, HTTPException) and e.status_code < 500)
+            if retryable and job.attempts < self.max_attempts:
+                delay = self.retry_delay_seconds * 2 ** (job.attempts - 1)
+                logging.warning(f"Job {job.id} ({job.kind}) failed, retry {job.attempts} in {delay:.0f}s: {e}")
+                job.status = JobStatus.PENDING
+                asyncio.get_running_loop().call_later(delay, self._requeue, job)
+                return
+            logging.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempt(s): {e}")
+            self._finish(job, JobStatus.FAILED)
+            await self._set_document_status(job.document_id, JobStatus.FAILED.value)
+            return
+
+        job_seconds.observe(time.perf_counter() - start, labels={"kind": job.kind})
+        job.error = None
+        self._finish(job, JobStatus.DONE)
+        await self._set_document_status(job.document_id, JobStatus.DONE.value)
+
+    def _requeue(self, job: Job) -> None:
+        if self._queue is not None:
+            self._queue.put_nowait(job)
+            jobs_pending.inc(labels={"kind": job.kind})
+
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        self._active.pop(job.key, None)
+        jobs_total.inc(labels={"kind": job.kind, "status": status.value})
+
+    @staticmethod
+    async def _set_document_status(document_id: int, status: str) -> None:
+        try:
+            async with SessionLocal() as db:
+                await update_document_status(document_id, status, db)
+        except Exception as e:
+            logging.error(f"Failed to set status '{status}' on document {document_id}: {e}")
+
+    def stats(self) -> dict:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "concurrency": self.concurrency,
+            "max_attempts": self.max_attempts,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts,
+        }
+
+
+job_queue = JobQueue(settings.job_workers, settings.job_max_attempts, settings.job_retry_delay_seconds,
+                     settings.job_history_size)
@@ -0,0 +1,23 @@
+import re
+
+CYRILLIC = re.compile(r"[А-Яа-яІіЇїЄєҐґ]")
+LATIN = re.compile(r"[A-Za-z]")
+
+# PostgreSQL text search configuration per document language; there is no
+# built-in Ukrainian configuration, so Ukrainian text is only lowercased
+TEXT_SEARCH_CONFIGS = {"en": "english", "uk": "simple"}
+
+
+def detect_language(text: str, sample_chars: int = 20000) -> str:
+    """
+    Guess whether a document is Ukrainian or English.
+
+    Args:
+        text (str): The document text.
+        sample_chars (int): Number of leading characters to inspect.
+
+    Returns:
+        str: "uk" if Cyrillic letters dominate the sample, otherwise "en".
+    """
+    sample = text[:sample_chars]
+    return "uk" if len(CYRILLIC.findall(sample)) > len(LATIN.findall(sample)) else "en"
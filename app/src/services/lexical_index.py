@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.conf.config import settings
+
+# Same analyzer as the default TfidfVectorizer: lowercase, tokens of 2+ word characters
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def analyze(text: str) -> List[str]:
+    """Split text into lowercase terms the way `TfidfVectorizer` does by default."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalIndex:
+    """
+    Incremental inverted index for TF-IDF or BM25 scoring.
+
+    Every document is tokenized once, when it is added; its term counts are
+    kept as a sparse row together with corpus document frequencies. The
+    weighted CSR matrix (L2-normalized TF-IDF rows, or BM25 term weights) is
+    rebuilt from those counts only after the corpus changed, so a query costs
+    one tokenization and one sparse matrix-vector product.
+    """
+
+    SNAPSHOT_FILE = "lexical_index.npz"
+    VOCABULARY_FILE = "lexical_vocabulary.json"
+
+    def __init__(self, mode: str = "tfidf", k1: float = 1.5, b: float = 0.75,
+                 snapshot_dir: Optional[str] = None, snapshot_every: int = 100):
+        if mode not in ("tfidf", "bm25"):
+            raise ValueError(f"Unknown lexical scoring mode: {mode}")
+        self.mode = mode
+        self.k1 = k1
+        self.b = b
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_every = snapshot_every
+        self._vocabulary: Dict[str, int] = {}
+        self._df = np.zeros(1024, dtype=np.int64)
+        self._rows: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._ids = np.empty(0, dtype=np.int64)
+        self._weights: Optional[sparse.csr_matrix] = None
+        self._idf = np.empty(0, dtype=np.float64)
+        self._dirty = True
+        self._changes_since_save = 0
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, document_id: int) -> bool:
+        return document_id in self._rows
+
+    @property
+    def document_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._rows)
+
+    def clear(self) -> None:
+        """Empty the index and mark it as not loaded."""
+        with self._lock:
+            self._vocabulary = {}
+            self._df = np.zeros(1024, dtype=np.int64)
+            self._rows = {}
+            self._dirty = True
+            self.loaded = False
+
+    def load(self, items: Iterable[Tuple[int, str]]) -> None:
+        """Replace the whole index with `(document_id, text)` pairs."""
+        with self._lock:
+            self.clear()
+            for document_id, text in items:
+                if text:
+                    self._add(document_id, text)
+            self.loaded = True
+
+    def add(self, document_id: int, text: Optional[str]) -> None:
+        """Index (or re-index) one document."""
+        with self._lock:
+            self._remove(document_id)
+            if text:
+                self._add(document_id, text)
+            self._changed()
+
+    def remove(self, document_id: int) -> None:
+        """Drop one document; unknown IDs are ignored."""
+        with self._lock:
+            if self._remove(document_id):
+                self._changed()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        self._changes_since_save += 1
+        if self.loaded and self.snapshot_dir and self._changes_since_save >= self.snapshot_every:
+            try:
+                self.save(self.snapshot_dir)
+            except OSError as e:
+                logging.error(f"Failed to snapshot lexical index: {e}")
+
+    def _add(self, document_id: int, text: str) -> None:
+        counts = Counter(analyze(text))
+        if not counts:
+            return
+        indices = np.empty(len(counts), dtype=np.int64)
+        for i, term in enumerate(counts):
+            index = self._vocabulary.get(term)
+            if index is None:
+                index = self._vocabulary[term] = len(self._vocabulary)
+            indices[i] = index
+        if len(self._vocabulary) > self._df.shape[0]:
+            self._df = np.concatenate([self._df, np.zeros(max(len(self._vocabulary), self._df.shape[0]), np.int64)])
+
+        order = np.argsort(indices)
+        indices = indices[order]
+        term_counts = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))[order]
+        self._df[indices] += 1
+        self._rows[document_id] = (indices, term_counts)
+
+    def _remove(self, document_id: int) -> bool:
+        row = self._rows.pop(document_id, None)
+        if row is None:
+            return False
+        self._df[row[0]] -= 1
+        return True
+
+    def _build(self) -> None:
+        """Recompute the weighted document-term matrix from stored counts."""
+        ids = np.array(sorted(self._rows), dtype=np.int64)
+        n_docs, n_terms = ids.shape[0], len(self._vocabulary)
+        lengths = np.array([self._rows[i][0].shape[0] for i in ids.tolist()], dtype=np.int64)
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate([self._rows[i][0] for i in ids.tolist()]) if n_docs else np.empty(0, np.int64)
+        counts = np.concatenate([self._rows[i][1] for i in ids.tolist()]) if n_docs else np.empty(0, np.float64)
+        df = self._df[:n_terms].astype(np.float64)
+
+        if self.mode == "tfidf":
+            # Smoothed IDF, as in TfidfVectorizer(smooth_idf=True)
+            idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+            data = counts * idf[indices]
+            row_norms = np.sqrt(np.add.reduceat(data ** 2, indptr[:-1])) if data.size else np.empty(0)
+            row_norms = np.repeat(np.where(row_norms > 0, row_norms, 1.0), lengths)
+            data = data / row_norms
+        else:
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            doc_lengths = np.add.reduceat(counts, indptr[:-1]) if counts.size else np.empty(0)
+            avg_length = doc_lengths.mean() if doc_lengths.size else 1.0
+            norm = np.repeat(self.k1 * (1.0 - self.b + self.b * doc_lengths / avg_length), lengths)
+            data = idf[indices] * counts * (self.k1 + 1.0) / (counts + norm)
+
+        self._ids = ids
+        self._idf = idf
+        self._weights = sparse.csr_matrix((data, indices, indptr), shape=(n_docs, n_terms))
+        self._dirty = False
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        counts = Counter(self._vocabulary[term] for term in analyze(query) if term in self._vocabulary)
+        vector = np.zeros(len(self._vocabulary), dtype=np.float64)
+        if not counts:
+            return vector
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        if self.mode == "tfidf":
+            vector[indices] = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self._idf[indices]
+            vector /= np.linalg.norm(vector)
+        else:
+            vector[indices] = 1.0
+        return vector
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every indexed document against the query.
+
+        TF-IDF scores are cosine similarities; BM25 scores are divided by the
+        best score of the query so both modes fall in [0, 1].
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Sorted document IDs and their scores.
+        """
+        with self._lock:
+            if self._dirty:
+                self._build()
+            ids, weights = self._ids, self._weights
+            query_vector = self._query_vector(query)
+
+        scores = weights @ query_vector if ids.shape[0] else np.empty(0)
+        if self.mode == "bm25" and scores.size and scores.max() > 0:
+            scores = scores / scores.max()
+        return ids, scores.astype(np.float32)
+
+    def score_documents(self, query: str, document_ids: np.ndarray) -> np.ndarray:
+        """Scores aligned with `document_ids`; documents not in the index score 0."""
+        ids, scores = self.scores(query)
+        document_ids = np.asarray(document_ids, dtype=np.int64)
+        aligned = np.zeros(document_ids.shape[0], dtype=np.float32)
+        if ids.shape[0] == 0:
+            return aligned
+        positions = np.minimum(np.searchsorted(ids, document_ids), ids.shape[0] - 1)
+        found = ids[positions] == document_ids
+        aligned[found] = scores[positions[found]]
+        return aligned
+
+    def save(self, directory: Optional[str] = None) -> None:
+        """Write a snapshot of term counts, frequencies and vocabulary to `directory`."""
+        directory = directory or self.snapshot_dir
+        with self._lock:
+            ids = sorted(self._rows)
+            lengths = np.array([self._rows[i][0].shape[0] for i in ids], dtype=np.int64)
+            indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            indices = np.concatenate([self._rows[i][0] for i in ids]) if ids else np.empty(0, np.int64)
+            counts = np.concatenate([self._rows[i][1] for i in ids]) if ids else np.empty(0, np.float64)
+            vocabulary = sorted(self._vocabulary, key=self._vocabulary.get)
+            df = self._df[:len(vocabulary)].copy()
+            self._changes_since_save = 0
+
+        os.makedirs(directory, exist_ok=True)
+        snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        vocabulary_path = os.path.join(directory, self.VOCABULARY_FILE)
+        with open(snapshot_path + ".tmp", "wb") as snapshot_file:
+            np.savez(snapshot_file, ids=np.array(ids, dtype=np.int64), indptr=indptr, indices=indices,
+                     counts=counts, df=df)
+        with open(vocabulary_path + ".tmp", "w", encoding="utf-8") as vocabulary_file:
+            json.dump(vocabulary, vocabulary_file, ensure_ascii=False)
+        os.replace(vocabulary_path + ".tmp", vocabulary_path)
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+
+    def restore(self, directory: Optional[str] = None) -> bool:
+        """
+        Load a snapshot written by `save`.
+
+        The index is not marked as loaded, so the caller can first reconcile
+        it with documents added or deleted after the snapshot was taken.
+
+        Returns:
+            bool: False if there is no usable snapshot in `directory`.
+        """
+        directory = directory or self.snapshot_dir
+        if not directory:
+            return False
+        snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        vocabulary_path = os.path.join(directory, self.VOCABULARY_FILE)
+        if not (os.path.exists(snapshot_path) and os.path.exists(vocabulary_path)):
+            return False
+        try:
+            with open(vocabulary_path, "r", encoding="utf-8") as vocabulary_file:
+                vocabulary = json.load(vocabulary_file)
+            with np.load(snapshot_path) as snapshot:
+                ids, indptr, indices = snapshot["ids"], snapshot["indptr"], snapshot["indices"]
+                counts, df = snapshot["counts"], snapshot["df"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Ignoring unreadable lexical index snapshot: {e}")
+            return False
+
+        with self._lock:
+            self._vocabulary = {term: i for i, term in enumerate(vocabulary)}
+            self._df = np.concatenate([df, np.zeros(1024, dtype=np.int64)])
+            self._rows = {
+                int(document_id): (indices[indptr[i]:indptr[i + 1]], counts[indptr[i]:indptr[i + 1]])
+                for i, document_id in enumerate(ids)
+            }
+            self._dirty = True
+            self._changes_since_save = 0
+        return True
+
+
+# Full texts of all documents, restored from the snapshot or built on the first search
+lexical_index = LexicalIndex(mode=settings.lexical_scoring, snapshot_dir=settings.lexical_index_dir or None,
+                             snapshot_every=settings.lexical_index_snapshot_every)
@@ -0,0 +1,138 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Default latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter, one value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, one per label set."""
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def dec(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        self.inc(-amount, labels)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count, one per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            # Per-bucket counts, then sum and count
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 3))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, labels: Optional[Dict[str, str]] = None) -> dict:
+        """Bucket counts (non-cumulative), sum and count of one label set."""
+        with self._lock:
+            series = list(self._series.get(_labels(labels), [0.0] * (len(self.buckets) + 3)))
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {"buckets": dict(zip(bounds, series[:-2])), "sum": series[-2], "count": series[-1]}
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        samples = []
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], series[:-2]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", key + (("le", str(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", key, series[-2]))
+            samples.append((f"{self.name}_count", key, series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text format.
+
+    Metrics are created once by name; asking again for the same name returns
+    the existing instance, so modules can declare them at import time.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+from src.conf.config import settings
+from src.services.inference_executor import run_inference
+from src.services.metrics import metrics
+from src.services.vector_service import vectorize_texts_llm
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+batch_size_histogram = metrics.histogram("micro_batch_size", "Items per micro-batch.", BATCH_SIZE_BUCKETS)
+batch_wait_seconds = metrics.histogram("micro_batch_wait_seconds", "Time an item waits for its batch to close.")
+window_gauge = metrics.gauge("micro_batch_window_seconds", "Configured collection window of a micro-batcher.")
+max_batch_gauge = metrics.gauge("micro_batch_max_size", "Configured maximum batch size of a micro-batcher.")
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls into one batched call.
+
+    The first item opens a batch; it closes when `window_ms` has passed or
+    `max_batch_size` items have arrived, whichever comes first. The batch
+    runs as one `batch_fn(items)` call on the given inference pool, and each
+    caller gets the row of the result that belongs to its item. Collection of
+    the next batch starts while the previous one is still running.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], Sequence[Any]], window_ms: float = 5.0,
+                 max_batch_size: int = 32, pool: str = "embedder"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer.")
+        self.name = name
+        self.batch_fn = batch_fn
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.pool = pool
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        # The loop keeps only weak references to tasks; these keep running batches alive
+        self._batches: Set[asyncio.Task] = set()
+        window_gauge.set(window_ms / 1000, labels=self.labels)
+        max_batch_gauge.set(max_batch_size, labels=self.labels)
+
+    @property
+    def labels(self) -> dict:
+        return {"batcher": self.name}
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its row of the batched result."""
+        if self.window_ms <= 0 or self.max_batch_size == 1:
+            batch_size_histogram.observe(1, labels=self.labels)
+            return (await run_inference(self.pool, self.batch_fn, [item]))[0]
+
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.window_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._run(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        closed = time.perf_counter()
+        # Callers that went away while waiting are dropped from the batch
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+        batch_size_histogram.observe(len(batch), labels=self.labels)
+        for _, _, queued in batch:
+            batch_wait_seconds.observe(closed - queued, labels=self.labels)
+
+        try:
+            results = await run_inference(self.pool, self.batch_fn, [item for item, _, _ in batch])
+        except Exception as e:
+            logging.error(f"Micro-batch '{self.name}' of {len(batch)} items failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running_batches": len(self._batches),
+            "batch_sizes": batch_size_histogram.snapshot(self.labels),
+        }
+
+
+# Batches the single-query embeddings of concurrent search and answer requests
+query_embedder = MicroBatcher("query_embedding", vectorize_texts_llm, window_ms=settings.embedding_batch_window_ms,
+                              max_batch_size=settings.embedding_max_batch_size)
@@ -1,28 +1,38 @@
 from transformers import pipeline, AutoTokenizer, AutoModelForQuestionAnswering
 import torch
+from src.services.model_registry import model_registry
+from src.services.resources import model_source
 
-# Завантажуємо модель один раз при старті
-model_name = "timpal0l/mdeberta-v3-base-squad2"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForQuestionAnswering.from_pretrained(model_name)
+QA_MODEL_NAME = "timpal0l/mdeberta-v3-base-squad2"
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = model.to(device)
 
-# Створюємо pipeline для обробки
-qa_model = pipeline("question-answering", model=model, tokenizer=tokenizer, device=device)
 
+def load_qa_model():
+    # Модель завантажується один раз, під час прогріву або при першому запиті
+    source = model_source(QA_MODEL_NAME)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModelForQuestionAnswering.from_pretrained(source).to(device)
+
+    # Створюємо pipeline для обробки
+    return pipeline("question-answering", model=model, tokenizer=tokenizer, device=device)
+
+
+def warm_up_qa_model(qa_model) -> None:
+    qa_model(question="What is this?", context="This is a warm-up request.")
+
+
+model_registry.register("qa", load_qa_model, warmup=warm_up_qa_model, repo_id=QA_MODEL_NAME)
 
 
 def process_text(text: str, question: str):
     # Використовуємо модель для обробки тексту
-    model_name = "timpal0l/mdeberta-v3-base-squad2"
-    qa_pipeline = pipeline("question-answering", model=model_name, device=device)
-    
+    qa_pipeline = model_registry.get("qa")
+
     # Приклад питання для моделі
     # question = "Яка мета була у чеховського натуралізму?"
-    
+
     # Обробка тексту (контекст) з використанням питання
     result = qa_pipeline(question=question, context=text)
-    
+
     return result['answer']
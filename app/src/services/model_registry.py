@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class ModelState(str, Enum):
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    LOADED = "loaded"
+    WARMING_UP = "warming_up"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ModelEntry:
+    """One registered model: how to load it, how to warm it up, and what happened so far."""
+
+    def __init__(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None,
+                 repo_id: Optional[str] = None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.repo_id = repo_id
+        self.state = ModelState.NOT_LOADED
+        self.value: Any = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state.value,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    """
+    Loads models on first use or during an explicit warm-up, never at import.
+
+    Service modules register a loader (and optionally a warm-up function that
+    runs one dummy inference) under a short name; callers fetch the loaded
+    object with `get`. Loading is serialized per model, so concurrent first
+    requests wait for a single load instead of loading twice.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, ModelEntry] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None,
+                 repo_id: Optional[str] = None) -> None:
+        """
+        Register a model loader.
+
+        Args:
+            name (str): Registry key, e.g. "embedder".
+            loader (Callable[[], Any]): Builds and returns the model object.
+            warmup (Optional[Callable[[Any], None]]): Runs a dummy inference on the loaded object.
+            repo_id (Optional[str]): Hugging Face ID of the model, staged by the bootstrap command.
+        """
+        self._entries[name] = ModelEntry(name, loader, warmup, repo_id)
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def repo_ids(self, names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Hugging Face IDs of the given (default: all) registered models that have one."""
+        entries = self._entries.values() if names is None else \
+            [self._entries[name] for name in names if name in self._entries]
+        return {entry.name: entry.repo_id for entry in entries if entry.repo_id}
+
+    def get(self, name: str) -> Any:
+        """
+        Return the loaded model, loading it on first use.
+
+        Raises:
+            KeyError: If no loader is registered under `name`.
+            RuntimeError: If loading fails.
+        """
+        entry = self._entries[name]
+        if entry.value is not None:
+            return entry.value
+        return self._load(entry)
+
+    def _load(self, entry: ModelEntry) -> Any:
+        with entry.lock:
+            if entry.value is not None:
+                return entry.value
+            entry.state, entry.error = ModelState.LOADING, None
+            start = time.perf_counter()
+            try:
+                value = entry.loader()
+            except Exception as e:
+                entry.state, entry.error = ModelState.FAILED, str(e)
+                logging.error(f"Failed to load model '{entry.name}': {e}")
+                raise RuntimeError(f"Failed to load model '{entry.name}': {e}")
+            entry.load_seconds = time.perf_counter() - start
+            entry.value = value
+            # Loaded on demand without warm-up: usable, but the first call pays any lazy init
+            entry.state = ModelState.READY if entry.warmup is None else ModelState.LOADED
+            logging.info(f"Loaded model '{entry.name}' in {entry.load_seconds:.1f}s")
+            return value
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Load the given models (all registered ones by default) and run their warm-up inference.
+
+        Failures are recorded in the model state and logged, not raised, so one
+        broken model does not stop the others from warming up.
+        """
+        for name in (self.names() if names is None else names):
+            entry = self._entries.get(name)
+            if entry is None:
+                logging.error(f"Cannot warm up unknown model '{name}'")
+                continue
+            try:
+                value = self.get(name)
+                if entry.warmup is not None and entry.warmup_seconds is None:
+                    entry.state = ModelState.WARMING_UP
+                    start = time.perf_counter()
+                    entry.warmup(value)
+                    entry.warmup_seconds = time.perf_counter() - start
+                    logging.info(f"Warmed up model '{name}' in {entry.warmup_seconds:.1f}s")
+                entry.state = ModelState.READY
+            except Exception as e:
+                entry.state, entry.error = ModelState.FAILED, str(e)
+                logging.error(f"Failed to warm up model '{name}': {e}")
+
+    async def warm_up_async(self, names: Optional[Iterable[str]] = None) -> None:
+        """Run `warm_up` in a worker thread so the event loop keeps serving requests."""
+        await asyncio.to_thread(self.warm_up, None if names is None else list(names))
+
+    def is_ready(self, names: Iterable[str]) -> bool:
+        """True once every named model is loaded and warmed up; unknown names are never ready."""
+        return all(name in self._entries and self._entries[name].state == ModelState.READY for name in names)
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: entry.stats() for name, entry in self._entries.items()}
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,133 @@
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import nltk
+from huggingface_hub.constants import HF_HUB_CACHE
+
+from src.conf.config import settings
+
+# NLTK data the services use: stop words, and the punkt sentence tokenizer (punkt_tab in NLTK >= 3.8.2)
+NLTK_PACKAGES = {
+    "stopwords": "corpora/stopwords",
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+}
+
+REVISION_FILE = "REVISION"
+
+
+class MissingResourceError(RuntimeError):
+    """A resource is not staged in `settings.resources_dir` while running offline."""
+
+
+def nltk_data_dir() -> str:
+    return os.path.join(settings.resources_dir, "nltk_data")
+
+
+def model_dir(repo_id: str) -> str:
+    """Directory a Hugging Face model snapshot is staged in."""
+    return os.path.join(settings.resources_dir, "models", repo_id.replace("/", "--"))
+
+
+def _is_staged(repo_id: str) -> bool:
+    return os.path.isfile(os.path.join(model_dir(repo_id), "config.json"))
+
+
+def use_staged_nltk_data() -> None:
+    """Put the staged NLTK data first on NLTK's search path."""
+    path = os.path.abspath(nltk_data_dir())
+    if path not in nltk.data.path:
+        nltk.data.path.insert(0, path)
+
+
+def missing_nltk_packages(packages: Iterable[str] = NLTK_PACKAGES, paths: Optional[List[str]] = None) -> List[str]:
+    """NLTK packages not found on `paths` (default: NLTK's whole search path)."""
+    missing = []
+    for package in packages:
+        try:
+            nltk.data.find(NLTK_PACKAGES[package], paths=paths)
+        except LookupError:
+            missing.append(package)
+    return missing
+
+
+def model_source(repo_id: str) -> str:
+    """
+    Where `from_pretrained` should load a model from.
+
+    A staged snapshot is always preferred, so no Hub request is made for it.
+    Without one, the Hub ID is returned, unless running offline.
+
+    Args:
+        repo_id (str): Hugging Face model ID.
+
+    Returns:
+        str: The staged directory or the model ID.
+
+    Raises:
+        MissingResourceError: If running offline and the model is not staged.
+    """
+    if _is_staged(repo_id):
+        return model_dir(repo_id)
+    if settings.offline:
+        raise MissingResourceError(f"Model '{repo_id}' is not staged in {model_dir(repo_id)}; "
+                                   f"run `python -m src.bootstrap` with network access first.")
+    return repo_id
+
+
+def _read_revision(path: str) -> Optional[str]:
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+
+def model_revision(repo_id: str, model_config) -> str:
+    """Commit hash of a loaded model, from the staged snapshot or the Hub cache."""
+    revision = _read_revision(os.path.join(model_dir(repo_id), REVISION_FILE)) if _is_staged(repo_id) else None
+    return revision or getattr(model_config, "_commit_hash", None) or "unknown"
+
+
+def known_revision(repo_id: str) -> Optional[str]:
+    """
+    Commit hash of a model without loading it.
+
+    Read from the staged snapshot, or else from the `main` ref of the Hub
+    cache, which is what `from_pretrained` resolves to.
+
+    Returns:
+        Optional[str]: The commit hash, or None if the model was never staged or downloaded.
+    """
+    if _is_staged(repo_id):
+        revision = _read_revision(os.path.join(model_dir(repo_id), REVISION_FILE))
+        if revision:
+            return revision
+    return _read_revision(os.path.join(HF_HUB_CACHE, f"models--{repo_id.replace('/', '--')}", "refs", "main"))
+
+
+def prepare_resources(model_ids: Optional[Iterable[str]] = None) -> None:
+    """
+    Check the resources at startup.
+
+    Offline, any missing NLTK package or model snapshot fails startup at
+    once. Online, missing NLTK packages are downloaded into the resources
+    directory; staged packages cost no network round trip.
+
+    Args:
+        model_ids (Optional[Iterable[str]]): Hugging Face IDs of the models that must be available.
+
+    Raises:
+        MissingResourceError: If running offline and something is not staged.
+    """
+    missing = missing_nltk_packages()
+    if settings.offline:
+        missing_models = [repo_id for repo_id in model_ids or () if not _is_staged(repo_id)]
+        if missing or missing_models:
+            raise MissingResourceError(
+                f"Offline mode, but not staged in {settings.resources_dir}: "
+                f"{', '.join(missing + missing_models)}; run `python -m src.bootstrap` with network access first.")
+        return
+    for package in missing:
+        logging.info(f"Downloading NLTK package '{package}' to {nltk_data_dir()}")
+        nltk.download(package, download_dir=nltk_data_dir(), quiet=True)
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+import redis.asyncio as redis_async
+
+from src.conf.config import settings
+
+
+def make_summary_key(text: str, summary_type: str, max_length: int, min_length: int, src_lang: str,
+                     model_revision: str, corpus_version: str = "") -> str:
+    """
+    Build a content-addressed summary cache key.
+
+    Args:
+        text (str): The summarized text.
+        summary_type (str): Summarization mode.
+        max_length (int): Maximum summary length.
+        min_length (int): Minimum summary length.
+        src_lang (str): Source language code passed to the model.
+        model_revision (str): Revision (commit hash) of the summarization model.
+        corpus_version (str): Version of the corpus statistics the summary depends on, if any.
+
+    Returns:
+        str: Key combining the generation parameters and SHA-256 of the text.
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    key = f"{model_revision}|{summary_type}|{max_length}|{min_length}|{src_lang}|{text_hash}"
+    return f"{key}|{corpus_version}" if corpus_version else key
+
+
+class SummaryCache:
+    """
+    Two-tier cache of generated summaries.
+
+    The memory tier is an LRU capped by entry count. The optional Redis tier
+    is shared by all workers and survives restarts; Redis errors are logged
+    and the cache falls back to memory only. Keys embed the text hash, so a
+    changed `full_text` never hits a stale summary; `invalidate_document`
+    also drops the old entries of a document to free their space.
+    """
+
+    REDIS_PREFIX = "summary:"
+
+    def __init__(self, max_entries: int = 1024, redis_url: Optional[str] = None, ttl_seconds: int = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._keys_of_document: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _get_redis(self):
+        if self.redis_url and self._redis is None:
+            self._redis = redis_async.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _remember(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._memory[key] = summary
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached summary, or None on a miss."""
+        with self._lock:
+            summary = self._memory.get(key)
+            if summary is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return summary
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                summary = await client.get(self.REDIS_PREFIX + key)
+            except Exception as e:
+                self.redis_errors += 1
+                logging.warning(f"Summary cache Redis lookup failed: {e}")
+                summary = None
+            if summary is not None:
+                self._remember(key, summary)
+                with self._lock:
+                    self.redis_hits += 1
+                return summary
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def put(self, key: str, summary: str, document_id: Optional[int] = None) -> None:
+        """Store a summary, remembering which document it belongs to."""
+        self._remember(key, summary)
+        if document_id is not None:
+            with self._lock:
+                self._keys_of_document.setdefault(document_id, set()).add(key)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.set(self.REDIS_PREFIX + key, summary, ex=self.ttl_seconds)
+                    if document_id is not None:
+                        pipe.sadd(f"{self.REDIS_PREFIX}document:{document_id}", key)
+                        pipe.expire(f"{self.REDIS_PREFIX}document:{document_id}", self.ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                self.redis_errors += 1
+                logging.warning(f"Summary cache Redis write failed: {e}")
+
+    async def invalidate_document(self, document_id: int) -> None:
+        """Drop every cached summary of a document, e.g. after its full text changed."""
+        with self._lock:
+            for key in self._keys_of_document.pop(document_id, set()):
+                self._memory.pop(key, None)
+
+        client = self._get_redis()
+        if client is not None:
+            document_key = f"{self.REDIS_PREFIX}document:{document_id}"
+            try:
+                keys = await client.smembers(document_key)
+                await client.delete(document_key, *[self.REDIS_PREFIX + key for key in keys])
+            except Exception as e:
+                self.redis_errors += 1
+                logging.warning(f"Summary cache Redis invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        """Hit and miss counters, hit rate and current memory tier size."""
+        with self._lock:
+            lookups = self.memory_hits + self.redis_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.redis_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "redis_enabled": bool(self.redis_url),
+                "redis_errors": self.redis_errors,
+            }
+
+
+summary_cache = SummaryCache(settings.summary_cache_entries, settings.redis_url or None,
+                             settings.summary_cache_ttl_seconds)
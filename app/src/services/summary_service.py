@@ -1,26 +1,156 @@
 from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-from typing import Tuple, List, Dict
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+from typing import Tuple, List, Dict, Optional
 import torch
 from src.services.vector_service import vectorize_text_llm, extract_keywords
 import re
-import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from src.entity.models import Document
+from src.conf.config import settings
+from src.services.model_registry import model_registry
+from src.services.metrics import metrics
+from src.services.text_chunker import chunk_by_tokens
+from src.services.text_cleaner import get_text_cleaner
+from src.services.cancellation import CancellationToken, RequestCancelled, check_cancelled
+from src.services.resources import known_revision, model_revision, model_source
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-nltk.download('stopwords')
-nltk.download('punkt')
+SUMMARY_MODEL_NAME = "facebook/mbart-large-50"
+# SUMMARY_MODEL_NAME = "facebook/bart-large-cnn"
 
-# Initialize the summarizer and tokenizer pipeline with mBART for multilingual support
-tokenizer = AutoTokenizer.from_pretrained("facebook/mbart-large-50")
-model = AutoModelForSeq2SeqLM.from_pretrained("facebook/mbart-large-50")
-summarizer = pipeline("summarization", model=model, tokenizer=tokenizer)
-# tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-cnn")
-# model = AutoModelForSeq2SeqLM.from_pretrained("facebook/bart-large-cnn")
 
+class Summarizer:
+    """mBART tokenizer, model and summarization pipeline, for multilingual support."""
 
-def generate_summary(cleaned_text: str, src_lang: str = "uk", max_length: int = 30, min_length: int = 10) -> Tuple[str, List[float]]:
+    def __init__(self, model_name: str = SUMMARY_MODEL_NAME):
+        source = model_source(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(source)
+        self.pipeline = pipeline("summarization", model=self.model, tokenizer=self.tokenizer)
+        self.revision = model_revision(model_name, self.model.config)
+
+    def warm_up(self) -> None:
+        self.pipeline("Warm up the summarization model.", max_length=8, min_length=2, do_sample=False)
+
+
+model_registry.register("summarizer", Summarizer, warmup=Summarizer.warm_up, repo_id=SUMMARY_MODEL_NAME)
+
+
+def get_summarizer() -> Summarizer:
+    """The shared `Summarizer`, loaded on first use."""
+    return model_registry.get("summarizer")
+
+
+def summarizer_revision() -> Optional[str]:
+    """Revision of the summarization model, read from disk so the event loop never waits for a load."""
+    return known_revision(SUMMARY_MODEL_NAME)
+
+
+model_calls = metrics.counter("summarizer_model_calls_total", "Generate calls made by the summarization model.")
+document_chunks = metrics.histogram("summarizer_document_chunks", "Chunks the model reads per document.",
+                                    (1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+document_seconds = metrics.histogram("summarizer_document_seconds", "Model latency per document.")
+answer_seconds = metrics.histogram("answer_generation_seconds", "Answer generation latency per profile.")
+
+
+def chunk_for_model(text: str, reserved_tokens: int = 0) -> List[str]:
+    """Splits text into whole-sentence chunks that fit the summarization model's input window.
+
+    Args:
+        text (str): The text to split.
+        reserved_tokens (int): Tokens of each model input taken by a prompt around the chunk.
+
+    Returns:
+        List[str]: The chunks, in text order.
+    """
+    tokenizer = get_summarizer().tokenizer
+    budget = settings.summary_chunk_tokens
+    if tokenizer.model_max_length < 100_000:   # unset limits are reported as a huge sentinel
+        budget = min(budget, tokenizer.model_max_length - tokenizer.num_special_tokens_to_add())
+    budget -= reserved_tokens
+    if budget < 1:
+        raise ValueError("The prompt leaves no room for text in the model input.")
+    return chunk_by_tokens(text, tokenizer, budget, min(settings.summary_chunk_overlap_tokens, budget - 1))
+
+
+
+def _remaining_seconds(started: float, done: int, total: int) -> float:
+    """Estimate the time of the remaining steps from the mean time of the finished ones."""
+    return (time.perf_counter() - started) / done * (total - done) if done else 0.0
+
+
+def summarize_chunks(chunks: List[str], src_lang: str = "uk", max_length: int = 30, min_length: int = 10,
+                     batch_size: Optional[int] = None, task: str = "summary",
+                     cancel: Optional[CancellationToken] = None) -> List[str]:
+    """Summarizes text chunks in batches of similar token length.
+
+    Chunks are sorted by token count and summarized `batch_size` at a time, so
+    each batch is padded only up to its own longest chunk. Results come back
+    in the order of `chunks`; `batch_size=1` is the one-chunk-per-call path.
+    Padding can change beam search scores slightly, so larger batches are
+    not guaranteed to give the same summaries; `bench_summarize` reports
+    whether they do for a given model.
+
+    Args:
+        chunks (List[str]): Texts to summarize.
+        src_lang (str): The source language code for the summarization model.
+        max_length (int): Maximum length of each summary.
+        min_length (int): Minimum length of each summary.
+        batch_size (Optional[int]): Chunks per generate call; defaults to `settings.summary_batch_size`.
+        task (str): Label of the model-call metrics.
+        cancel (Optional[CancellationToken]): Checked before every batch and inside generate.
+
+    Returns:
+        List[str]: One summary per chunk.
+
+    Raises:
+        RequestCancelled: If `cancel` was cancelled before all chunks were summarized.
+    """
+    batch_size = batch_size or settings.summary_batch_size
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+
+    summarizer = get_summarizer()
+    # Use mBART with the appropriate language code
+    forced_bos_token_id = summarizer.tokenizer.lang_code_to_id.get(f"{src_lang}_XX", None)
+
+    lengths = [len(input_ids) for input_ids in summarizer.tokenizer(chunks)["input_ids"]] if chunks else []
+    order = sorted(range(len(chunks)), key=lambda i: lengths[i])
+    summaries = [""] * len(chunks)
+    generate_kwargs = {}
+    if cancel is not None:
+        generate_kwargs["stopping_criteria"] = StoppingCriteriaList([StopOnEvent(cancel.event)])
+
+    starts = range(0, len(order), batch_size)
+    started = time.perf_counter()
+    for done, start in enumerate(starts):
+        check_cancelled(cancel, task, _remaining_seconds(started, done, len(starts)))
+        group = order[start:start + batch_size]
+        outputs = summarizer.pipeline(
+            [chunks[i] for i in group],
+            batch_size=len(group),
+            max_length=max_length,  # Dynamic length
+            min_length=min_length,   # Dynamic length
+            do_sample=False,
+            forced_bos_token_id=forced_bos_token_id,
+            **generate_kwargs
+        )
+        model_calls.inc(labels={"task": task})
+        for i, output in zip(group, outputs):
+            summaries[i] = output['summary_text']
+
+    # A batch stopped inside generate holds truncated summaries
+    check_cancelled(cancel, task)
+    return summaries
+
+
+def generate_summary(cleaned_text: str, src_lang: str = "uk", max_length: int = 30, min_length: int = 10,
+                     batch_size: Optional[int] = None,
+                     cancel: Optional[CancellationToken] = None) -> Tuple[str, List[float]]:
     """Generates a summary and its corresponding vector representation.
 
     Args:
@@ -28,6 +158,8 @@ def generate_summary(cleaned_text: str, src_lang: str = "uk", max_length: int =
         src_lang (str): The source language code for the summarization model.
         max_length (int): Maximum length of the summary for each chunk.
         min_length (int): Minimum length of the summary for each chunk.
+        batch_size (Optional[int]): Chunks summarized per model call.
+        cancel (Optional[CancellationToken]): Stops the work once the request is cancelled.
 
     Returns:
         Tuple[str, List[float]]: A tuple containing the full summary and its vector.
@@ -37,26 +169,15 @@ def generate_summary(cleaned_text: str, src_lang: str = "uk", max_length: int =
         if not cleaned_text.strip():
             raise ValueError("The input text is empty or only contains whitespace.")
 
-        # Define the maximum length for chunks
-        max_chunk_length = 1024
-
-        # Split text into manageable chunks
-        chunks = [cleaned_text[i:i + max_chunk_length] for i in range(0, len(cleaned_text), max_chunk_length)]
+        # Split text into whole-sentence chunks that fill the model's input window
+        start = time.perf_counter()
+        chunks = chunk_for_model(cleaned_text)
 
         # Generate summaries for each chunk
-        summaries = []
-        for chunk in chunks:
-            # Use mBART with the appropriate language code
-            forced_bos_token_id = tokenizer.lang_code_to_id.get(f"{src_lang}_XX", None)
-
-            summarized_chunk = summarizer(
-                chunk,
-                max_length=max_length,  # Dynamic length
-                min_length=min_length,   # Dynamic length
-                do_sample=False,
-                forced_bos_token_id=forced_bos_token_id
-            )[0]['summary_text']
-            summaries.append(summarized_chunk)
+        summaries = summarize_chunks(chunks, src_lang=src_lang, max_length=max_length, min_length=min_length,
+                                     batch_size=batch_size, cancel=cancel)
+        document_chunks.observe(len(chunks), labels={"task": "summary"})
+        document_seconds.observe(time.perf_counter() - start, labels={"task": "summary"})
 
         # Combine all summaries into one
         full_summary = " ".join(summaries)
@@ -65,6 +186,124 @@ def generate_summary(cleaned_text: str, src_lang: str = "uk", max_length: int =
 
         return full_summary
 
+    except RequestCancelled:
+        raise
+    except Exception as e:
+        raise ValueError(f"Failed to generate summary: {e}")
+
+
+_map_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_map_executor() -> Optional[ProcessPoolExecutor]:
+    """Process pool of the map stage, created on first use; None runs the map stage in-process."""
+    global _map_executor
+    if settings.summary_map_workers < 2:
+        return None
+    if _map_executor is None:
+        # Spawned workers load their own copy of the model through the registry
+        _map_executor = ProcessPoolExecutor(settings.summary_map_workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _map_executor
+
+
+def shutdown_map_executor() -> None:
+    global _map_executor
+    if _map_executor is not None:
+        _map_executor.shutdown(wait=False, cancel_futures=True)
+        _map_executor = None
+
+
+# Shortest reduce-stage summaries tried before giving up on fitting one window
+MIN_REDUCE_LENGTH = 16
+
+
+def _summarize_parallel(chunks: List[str], src_lang: str, max_length: int, min_length: int,
+                        batch_size: Optional[int], cancel: Optional[CancellationToken] = None) -> List[str]:
+    """Summarizes chunks across the map-stage process pool, one contiguous slice per worker.
+
+    Worker processes cannot see the cancellation token, so with a pool it is
+    only checked before the slices are submitted.
+    """
+    executor = _get_map_executor()
+    if executor is None or len(chunks) < 2:
+        return summarize_chunks(chunks, src_lang=src_lang, max_length=max_length, min_length=min_length,
+                                batch_size=batch_size, task="summary_map", cancel=cancel)
+
+    check_cancelled(cancel, "summary_map")
+
+    slice_size = -(-len(chunks) // settings.summary_map_workers)
+    futures = [
+        executor.submit(summarize_chunks, chunks[start:start + slice_size], src_lang=src_lang,
+                        max_length=max_length, min_length=min_length, batch_size=batch_size, task="summary_map")
+        for start in range(0, len(chunks), slice_size)
+    ]
+    return [summary for future in futures for summary in future.result()]
+
+
+def generate_summary_hierarchical(cleaned_text: str, src_lang: str = "uk", max_length: int = 100,
+                                  min_length: int = 30, batch_size: Optional[int] = None,
+                                  cancel: Optional[CancellationToken] = None) -> str:
+    """Summarizes a document of any length into one summary with map-reduce.
+
+    The map stage summarizes every chunk, in parallel across
+    `settings.summary_map_workers` processes. Each reduce stage packs the
+    partial summaries into groups that fit one model window and summarizes
+    every group, until all partial summaries fit one window; that text is
+    summarized once more, so the result is bounded by `max_length` tokens
+    whatever the input size. A reduce round that does not shrink the number
+    of groups is repeated with half the `max_length`, down to
+    `MIN_REDUCE_LENGTH`; if even that does not help, neighbouring summaries
+    are merged pairwise, each pair cut to one window, so every later round
+    halves the groups and the last step is still a single summary.
+
+    Args:
+        cleaned_text (str): The input full text to summarize.
+        src_lang (str): The source language code for the summarization model.
+        max_length (int): Maximum length of every summary, including the final one.
+        min_length (int): Minimum length of every summary.
+        batch_size (Optional[int]): Chunks summarized per model call.
+        cancel (Optional[CancellationToken]): Stops the work once the request is cancelled.
+
+    Returns:
+        str: The summary.
+    """
+    try:
+        if not cleaned_text.strip():
+            raise ValueError("The input text is empty or only contains whitespace.")
+
+        start = time.perf_counter()
+        chunks = chunk_for_model(cleaned_text)
+        document_chunks.observe(len(chunks), labels={"task": "summary_hierarchical"})
+        summaries = _summarize_parallel(chunks, src_lang, max_length, min_length, batch_size, cancel) \
+            if len(chunks) > 1 else chunks
+
+        groups = chunk_for_model(" ".join(summaries))
+        reduce_max_length, reduce_min_length = max_length, min_length
+        while len(groups) > 1:
+            reduced = _summarize_parallel(groups, src_lang, reduce_max_length, reduce_min_length, batch_size, cancel)
+            next_groups = chunk_for_model(" ".join(reduced))
+            if len(next_groups) < len(groups):
+                groups = next_groups
+            elif reduce_max_length > MIN_REDUCE_LENGTH:
+                # Summaries no longer shrink (max_length close to the window): reduce again, shorter
+                reduce_max_length = max(reduce_max_length // 2, MIN_REDUCE_LENGTH)
+                reduce_min_length = min(reduce_min_length, reduce_max_length // 2)
+                logging.warning(f"Hierarchical summary stuck at {len(groups)} groups, "
+                                f"reducing with max_length={reduce_max_length}")
+            else:
+                # Even the shortest summaries do not shrink: merge neighbours pairwise, cutting a pair
+                # that overflows one window, so the groups halve every round until one is left
+                logging.warning(f"Hierarchical summary stuck at {len(groups)} groups, merging them pairwise")
+                groups = [chunk_for_model(" ".join(reduced[i:i + 2]))[0] for i in range(0, len(reduced), 2)]
+
+        full_summary = summarize_chunks(groups, src_lang=src_lang, max_length=max_length, min_length=min_length,
+                                        task="summary_reduce", cancel=cancel)[0]
+        document_seconds.observe(time.perf_counter() - start, labels={"task": "summary_hierarchical"})
+        return post_process_summary(full_summary)
+
+    except RequestCancelled:
+        raise
     except Exception as e:
         raise ValueError(f"Failed to generate summary: {e}")
 
@@ -89,68 +328,230 @@ def clean_text(text: str, lang: str = "en") -> str:
     Returns:
         str: The cleaned text.
     """
-    # Convert text to lowercase
-    text = text.lower()
+    # Stop words, punctuation table and tokenizer are built once per language
+    return get_text_cleaner(lang).clean(text)
 
-    # Remove punctuation
-    text = re.sub(f"[{re.escape(string.punctuation)}]", "", text)
 
-    # Tokenize the text
-    words = word_tokenize(text)
+# Named decoding settings for answers, from cheapest to best; "quality" is the original beam search
+GENERATION_PROFILES: Dict[str, dict] = {
+    "fast": {"max_length": 64, "num_beams": 1, "repetition_penalty": 1.3},
+    "balanced": {"max_length": 100, "num_beams": 2, "repetition_penalty": 2.0},
+    "quality": {"max_length": 150, "num_beams": 4, "repetition_penalty": 2.0},
+}
 
-    # Remove stop words
-    if lang in stopwords.fileids():
-        stop_words = set(stopwords.words(lang))
-    else:
-        stop_words = set()  # Default to empty set if language not supported
 
-    cleaned_text = " ".join(word for word in words if word not in stop_words)
+NO_CONTEXT_ANSWER = "No relevant context found to answer the question."
 
-    return cleaned_text
 
+def _resolve_profile(profile: Optional[str]) -> str:
+    profile = profile or settings.answer_profile
+    if profile not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile: {profile}")
+    return profile
 
-def generate_answer_based_on_context(question: str, context_text: str) -> str:
+
+def _answer_input_ids(summarizer: Summarizer, question: str, context_text: str) -> torch.Tensor:
+    """Tokenize the question with as many whole context sentences as fit next to it."""
+    prompt = f"question: {question} context: "
+    reserved_tokens = len(summarizer.tokenizer(prompt, add_special_tokens=False)["input_ids"])
+    context_chunks = chunk_for_model(context_text, reserved_tokens=reserved_tokens)
+
+    # Combine question and context
+    input_text = f"{prompt}{context_chunks[0] if context_chunks else context_text}"
+    return summarizer.tokenizer.encode(input_text, return_tensors="pt", max_length=1024, truncation=True)
+
+
+def generate_answer(question: str, context_text: str, profile: Optional[str] = None,
+                    deadline: Optional[float] = None, cancel: Optional[CancellationToken] = None) -> Tuple[str, bool]:
     """
-    Generate an answer based on the provided context with post-processing.
+    Generate an answer with a named decoding profile and an optional time budget.
 
     Args:
         question (str): The question to be answered.
         context_text (str): The concatenated context string.
+        profile (Optional[str]): "fast", "balanced" or "quality"; defaults to `settings.answer_profile`.
+        deadline (Optional[float]): Absolute `time.time()` by which decoding must stop; the best
+            partial sequence so far is then returned. Time spent queued for a worker counts.
+        cancel (Optional[CancellationToken]): Stops decoding once the request is cancelled.
 
     Returns:
-        str: Generated answer.
+        Tuple[str, bool]: The answer and whether decoding was cut short by the deadline.
+
+    Raises:
+        RequestCancelled: If `cancel` was cancelled before the answer was complete.
     """
+    profile = _resolve_profile(profile)
+
     # Check if context_text is provided
     if not context_text:
-        return "No relevant context found to answer the question."
+        return NO_CONTEXT_ANSWER, False
 
     try:
-        # Combine question and context
-        input_text = f"question: {question} context: {context_text}"
-
-        # Tokenize input
-        inputs = tokenizer.encode(input_text, return_tensors="pt", max_length=1024, truncation=True)
+        check_cancelled(cancel, "answer")
+        start = time.perf_counter()
+        summarizer = get_summarizer()
+        inputs = _answer_input_ids(summarizer, question, context_text)
+
+        stopping_criteria = StoppingCriteriaList()
+        deadline_stop = StopAtDeadline(deadline) if deadline is not None else None
+        if deadline_stop is not None:
+            stopping_criteria.append(deadline_stop)
+        if cancel is not None:
+            stopping_criteria.append(StopOnEvent(cancel.event))
 
         # Generate the answer with constraints
-        outputs = model.generate(
+        generation_start = time.perf_counter()
+        outputs = summarizer.model.generate(
             inputs,
-            max_length=150,
             num_return_sequences=1,
-            repetition_penalty=2.0,  # Reduce redundancy
-            num_beams=4              # Improve diversity
+            stopping_criteria=stopping_criteria,
+            **GENERATION_PROFILES[profile]
         )
+        # Beam search checks the criteria only while beams are unfinished; greedy decoding also on
+        # the step that produced EOS, which then finished on its own
+        eos_token_ids = summarizer.model.generation_config.eos_token_id
+        eos_token_ids = eos_token_ids if isinstance(eos_token_ids, list) else [eos_token_ids]
+        partial = deadline_stop is not None and deadline_stop.fired and not (
+            GENERATION_PROFILES[profile]["num_beams"] == 1 and outputs[0, -1].item() in eos_token_ids)
+        if cancel is not None and cancel.cancelled:
+            steps = outputs.shape[1]
+            max_steps = GENERATION_PROFILES[profile]["max_length"]
+            cancel.check("answer", _remaining_seconds(generation_start, steps, max(max_steps, steps)))
+
+        model_calls.inc(labels={"task": "answer"})
+        document_seconds.observe(time.perf_counter() - start, labels={"task": "answer"})
+        answer_seconds.observe(time.perf_counter() - start, labels={"profile": profile})
 
         # Decode the output to get the answer in text form
-        answer = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        answer = summarizer.tokenizer.decode(outputs[0], skip_special_tokens=True)
 
         # Post-process answer: remove boilerplate and irrelevant sentences
-        processed_answer = post_process_answer(answer)
-
-        return processed_answer
+        return post_process_answer(answer), partial
 
+    except RequestCancelled:
+        raise
     except Exception as e:
         raise ValueError(f"Failed to generate answer: {e}")
 
+
+def generate_answer_based_on_context(question: str, context_text: str, profile: Optional[str] = None) -> str:
+    """
+    Generate an answer based on the provided context with post-processing.
+
+    Args:
+        question (str): The question to be answered.
+        context_text (str): The concatenated context string.
+        profile (Optional[str]): Generation profile; defaults to `settings.answer_profile`.
+
+    Returns:
+        str: Generated answer.
+    """
+    answer, _ = generate_answer(question, context_text, profile=profile)
+    return answer
+
+
+class StopOnEvent(StoppingCriteria):
+    """Stops generation as soon as the given event is set, e.g. when the client went away."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+class StopAtDeadline(StoppingCriteria):
+    """Stops generation at an absolute `time.time()` deadline and remembers whether it did."""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.fired = False
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if time.time() >= self.deadline:
+            self.fired = True
+        return torch.full((input_ids.shape[0],), self.fired, dtype=torch.bool, device=input_ids.device)
+
+
+class AsyncTextIteratorStreamer(TextIteratorStreamer):
+    """
+    Text iterator streamer consumed with `async for` on the event loop.
+
+    Generation runs on a worker thread; decoded pieces are handed to the
+    loop thread-safely, so waiting for the next piece never blocks it.
+    """
+
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.loop = loop
+        self.text_queue = asyncio.Queue()
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        self.loop.call_soon_threadsafe(self.text_queue.put_nowait, text)
+        if stream_end:
+            self.loop.call_soon_threadsafe(self.text_queue.put_nowait, self.stop_signal)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        value = await self.text_queue.get()
+        if value is self.stop_signal:
+            raise StopAsyncIteration
+        return value
+
+
+def stream_answer(question: str, context_text: str, streamer: AsyncTextIteratorStreamer, cancel: CancellationToken,
+                  profile: Optional[str] = None) -> str:
+    """
+    Generate an answer while pushing its tokens to a streamer.
+
+    Streamers only support greedy decoding, so the profile's beams are dropped
+    and only its length and repetition settings apply. Generation stops early
+    once `cancel` is cancelled. The streamer is always ended, also on errors.
+
+    Args:
+        question (str): The question to be answered.
+        context_text (str): The concatenated context string.
+        streamer (AsyncTextIteratorStreamer): Receives the decoded answer pieces.
+        cancel (CancellationToken): Cancelled when the client goes away.
+        profile (Optional[str]): Generation profile; defaults to `settings.answer_profile`.
+
+    Returns:
+        str: The post-processed full answer.
+    """
+    try:
+        cancel.check("answer_stream")
+        profile = _resolve_profile(profile)
+        if not context_text:
+            streamer.on_finalized_text(NO_CONTEXT_ANSWER, stream_end=True)
+            return NO_CONTEXT_ANSWER
+
+        start = time.perf_counter()
+        summarizer = get_summarizer()
+        inputs = _answer_input_ids(summarizer, question, context_text)
+        outputs = summarizer.model.generate(
+            inputs,
+            num_return_sequences=1,
+            streamer=streamer,
+            stopping_criteria=StoppingCriteriaList([StopOnEvent(cancel.event)]),
+            **dict(GENERATION_PROFILES[profile], num_beams=1)
+        )
+    except Exception:
+        streamer.end()
+        raise
+
+    if cancel.cancelled:
+        steps = outputs.shape[1]
+        max_steps = GENERATION_PROFILES[profile]["max_length"]
+        cancel.record("answer_stream", _remaining_seconds(start, steps, max(max_steps, steps)))
+
+    model_calls.inc(labels={"task": "answer"})
+    document_seconds.observe(time.perf_counter() - start, labels={"task": "answer"})
+    answer_seconds.observe(time.perf_counter() - start, labels={"profile": profile})
+    return post_process_answer(summarizer.tokenizer.decode(outputs[0], skip_special_tokens=True))
+
+
 def post_process_answer(answer: str) -> str:
     """
     Refine the generated answer by removing irrelevant parts.
@@ -180,30 +581,23 @@ def is_informative(sentence: str) -> bool:
     return not any(phrase in sentence for phrase in filler_phrases)
 
 
-def generate_summary_with_keywords(cleaned_text: str, keywords: List[str], max_length: int = 100, min_length: int = 30) -> str:
+def generate_summary_with_keywords(cleaned_text: str, keywords: List[str], max_length: int = 100, min_length: int = 30,
+                                   batch_size: Optional[int] = None, cancel: Optional[CancellationToken] = None) -> str:
     """
     Generates summaries for each text chunk, emphasizing important keywords.
     """
-    max_chunk_length = 1024
-    chunks = [cleaned_text[i:i + max_chunk_length] for i in range(0, len(cleaned_text), max_chunk_length)]
-
-    summaries = []
-    for chunk in chunks:
-        # Include keywords to guide the summarization process
-        keyword_str = " ".join(keywords)
-        prompt = f"{chunk} Keywords: {keyword_str}"
-
-        # Use mBART to summarize with forced language token
-        forced_bos_token_id = tokenizer.lang_code_to_id.get(f"uk_XX", None)
-        summarized_chunk = summarizer(
-            prompt,
-            max_length=max_length,
-            min_length=min_length,
-            do_sample=False,
-            forced_bos_token_id=forced_bos_token_id
-        )[0]['summary_text']
-
-        summaries.append(summarized_chunk)
+    # Include keywords to guide the summarization process
+    start = time.perf_counter()
+    keyword_suffix = f" Keywords: {' '.join(keywords)}"
+    reserved_tokens = len(get_summarizer().tokenizer(keyword_suffix, add_special_tokens=False)["input_ids"])
+    chunks = chunk_for_model(cleaned_text, reserved_tokens=reserved_tokens)
+    prompts = [f"{chunk}{keyword_suffix}" for chunk in chunks]
+
+    # Use mBART to summarize with forced language token
+    summaries = summarize_chunks(prompts, src_lang="uk", max_length=max_length, min_length=min_length,
+                                 batch_size=batch_size, task="summary_with_keywords", cancel=cancel)
+    document_chunks.observe(len(chunks), labels={"task": "summary_with_keywords"})
+    document_seconds.observe(time.perf_counter() - start, labels={"task": "summary_with_keywords"})
 
     # Combine the summaries into one
     full_summary = " ".join(summaries)
@@ -0,0 +1,70 @@
+from typing import List
+
+from nltk.tokenize import sent_tokenize
+
+from src.services.resources import use_staged_nltk_data
+
+use_staged_nltk_data()
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, dropping empty ones."""
+    return [sentence.strip() for sentence in sent_tokenize(text) if sentence.strip()]
+
+
+def chunk_by_tokens(text: str, tokenizer, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most `max_tokens` model tokens.
+
+    Token counts come from the model's own tokenizer, without special tokens,
+    so callers should leave room for those (and for any prompt around the
+    chunk) in `max_tokens`. A sentence longer than the budget on its own is
+    cut into token windows. With `overlap_tokens`, each chunk starts with the
+    trailing sentences of the previous one that fit in that many tokens.
+
+    Args:
+        text (str): The text to split.
+        tokenizer: Hugging Face tokenizer of the model that will read the chunks.
+        max_tokens (int): Token budget per chunk.
+        overlap_tokens (int): Token budget of the sentences repeated from the previous chunk.
+
+    Returns:
+        List[str]: The chunks, in text order.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be a positive integer.")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be non-negative and smaller than max_tokens.")
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    pieces, lengths = [], []
+    for sentence, input_ids in zip(sentences, tokenizer(sentences, add_special_tokens=False)["input_ids"]):
+        if len(input_ids) <= max_tokens:
+            pieces.append(sentence)
+            lengths.append(len(input_ids))
+            continue
+        for start in range(0, len(input_ids), max_tokens):
+            window = input_ids[start:start + max_tokens]
+            pieces.append(tokenizer.decode(window, skip_special_tokens=True).strip())
+            lengths.append(len(window))
+
+    chunks = []
+    current: List[int] = []   # indices into `pieces`
+    current_tokens = 0
+    for i, length in enumerate(lengths):
+        if current and current_tokens + length > max_tokens:
+            chunks.append(" ".join(pieces[j] for j in current))
+            carried, carried_tokens = [], 0
+            for j in reversed(current):
+                if carried_tokens + lengths[j] > overlap_tokens or carried_tokens + lengths[j] + length > max_tokens:
+                    break
+                carried.insert(0, j)
+                carried_tokens += lengths[j]
+            current, current_tokens = carried, carried_tokens
+        current.append(i)
+        current_tokens += length
+    chunks.append(" ".join(pieces[j] for j in current))
+    return chunks
@@ -0,0 +1,80 @@
+import re
+import string
+import threading
+from typing import Dict, FrozenSet, Iterable, List
+
+from nltk.corpus import stopwords
+
+from src.services.resources import use_staged_nltk_data
+
+use_staged_nltk_data()
+
+# ASCII punctuation; a regex deletes runs of it much faster than `str.translate` on non-ASCII text
+PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]+")
+
+# Once ASCII punctuation is gone, the only rules of NLTK's word tokenizer that can still fire
+# split off Unicode quotes and dashes and split the cannot/gimme/gonna/gotta/lemme/wanna
+# contractions; these two passes reproduce them.
+QUOTES_AND_DASHES = re.compile("([«“‘„»”’\u2012-\u2015])")
+# The lookaheads on the first letter only let the scan skip ahead faster
+CONTRACTIONS = re.compile(r"(?i)\b(?=[cglw])(?:(can)(not)|(gim)(me)|(gon)(na)|(got)(ta)|(lem)(me))\b"
+                          r"|\b(?=w)(wan)(na)(?=\s)")
+
+
+def _split_contraction(match: re.Match) -> str:
+    return " " + " ".join(part for part in match.groups() if part is not None) + " "
+
+
+class TextCleaner:
+    """
+    Lowercases text, drops ASCII punctuation and stop words of one language.
+
+    The output is identical to `nltk.word_tokenize` over the punctuation-free
+    text, joined with single spaces after stop word removal, at the cost of
+    two regex passes and a whitespace split. Build one per language with
+    `get_text_cleaner`; instances are immutable and thread-safe.
+    """
+
+    def __init__(self, lang: str = "en"):
+        self.lang = lang
+        # NLTK names stop word lists by language ("english"); other codes get no stop words
+        self.stop_words: FrozenSet[str] = frozenset(stopwords.words(lang)) if lang in stopwords.fileids() \
+            else frozenset()
+
+    def tokenize(self, text: str) -> List[str]:
+        """Lowercase, strip ASCII punctuation and split into `word_tokenize` tokens."""
+        text = QUOTES_AND_DASHES.sub(r" \1 ", PUNCTUATION.sub("", text.lower()))
+        # Padded like NLTK does, so "wanna" at the very end is followed by whitespace
+        return CONTRACTIONS.sub(_split_contraction, f" {text} ").split()
+
+    def clean(self, text: str) -> str:
+        """
+        Clean one text.
+
+        Args:
+            text (str): The text to clean.
+
+        Returns:
+            str: The cleaned text.
+        """
+        stop_words = self.stop_words
+        return " ".join(token for token in self.tokenize(text) if token not in stop_words)
+
+    def clean_many(self, texts: Iterable[str]) -> List[str]:
+        """Clean a batch of texts, in order."""
+        return [self.clean(text) for text in texts]
+
+
+_cleaners: Dict[str, TextCleaner] = {}
+_cleaners_lock = threading.Lock()
+
+
+def get_text_cleaner(lang: str = "en") -> TextCleaner:
+    """Return the cleaner of a language, building it on first use."""
+    cleaner = _cleaners.get(lang)
+    if cleaner is None:
+        with _cleaners_lock:
+            cleaner = _cleaners.get(lang)
+            if cleaner is None:
+                cleaner = _cleaners[lang] = TextCleaner(lang)
+    return cleaner
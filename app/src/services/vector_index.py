@@ -0,0 +1,754 @@
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.conf.config import settings
+from src.entity.models import EMBEDDING_DIM
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row; all-zero rows are left as zeros."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first.
+
+    Uses `argpartition` so only the selected `k` elements are sorted.
+
+    Args:
+        scores (np.ndarray): 1-D array of scores.
+        k (Optional[int]): Number of results; None ranks everything.
+
+    Returns:
+        np.ndarray: Indices into `scores`.
+    """
+    if k is None or k >= scores.shape[0]:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(scores, -k)[-k:]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex(ABC):
+    """
+    Interface of a cosine-similarity index over document vectors.
+
+    Implementations are thread-safe and keep one vector per `document_id`.
+    """
+
+    loaded: bool = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def load(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        """Replace the whole index with `(document_id, vector)` pairs."""
+
+    @abstractmethod
+    def upsert(self, document_id: int, vector: np.ndarray) -> None:
+        """Insert or replace the vector of one document."""
+
+    @abstractmethod
+    def remove(self, document_id: int) -> None:
+        """Remove a document; unknown IDs are ignored."""
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: Optional[int] = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k documents by cosine similarity.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Document IDs and scores, best first.
+        """
+
+
+class ExactIndex(VectorIndex):
+    """
+    Resident corpus embedding matrix for brute-force cosine search.
+
+    Rows are L2-normalized on insert, so scoring a query is one matrix-vector
+    product. `document_id` values are kept in a parallel array; deletes move
+    the last row into the freed slot, so the matrix never has holes.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, initial_capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, document_id: int) -> bool:
+        return document_id in self._row_of
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._size * (self.dim * self._matrix.itemsize + self._ids.itemsize)
+
+    def load(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        """Replace the whole index with `(document_id, vector)` pairs."""
+        items = list(items)
+        capacity = max(len(items), 1)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        row_of = {}
+        for document_id, vector in items:
+            row = row_of.setdefault(document_id, len(row_of))
+            matrix[row] = vector
+            ids[row] = document_id
+        size = len(row_of)
+        matrix[:size] = normalize_rows(matrix[:size])
+
+        with self._lock:
+            self._matrix, self._ids, self._row_of, self._size = matrix, ids, row_of, size
+            self.loaded = True
+
+    def upsert(self, document_id: int, vector: np.ndarray) -> None:
+        """Insert or replace the vector of one document."""
+        vector = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            row = self._row_of.get(document_id)
+            if row is None:
+                if self._size == self._matrix.shape[0]:
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._row_of[document_id] = row
+                self._ids[row] = document_id
+            self._matrix[row] = vector
+
+    def remove(self, document_id: int) -> None:
+        """Remove a document; unknown IDs are ignored."""
+        with self._lock:
+            row = self._row_of.pop(document_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._row_of[int(self._ids[row])] = row
+            self._size = last
+
+    def scores(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine similarity of the query against every indexed document.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Document IDs and their scores, in index order.
+        """
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            return self._ids[:self._size].copy(), self._matrix[:self._size] @ query
+
+    def search(self, query: np.ndarray, k: Optional[int] = 10) -> Tuple[np.ndarray, np.ndarray]:
+        ids, scores = self.scores(query)
+        top = top_k_indices(scores, k)
+        return ids[top], scores[top]
+
+    def score_ids(self, query: np.ndarray, document_ids: Iterable[int]) -> np.ndarray:
+        """Cosine similarity of the query against the given documents; unknown IDs score 0."""
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        document_ids = list(document_ids)
+        with self._lock:
+            rows = np.array([self._row_of.get(document_id, -1) for document_id in document_ids], dtype=np.int64)
+            known = rows >= 0
+            scores = np.zeros(len(document_ids), dtype=np.float32)
+            scores[known] = self._matrix[rows[known]] @ query
+        return scores
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the document IDs and their normalized vectors."""
+        with self._lock:
+            return self._ids[:self._size].copy(), self._matrix[:self._size].copy()
+
+    def _grow(self) -> None:
+        capacity = self._matrix.shape[0] * 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+
+class HNSWIndex(VectorIndex):
+    """
+    Hierarchical navigable small world graph, backed by `hnswlib`.
+
+    `ef_search` trades recall for latency at query time; `m` and
+    `ef_construction` control graph quality at build time. Deletes only mark
+    nodes, so the graph should be rebuilt after heavy churn.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, m: int = 16, ef_construction: int = 200, ef_search: int = 64,
+                 initial_capacity: int = 1024):
+        try:
+            import hnswlib
+        except ImportError:
+            raise RuntimeError("VECTOR_INDEX=hnsw requires the 'hnswlib' package.")
+
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._hnswlib = hnswlib
+        self._ids: set = set()
+        self._deleted: set = set()
+        self._lock = threading.RLock()
+        self._index = self._new_index(initial_capacity)
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _new_index(self, capacity: int):
+        index = self._hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=max(capacity, 1), M=self.m, ef_construction=self.ef_construction)
+        index.set_ef(self.ef_search)
+        return index
+
+    def load(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        items = dict(items)
+        index = self._new_index(len(items))
+        if items:
+            ids = np.fromiter(items.keys(), dtype=np.int64, count=len(items))
+            index.add_items(normalize_rows(np.stack(list(items.values()))), ids)
+        with self._lock:
+            self._index, self._ids, self._deleted = index, set(items), set()
+            self.loaded = True
+
+    def upsert(self, document_id: int, vector: np.ndarray) -> None:
+        vector = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))
+        with self._lock:
+            if document_id in self._deleted:
+                self._index.unmark_deleted(document_id)
+                self._deleted.discard(document_id)
+            elif document_id not in self._ids and self._index.get_current_count() >= self._index.get_max_elements():
+                self._index.resize_index(self._index.get_max_elements() * 2)
+            self._index.add_items(vector, np.array([document_id], dtype=np.int64))
+            self._ids.add(document_id)
+
+    def remove(self, document_id: int) -> None:
+        with self._lock:
+            if document_id in self._ids:
+                self._index.mark_deleted(document_id)
+                self._ids.discard(document_id)
+                self._deleted.add(document_id)
+
+    def search(self, query: np.ndarray, k: Optional[int] = 10) -> Tuple[np.ndarray, np.ndarray]:
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, self.dim))
+        with self._lock:
+            k = len(self._ids) if k is None else min(k, len(self._ids))
+            if k == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            self._index.set_ef(max(self.ef_search, k))
+            labels, distances = self._index.knn_query(query, k=k)
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: vectors are bucketed by their nearest k-means
+    centroid and only the `nprobe` closest buckets are scanned per query.
+
+    Each bucket is a small `ExactIndex`, so inserts and deletes stay cheap;
+    centroids are only retrained by `load` (or a rebuild).
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, nlist: int = 256, nprobe: int = 8, train_iterations: int = 10,
+                 seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self._centroids = np.zeros((0, dim), dtype=np.float32)
+        self._lists: List[ExactIndex] = []
+        self._list_of: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means over normalized vectors."""
+        rng = np.random.default_rng(self.seed)
+        nlist = min(self.nlist, vectors.shape[0])
+        centroids = vectors[rng.choice(vectors.shape[0], nlist, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            empty = ~np.any(sums, axis=1)
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+        return centroids
+
+    def load(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        items = dict(items)
+        ids = np.fromiter(items.keys(), dtype=np.int64, count=len(items))
+        vectors = normalize_rows(np.stack(list(items.values()))) if items else np.zeros((0, self.dim), np.float32)
+        centroids = self._train(vectors) if items else np.zeros((0, self.dim), dtype=np.float32)
+
+        lists = [ExactIndex(self.dim, initial_capacity=16) for _ in range(centroids.shape[0])]
+        list_of = {}
+        if items:
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for list_no, index in enumerate(lists):
+                members = np.flatnonzero(assignment == list_no)
+                index.load(zip(ids[members].tolist(), vectors[members]))
+            list_of = dict(zip(ids.tolist(), assignment.tolist()))
+
+        with self._lock:
+            self._centroids, self._lists, self._list_of = centroids, lists, list_of
+            self.loaded = True
+
+    def upsert(self, document_id: int, vector: np.ndarray) -> None:
+        vector = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))[0]
+        with self._lock:
+            if self._centroids.shape[0] == 0:
+                self._centroids = vector.reshape(1, self.dim).copy()
+                self._lists = [ExactIndex(self.dim, initial_capacity=16)]
+            list_no = int(np.argmax(self._centroids @ vector))
+            previous = self._list_of.get(document_id)
+            if previous is not None and previous != list_no:
+                self._lists[previous].remove(document_id)
+            self._lists[list_no].upsert(document_id, vector)
+            self._list_of[document_id] = list_no
+
+    def remove(self, document_id: int) -> None:
+        with self._lock:
+            list_no = self._list_of.pop(document_id, None)
+            if list_no is not None:
+                self._lists[list_no].remove(document_id)
+
+    def search(self, query: np.ndarray, k: Optional[int] = 10) -> Tuple[np.ndarray, np.ndarray]:
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            if self._centroids.shape[0] == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            probes = top_k_indices(self._centroids @ query, self.nprobe)
+            results = [self._lists[list_no].scores(query) for list_no in probes]
+        ids = np.concatenate([ids for ids, _ in results])
+        scores = np.concatenate([scores for _, scores in results])
+        top = top_k_indices(scores, k)
+        return ids[top], scores[top]
+
+
+class FullPrecisionStore:
+    """
+    Append-only float32 vectors on disk, memory-mapped and read on demand.
+
+    Replacing a vector appends a new row; `reset` truncates the file, so
+    space from replaced rows is reclaimed whenever the index is reloaded.
+    Every store writes its own file next to `path`, tagged with the process
+    ID and a random suffix, so workers, benchmarks and an index being rebuilt
+    never overwrite the file of a live index. The file is removed when the
+    store is garbage-collected or the process exits.
+    """
+
+    def __init__(self, path: str, dim: int = EMBEDDING_DIM):
+        root, extension = os.path.splitext(path)
+        self.path = f"{root}.{os.getpid()}-{uuid.uuid4().hex[:8]}{extension}"
+        self.dim = dim
+        self._row_of: Dict[int, int] = {}
+        self._rows = 0
+        self._memmap: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._finalizer = weakref.finalize(self, FullPrecisionStore._remove_file, self.path)
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def reset(self) -> None:
+        with self._lock:
+            open(self.path, "wb").close()
+            self._row_of, self._rows, self._memmap = {}, 0, None
+
+    def put_many(self, document_ids: List[int], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            with open(self.path, "ab") as store_file:
+                store_file.write(vectors.tobytes())
+            for offset, document_id in enumerate(document_ids):
+                self._row_of[document_id] = self._rows + offset
+            self._rows += len(document_ids)
+
+    def get_many(self, document_ids: Iterable[int]) -> np.ndarray:
+        """Vectors of the given documents; unknown IDs come back as zero rows."""
+        document_ids = list(document_ids)
+        with self._lock:
+            rows = np.array([self._row_of.get(document_id, -1) for document_id in document_ids], dtype=np.int64)
+            if self._memmap is None or self._memmap.shape[0] < self._rows:
+                self._memmap = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._rows, self.dim)) \
+                    if self._rows else None
+            vectors = np.zeros((len(document_ids), self.dim), dtype=np.float32)
+            known = rows >= 0
+            if self._memmap is not None and known.any():
+                vectors[known] = self._memmap[rows[known]]
+        return vectors
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Brute-force search over int8 or float16 codes with exact re-ranking.
+
+    int8 codes use one scale per vector (max |x| / 127). Codes are scored in
+    blocks converted to float32, so every block is a BLAS matrix-vector
+    product; the best `rerank_factor * k` candidates are then re-scored
+    against full-precision vectors read lazily from a `FullPrecisionStore`.
+    """
+
+    def __init__(self, store_path: str, dim: int = EMBEDDING_DIM, precision: str = "int8",
+                 rerank_factor: int = 10, block_rows: int = 8192, initial_capacity: int = 1024):
+        if precision not in ("int8", "float16"):
+            raise ValueError(f"Unknown vector precision: {precision}")
+        self.dim = dim
+        self.precision = precision
+        self.rerank_factor = rerank_factor
+        self.block_rows = block_rows
+        self._code_dtype = np.int8 if precision == "int8" else np.float16
+        self._codes = np.zeros((initial_capacity, dim), dtype=self._code_dtype)
+        self._scales = np.ones(initial_capacity, dtype=np.float32)
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        self._store = FullPrecisionStore(store_path, dim)
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._size * (self.dim * self._codes.itemsize + self._scales.itemsize + self._ids.itemsize)
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.precision == "float16":
+            return vectors.astype(np.float16), np.ones(vectors.shape[0], dtype=np.float32)
+        max_abs = np.abs(vectors).max(axis=1)
+        scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+
+    def load(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        items = dict(items)
+        ids = np.fromiter(items.keys(), dtype=np.int64, count=len(items))
+        vectors = normalize_rows(np.stack(list(items.values()))) if items else np.zeros((0, self.dim), np.float32)
+        codes, scales = self._encode(vectors)
+        capacity = max(len(items), 1)
+
+        with self._lock:
+            self._codes = np.zeros((capacity, self.dim), dtype=self._code_dtype)
+            self._scales = np.ones(capacity, dtype=np.float32)
+            self._ids = np.zeros(capacity, dtype=np.int64)
+            self._codes[:len(items)], self._scales[:len(items)], self._ids[:len(items)] = codes, scales, ids
+            self._size = len(items)
+            self._row_of = {document_id: row for row, document_id in enumerate(ids.tolist())}
+            self._store.reset()
+            self._store.put_many(ids.tolist(), vectors)
+            self.loaded = True
+
+    def upsert(self, document_id: int, vector: np.ndarray) -> None:
+        vector = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))
+        codes, scales = self._encode(vector)
+        with self._lock:
+            row = self._row_of.get(document_id)
+            if row is None:
+                if self._size == self._codes.shape[0]:
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._row_of[document_id] = row
+                self._ids[row] = document_id
+            self._codes[row], self._scales[row] = codes[0], scales[0]
+            self._store.put_many([document_id], vector)
+
+    def remove(self, document_id: int) -> None:
+        with self._lock:
+            row = self._row_of.pop(document_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                self._codes[row], self._scales[row], self._ids[row] = self._codes[last], self._scales[last], self._ids[last]
+                self._row_of[int(self._ids[row])] = row
+            self._size = last
+
+    def approximate_scores(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores of every document computed from the quantized codes."""
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            scores = np.empty(self._size, dtype=np.float32)
+            for start in range(0, self._size, self.block_rows):
+                end = min(start + self.block_rows, self._size)
+                scores[start:end] = self._codes[start:end].astype(np.float32) @ query
+            scores *= self._scales[:self._size]
+            return self._ids[:self._size].copy(), scores
+
+    def search(self, query: np.ndarray, k: Optional[int] = 10) -> Tuple[np.ndarray, np.ndarray]:
+        ids, scores = self.approximate_scores(query)
+        shortlist = top_k_indices(scores, None if k is None else k * self.rerank_factor)
+        candidate_ids = ids[shortlist]
+        exact_scores = self.score_ids(query, candidate_ids.tolist())
+        top = top_k_indices(exact_scores, k)
+        return candidate_ids[top], exact_scores[top]
+
+    def score_ids(self, query: np.ndarray, document_ids: Iterable[int]) -> np.ndarray:
+        """Full-precision cosine similarity for the given documents; unknown IDs score 0."""
+        query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            document_ids = [document_id if document_id in self._row_of else -1 for document_id in document_ids]
+        return self._store.get_many(document_ids) @ query
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Document IDs with their full-precision normalized vectors."""
+        with self._lock:
+            ids = self._ids[:self._size].copy()
+        return ids, self._store.get_many(ids.tolist())
+
+    def _grow(self) -> None:
+        capacity = self._codes.shape[0] * 2
+        codes = np.zeros((capacity, self.dim), dtype=self._code_dtype)
+        codes[:self._size] = self._codes[:self._size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._codes, self._scales, self._ids = codes, scales, ids
+
+
+def create_primary_index(precision: str, dim: int = EMBEDDING_DIM) -> VectorIndex:
+    """
+    Build the empty primary index for the configured vector precision.
+
+    Args:
+        precision (str): "float32" for the exact matrix, "float16" or "int8" for quantized codes.
+        dim (int): Vector dimension.
+
+    Returns:
+        VectorIndex: The index.
+    """
+    if precision == "float32":
+        return ExactIndex(dim)
+    return QuantizedIndex(settings.vector_store_path, dim, precision=precision,
+                          rerank_factor=settings.rerank_factor)
+
+
+def create_ann_index(kind: str, dim: int = EMBEDDING_DIM) -> Optional[VectorIndex]:
+    """
+    Build an empty approximate index of the configured kind.
+
+    Args:
+        kind (str): "exact" (no approximate index), "hnsw" or "ivf".
+        dim (int): Vector dimension.
+
+    Returns:
+        Optional[VectorIndex]: The index, or None for exact search.
+    """
+    if kind == "exact":
+        return None
+    if kind == "hnsw":
+        return HNSWIndex(dim, m=settings.hnsw_m, ef_construction=settings.hnsw_ef_construction,
+                         ef_search=settings.hnsw_ef_search)
+    if kind == "ivf":
+        return IVFIndex(dim, nlist=settings.ivf_nlist, nprobe=settings.ivf_nprobe)
+    raise ValueError(f"Unknown vector index kind: {kind}")
+
+
+class IndexManager:
+    """
+    Owns the primary corpus index and, optionally, an approximate index over it.
+
+    The primary index (the exact float32 matrix, or its quantized variant) is
+    the source of truth: every write goes to both, and rebuilds of the
+    approximate index are made from a primary snapshot in a background thread.
+    Writes that arrive during a rebuild are journaled and replayed on the new
+    index before it is swapped in under the lock. The initial load works the
+    same way: writes after `begin_load` are replayed over the loaded
+    snapshot, so none committed while it was being read are lost.
+    """
+
+    def __init__(self, ann_factory: Callable[[], Optional[VectorIndex]],
+                 primary_factory: Optional[Callable[[], VectorIndex]] = None, dim: int = EMBEDDING_DIM,
+                 rebuild_every: int = 10000):
+        self.primary = primary_factory() if primary_factory is not None else ExactIndex(dim)
+        self.ann = ann_factory()
+        self._ann_factory = ann_factory
+        self.rebuild_every = rebuild_every
+        self._changes_since_build = 0
+        self._journal: Optional[list] = None
+        self._load_journal: Optional[list] = None
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+        self.last_rebuild_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.primary.loaded
+
+    def __len__(self) -> int:
+        return len(self.primary)
+
+    def begin_load(self) -> None:
+        """Start journaling writes; call before reading the snapshot that `load` gets."""
+        with self._lock:
+            self._load_journal = []
+
+    def cancel_load(self) -> None:
+        with self._lock:
+            self._load_journal = None
+
+    def load(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        items = list(items)
+        self.primary.load(items)
+        if self.ann is not None:
+            self.ann.load(items)
+        with self._lock:
+            # Writes are idempotent, so replaying ones the snapshot already has is harmless
+            for document_id, vector in self._load_journal or []:
+                if vector is None:
+                    self.primary.remove(document_id)
+                    if self.ann is not None:
+                        self.ann.remove(document_id)
+                else:
+                    self.primary.upsert(document_id, vector)
+                    if self.ann is not None:
+                        self.ann.upsert(document_id, vector)
+            self._load_journal = None
+        self._changes_since_build = 0
+
+    def upsert(self, document_id: int, vector: np.ndarray) -> None:
+        with self._lock:
+            self.primary.upsert(document_id, vector)
+            if self.ann is not None and self.ann.loaded:
+                self.ann.upsert(document_id, vector)
+            for journal in (self._journal, self._load_journal):
+                if journal is not None:
+                    journal.append((document_id, np.array(vector, dtype=np.float32)))
+            self._note_change()
+
+    def remove(self, document_id: int) -> None:
+        with self._lock:
+            self.primary.remove(document_id)
+            if self.ann is not None and self.ann.loaded:
+                self.ann.remove(document_id)
+            for journal in (self._journal, self._load_journal):
+                if journal is not None:
+                    journal.append((document_id, None))
+            self._note_change()
+
+    def candidates(self, query: np.ndarray, k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Candidate documents with their dense scores.
+
+        Exact search scores every document; approximate and quantized indexes
+        return at least `ann_candidates` nearest neighbours. With `k=None` every
+        document is returned with its exact score, whatever the index, so
+        callers that fuse other scores before cutting drop nothing.
+        """
+        if k is None:
+            if isinstance(self.primary, ExactIndex):
+                return self.primary.scores(query)
+            return self.primary.search(query, None)
+        if self.ann is not None and self.ann.loaded:
+            return self.ann.search(query, max(k, settings.ann_candidates))
+        if isinstance(self.primary, ExactIndex):
+            return self.primary.scores(query)
+        return self.primary.search(query, max(k, settings.ann_candidates))
+
+    def search(self, query: np.ndarray, k: Optional[int] = 10) -> Tuple[np.ndarray, np.ndarray]:
+        index = self.ann if self.ann is not None and self.ann.loaded else self.primary
+        return index.search(query, k)
+
+    def score_ids(self, query: np.ndarray, document_ids: Iterable[int]) -> np.ndarray:
+        return self.primary.score_ids(query, document_ids)
+
+    def rebuild_async(self) -> bool:
+        """
+        Rebuild the approximate index in a background thread.
+
+        Returns:
+            bool: False if there is no approximate index or a rebuild is already running.
+        """
+        with self._lock:
+            if self.ann is None or (self._rebuild_thread is not None and self._rebuild_thread.is_alive()):
+                return False
+            self._journal = []
+            ids, vectors = self.primary.snapshot()
+            self._changes_since_build = 0
+            self._rebuild_thread = threading.Thread(target=self._rebuild, args=(ids, vectors), daemon=True,
+                                                    name="vector-index-rebuild")
+            self._rebuild_thread.start()
+            return True
+
+    def _rebuild(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        start = time.perf_counter()
+        try:
+            index = self._ann_factory()
+            index.load(zip(ids.tolist(), vectors))
+            with self._lock:
+                for document_id, vector in self._journal:
+                    if vector is None:
+                        index.remove(document_id)
+                    else:
+                        index.upsert(document_id, vector)
+                self.ann = index
+            self.last_rebuild_seconds = time.perf_counter() - start
+            logging.info(f"Rebuilt vector index with {len(index)} vectors in {self.last_rebuild_seconds:.1f}s")
+        except Exception as e:
+            logging.error(f"Vector index rebuild failed: {e}")
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def _note_change(self) -> None:
+        self._changes_since_build += 1
+        if self.ann is not None and self._changes_since_build >= self.rebuild_every:
+            self.rebuild_async()
+
+    def stats(self) -> dict:
+        return {
+            "kind": settings.vector_index,
+            "precision": settings.vector_precision,
+            "documents": len(self.primary),
+            "memory_bytes": self.primary.memory_bytes,
+            "loaded": self.loaded,
+            "changes_since_build": self._changes_since_build,
+            "rebuilding": self._rebuild_thread is not None and self._rebuild_thread.is_alive(),
+            "last_rebuild_seconds": self.last_rebuild_seconds,
+        }
+
+
+# Full text vectors of all documents, loaded lazily on the first search
+document_index = IndexManager(lambda: create_ann_index(settings.vector_index),
+                              primary_factory=lambda: create_primary_index(settings.vector_precision),
+                              rebuild_every=settings.vector_index_rebuild_every)
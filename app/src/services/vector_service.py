@@ -1,41 +1,235 @@
 from transformers import AutoTokenizer, AutoModel
-import torch
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import logging
-from typing import List
+import os
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+from src.conf.config import settings
+from src.services.embedding_backends import create_embedding_backend
+from src.services.embedding_cache import EmbeddingCache, make_cache_key
+from src.services.corpus_stats import corpus_stats
+from src.services.model_registry import model_registry
+from src.services.resources import model_revision, model_source
 
-# Load a pre-trained language model
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 
-# Convert PyTorch tensor to NumPy array, then to list
-def vectorize_text_llm(text: str) -> list:
+class Embedder:
+    """The sentence encoder with its tokenizer and configured inference backend."""
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        source = model_source(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+        self.model = AutoModel.from_pretrained(source)
+        self.hidden_size = self.model.config.hidden_size
+        self.revision = model_revision(model_name, self.model.config)
+        self.backend = create_embedding_backend(
+            settings.embedding_backend, self.model,
+            onnx_path=os.path.join(settings.embedding_onnx_dir,
+                                   f"{model_name.replace('/', '--')}-{self.revision}.onnx"),
+            threads=settings.embedding_threads,
+        )
+        # Non-default backends get their own cache namespace
+        self.cache_revision = self.revision if self.backend.name == "torch" else f"{self.revision}+{self.backend.name}"
+
+    def warm_up(self) -> None:
+        inputs = self.tokenizer(["warm up"], return_tensors="np")
+        self.backend.embed(inputs["input_ids"].astype(np.int64), inputs["attention_mask"].astype(np.int64))
+
+
+model_registry.register("embedder", Embedder, warmup=Embedder.warm_up, repo_id=MODEL_NAME)
+
+
+def get_embedder() -> Embedder:
+    """The shared `Embedder`, loaded on first use."""
+    return model_registry.get("embedder")
+
+
+embedding_cache = EmbeddingCache(settings.embedding_cache_dir or None, settings.embedding_cache_memory_bytes)
+
+# Sliding-window settings for long documents (token counts exclude [CLS]/[SEP])
+WINDOW_TOKENS = 256
+WINDOW_OVERLAP = 32
+TEXT_BLOCK_CHARS = 8192
+
+
+def _embed_input_ids(batch_input_ids: List[List[int]]) -> np.ndarray:
+    """Pad one batch of token id lists, run the model and mean-pool the output."""
+    embedder = get_embedder()
+    inputs = embedder.tokenizer.pad({"input_ids": batch_input_ids}, padding=True, return_tensors='np')
+    return embedder.backend.embed(inputs["input_ids"].astype(np.int64), inputs["attention_mask"].astype(np.int64))
+
+
+def vectorize_texts_llm(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """
+    Embed many texts with as few forward passes as possible.
+
+    Texts already present in the embedding cache are not re-embedded. The rest
+    are sorted by token length and grouped into buckets of `batch_size`, so
+    every batch is padded only up to its own longest member.
+
+    Args:
+        texts (List[str]): Texts to embed.
+        batch_size (int): Maximum number of texts per forward pass.
+
+    Returns:
+        np.ndarray: C-contiguous float32 matrix of shape (len(texts), hidden_size),
+            rows in the same order as `texts`.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+
+    embedder = get_embedder()
+    embeddings = np.empty((len(texts), embedder.hidden_size), dtype=np.float32)
+    if not texts:
+        return embeddings
+
     try:
-        logging.info(f"Vectorizing text: {text}")
-        inputs = tokenizer(text, return_tensors='pt', padding=True, truncation=True)
-        logging.info(f"Tokenized inputs: {inputs}")
+        keys = [make_cache_key(MODEL_NAME, embedder.cache_revision, "mean", text) for text in texts]
+        missing = []
+        for i, key in enumerate(keys):
+            cached = embedding_cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                embeddings[i] = cached
+        if not missing:
+            return embeddings
+
+        input_ids = embedder.tokenizer([texts[i] for i in missing], truncation=True, padding=False)["input_ids"]
+        order = sorted(range(len(missing)), key=lambda j: len(input_ids[j]))
 
-        with torch.no_grad():
-            embeddings = model(**inputs).last_hidden_state.mean(dim=1)
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            rows = [missing[j] for j in bucket]
+            embeddings[rows] = _embed_input_ids([input_ids[j] for j in bucket])
+            for row in rows:
+                embedding_cache.put(keys[row], embeddings[row])
 
-        vector_list = embeddings.tolist()
-        logging.info(f"Generated vector list: {vector_list}")
-        return vector_list
+        return embeddings
     except Exception as e:
-        logging.error(f"Failed to vectorize text using LLM: {e}")
-        raise ValueError(f"Failed to vectorize text using LLM: {e}")
+        logging.error(f"Failed to vectorize texts using LLM: {e}")
+        raise ValueError(f"Failed to vectorize texts using LLM: {e}")
+
+
+# Convert PyTorch tensor to NumPy array, then to list
+def vectorize_text_llm(text: str) -> list:
+    logging.info(f"Vectorizing text of {len(text)} characters")
+    vector_list = vectorize_texts_llm([text]).tolist()
+    return vector_list
+
 
+def _iter_text_blocks(text: str, block_chars: int) -> Iterator[str]:
+    """Yield consecutive slices of `text`, cut on whitespace so no word is split."""
+    start = 0
+    while start < len(text):
+        end = min(start + block_chars, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start, end)
+            if cut > start:
+                end = cut
+        yield text[start:end]
+        start = end
 
 
-# TF-IDF Vectorizer - Computed at runtime
-def compute_tfidf(query: str, documents: list) -> np.ndarray:
-    vectorizer = TfidfVectorizer()
-    all_texts = [query] + documents  # Query + all document texts
-    tfidf_matrix = vectorizer.fit_transform(all_texts)
-    return tfidf_matrix
+def iter_token_windows(text: str, window_tokens: int = WINDOW_TOKENS, overlap: int = WINDOW_OVERLAP,
+                       block_chars: int = TEXT_BLOCK_CHARS) -> Iterator[List[int]]:
+    """
+    Yield overlapping windows of token ids covering the whole text.
+
+    The text is tokenized block by block, so at most one block plus one window
+    of token ids is held in memory at any time.
+
+    Args:
+        text (str): The document text.
+        window_tokens (int): Tokens per window, without special tokens.
+        overlap (int): Tokens shared by two consecutive windows.
+        block_chars (int): Characters tokenized per step.
+
+    Yields:
+        List[int]: Token ids of one window (without special tokens).
+    """
+    tokenizer = get_embedder().tokenizer
+    if window_tokens + tokenizer.num_special_tokens_to_add() > tokenizer.model_max_length:
+        raise ValueError(f"window_tokens must not exceed {tokenizer.model_max_length} including special tokens.")
+    if not 0 <= overlap < window_tokens:
+        raise ValueError("overlap must be non-negative and smaller than window_tokens.")
+
+    stride = window_tokens - overlap
+    buffer: List[int] = []
+    emitted = False
+
+    for block in _iter_text_blocks(text, block_chars):
+        buffer.extend(tokenizer(block, add_special_tokens=False)["input_ids"])
+        while len(buffer) >= window_tokens:
+            yield buffer[:window_tokens]
+            emitted = True
+            del buffer[:stride]
+
+    # The tail is already covered when it is no longer than the overlap
+    if not emitted or len(buffer) > overlap:
+        yield buffer
+
+
+def vectorize_document_llm(text: str, window_tokens: int = WINDOW_TOKENS, overlap: int = WINDOW_OVERLAP,
+                           batch_size: int = 32, return_windows: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Embed a document of any length with overlapping token windows.
+
+    Windows are embedded `batch_size` at a time and folded into a running,
+    token-weighted mean, so peak memory does not grow with document length
+    unless per-window vectors are requested.
+
+    Args:
+        text (str): The document text.
+        window_tokens (int): Tokens per window, without special tokens.
+        overlap (int): Tokens shared by two consecutive windows.
+        batch_size (int): Windows per forward pass.
+        return_windows (bool): Also return the vector of every window.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray]]: The float32 document vector and,
+            if requested, a float32 matrix with one row per window.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+
+    embedder = get_embedder()
+    cache_key = make_cache_key(MODEL_NAME, embedder.cache_revision, f"window-mean:{window_tokens}:{overlap}", text)
+    if not return_windows:
+        cached = embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached.copy(), None
+
+    try:
+        windows = iter_token_windows(text, window_tokens, overlap)
+        vector_sum = np.zeros(embedder.hidden_size, dtype=np.float64)
+        total_weight = 0.0
+        window_vectors = []
+
+        while True:
+            batch = list(islice(windows, batch_size))
+            if not batch:
+                break
+
+            vectors = _embed_input_ids([embedder.tokenizer.build_inputs_with_special_tokens(ids) for ids in batch])
+            weights = np.array([max(len(ids), 1) for ids in batch], dtype=np.float64)
+            vector_sum += weights @ vectors
+            total_weight += weights.sum()
+            if return_windows:
+                window_vectors.append(vectors)
+
+        document_vector = (vector_sum / total_weight).astype(np.float32)
+        embedding_cache.put(cache_key, document_vector)
+        windows_matrix = np.ascontiguousarray(np.concatenate(window_vectors)) if return_windows else None
+        return document_vector, windows_matrix
+    except ValueError:
+        raise
+    except Exception as e:
+        logging.error(f"Failed to vectorize document using LLM: {e}")
+        raise ValueError(f"Failed to vectorize document using LLM: {e}")
 
 
 def compute_similarity(question: str, sentence: str) -> float:
@@ -54,11 +248,21 @@ def compute_similarity(question: str, sentence: str) -> float:
     cosine_sim = cosine_similarity([vectors[0]], [vectors[1]])[0][0]
     return cosine_sim
 
-def extract_keywords(text: str, num_keywords: int = 10) -> List[str]:
+def extract_keywords(text: str, num_keywords: int = 10, lang: str = "en") -> List[str]:
     """
     Extract keywords from the text using TF-IDF.
+
+    Term counts of the text are weighted by the IDF of the corpus documents
+    of the same language, kept up to date at upload by `corpus_stats`.
+    Until the statistics are loaded every IDF is 1 and keywords are ranked
+    by term count alone.
+
+    Args:
+        text (str): The text.
+        num_keywords (int): Number of keywords to return.
+        lang (str): Language of the text.
+
+    Returns:
+        List[str]: Keywords, best first.
     """
-    vectorizer = TfidfVectorizer(stop_words='english', max_features=num_keywords)
-    vectors = vectorizer.fit_transform([text])
-    feature_names = vectorizer.get_feature_names_out()
-    return feature_names.tolist()
+    return corpus_stats.extract_keywords(text, lang, num_keywords)
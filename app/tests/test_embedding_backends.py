@@ -0,0 +1,35 @@
+"""
+Parity of every embedding backend with the eager fp32 model.
+
+Skipped without onnxruntime (the `onnx` extra) or when the embedding model
+cannot be loaded. Run from the `app` directory:
+    python -m pytest tests/test_embedding_backends.py
+"""
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from src.services.embedding_backends import PARITY_MIN_COSINE, TorchBackend, backend_parity, create_embedding_backend
+from src.services.vector_service import MODEL_NAME
+
+
+@pytest.fixture(scope="module")
+def model_and_tokenizer():
+    try:
+        tokenizer = transformers.AutoTokenizer.from_pretrained(MODEL_NAME)
+        model = transformers.AutoModel.from_pretrained(MODEL_NAME).eval()
+    except OSError as e:
+        pytest.skip(f"{MODEL_NAME} is not available: {e}")
+    return model, tokenizer
+
+
+@pytest.mark.parametrize("kind", ["torch", "torch_int8", "onnx"])
+def test_backend_parity(kind, model_and_tokenizer, tmp_path):
+    model, tokenizer = model_and_tokenizer
+    backend = create_embedding_backend(kind, model, onnx_path=str(tmp_path / "model.onnx"))
+
+    cosines = backend_parity(backend, TorchBackend(model), tokenizer)
+
+    assert cosines.min() >= PARITY_MIN_COSINE, f"{kind} parity {cosines.min():.5f} < {PARITY_MIN_COSINE}"